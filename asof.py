@@ -0,0 +1,70 @@
+# asof.py
+# ==================================================
+# JOINTURE "AS-OF" SANS FUITE DU JOUR MÊME
+# ==================================================
+# Une caractéristique tirée de l'historique (forme, notes, biais de
+# corde, réussite d'un jockey...) ne doit utiliser que les courses
+# STRICTEMENT antérieures au jour de la course. Filtrer l'historique
+# course par course serait quadratique : ici, une seule fusion triée
+# (pd.merge_asof) attache à chaque ligne la dernière valeur connue
+# la veille au plus tard.
+#
+# Table de caractéristiques : une clé (cheval, jockey...), une colonne
+# date ("AAAA-MM-JJ") = jour APRÈS lequel la valeur est connue, et les
+# colonnes de valeurs. Granularité au jour : les heures de départ ne
+# sont pas dans les données, deux courses du même jour ne se voient pas.
+
+import numpy as np
+import pandas as pd
+
+COLONNE_SOURCE = "date_source"
+
+
+def numero_jour(dates):
+    """Dates 'AAAA-MM-JJ' (ou Timestamp) -> numéros de jour (int64)"""
+    dates = pd.Series(dates, dtype=object).astype(str)
+    return pd.to_datetime(dates).to_numpy("datetime64[D]").astype(np.int64)
+
+
+def joindre_asof(gauche, table, par, colonnes=None, date="date"):
+    """
+    Pour chaque ligne de gauche (colonnes par + date), valeurs de table
+    à la dernière date STRICTEMENT antérieure, pour la même clé.
+    Retourne un DataFrame aligné sur l'index de gauche : colonnes
+    demandées + date_source (date de la valeur utilisée, vide si aucune).
+    Lève ValueError si une valeur du jour même ou future était attachée.
+    """
+    if colonnes is None:
+        colonnes = [c for c in table.columns if c not in (par, date)]
+    colonnes = list(colonnes)
+
+    g = pd.DataFrame({
+        "_cle": gauche[par].to_numpy(),
+        "_jour": numero_jour(gauche[date]),
+        "_ligne": np.arange(len(gauche)),
+    })
+    d = pd.DataFrame({
+        "_cle": table[par].to_numpy(),
+        "_jour": numero_jour(table[date]),
+        COLONNE_SOURCE: table[date].astype(str).to_numpy(),
+        **{c: table[c].to_numpy() for c in colonnes},
+    })
+
+    # Clés absentes : pas de correspondance possible
+    g = g[g["_cle"].notna()]
+    d = d[d["_cle"].notna()]
+
+    fusion = pd.merge_asof(
+        g.sort_values("_jour", kind="stable"),
+        d.sort_values("_jour", kind="stable").rename(columns={"_jour": "_jour_source"}),
+        left_on="_jour", right_on="_jour_source", by="_cle",
+        direction="backward", allow_exact_matches=False,
+    )
+
+    trouve = fusion["_jour_source"].notna()
+    if (fusion.loc[trouve, "_jour_source"] >= fusion.loc[trouve, "_jour"]).any():
+        raise ValueError("Jointure as-of : valeur du jour même ou postérieure")
+
+    resultat = fusion.set_index("_ligne")[colonnes + [COLONNE_SOURCE]].reindex(np.arange(len(gauche)))
+    resultat.index = gauche.index
+    return resultat
@@ -1,78 +1,88 @@
+import numpy as np
 import pandas as pd
-import sys
-from collections import defaultdict
+import os
 
 # Importer ton système 1RSE
 from test_rse_turfbzh import (
-    to_float, clamp, calcul_score_rse, compter_signaux_ok,
-    calcul_confiance, trier_schema, DOMAINES, SEUILS, BORDAS
+    to_float_serie, analyser_musique_serie,
+    calcul_confiance, stable_seed_numeros, DOMAINES, SEUILS, BORDAS,
+    POIDS_CONFIANCE
 )
-from cheval import Cheval
+from bordas import tables_hippodrome, tables_sans_fuite, tranches_distance
+from champ import ChampCourse
+from historique import caracteristiques_asof, charger_table
+from stockage import lire_dataset, lire_rapports
+from telemetrie import etape, point_entree
 
-def simuler_course(partants_df, hippodrome, discipline):
+def champ_partants(partants_df, regles, avec_musique=False):
+    """
+    ChampCourse d'une course, colonne par colonne (sans iterrows) :
+    domaine, score RSE, signaux et jockey, mêmes règles que simuler_course
+    """
+    repos = _colonne(partants_df, 'repos')
+    if 'actif' in partants_df.columns:
+        actif = (partants_df['actif'] == 1).to_numpy(dtype=bool)
+    else:
+        actif = np.zeros(len(partants_df), dtype=bool)
+
+    # Score RSE (simplifié sans MultiIndex)
+    with np.errstate(invalid="ignore"):
+        score_rse = np.where(np.isnan(repos), 0, np.where((repos >= 7) & (repos <= 21), 2, 1))
+    score_rse = score_rse + actif
+    if avec_musique and 'musique' in partants_df.columns:
+        score_rse = score_rse + np.minimum(
+            analyser_musique_serie(partants_df['musique']).to_numpy() // 2, 2)
+
+    # Signaux (NaN -> False, comme "x is not None and ...")
+    with np.errstate(invalid="ignore"):
+        signaux = {
+            "SIGMA_OK": _colonne(partants_df, 'sigma') >= SEUILS["SIGMA_MIN"],
+            "IA_OK": _colonne(partants_df, 'prediction_ia') <= SEUILS["IA_RANK_MAX"],
+            "ELO_OK": _colonne(partants_df, 'elo_cheval') >= SEUILS["ELO_MIN"],
+            "VALUE_OK": _colonne(partants_df, 'cote') >= SEUILS["COTE_MIN"],
+        }
+
+    jockey = partants_df['jockey'] if 'jockey' in partants_df.columns else None
+    champ = ChampCourse(
+        partants_df['numero'].to_numpy(),
+        nom=partants_df['nom'].astype(str).to_numpy(),
+        score_RSE=score_rse,
+        **signaux,
+        driver_nom=None if jockey is None else jockey.to_numpy(dtype=object),
+        driver_elo=_colonne(partants_df, 'elo_jockey'),
+    )
+    champ.definir_domaine(regles, repos, actif)
+    return champ
+
+def simuler_course(partants_df, hippodrome, discipline, avec_musique=False, distance=None,
+                   tables_bordas=None):
     """
     Simule l'analyse 1RSE sur une course
+    avec_musique : ajoute les points musique au score RSE (comme calcul_score_rse)
+    distance : choix de la table de corde apprise
+    tables_bordas : tables apprises sans fuite (bordas.tables_sans_fuite),
+    None = aucune (BORDAS seul)
+    Le champ est traité en colonnes (ChampCourse) ; seuls les chevaux du
+    schéma sont matérialisés en Cheval pour calcul_confiance.
     Retourne : base recommandée, ticket, confiance
     """
     regles = DOMAINES.get(discipline)
     if not regles:
         return None, [], 0.0
     
-    chevaux = []
-    
-    for _, row in partants_df.iterrows():
-        c = Cheval(row['numero'], row['nom'])
-        
-        # Domaine
-        repos = to_float(row.get('repos'))
-        actif = (row.get('actif') == 1)
-        
-        V = actif if regles["actif_only"] else True
-        F = (repos is None) or (repos <= regles["repos_max"])
-        
-        c.set_domaine(V, F)
-        
-        # Score RSE (simplifié sans MultiIndex)
-        score_rse = 0
-        if repos is not None:
-            score_rse += 2 if 7 <= repos <= 21 else 1
-        if actif:
-            score_rse += 1
-        # TODO : analyser musique si disponible
-        
-        c.set_score_rse(score_rse)
-        
-        # Signaux
-        sigma = to_float(row.get('sigma'))
-        ia = to_float(row.get('prediction_ia'))
-        elo_c = to_float(row.get('elo_cheval'))
-        cote = to_float(row.get('cote'))
-        
-        c.set_signaux(
-            sigma=(sigma is not None and sigma >= SEUILS["SIGMA_MIN"]),
-            ia=(ia is not None and ia <= SEUILS["IA_RANK_MAX"]),
-            elo=(elo_c is not None and elo_c >= SEUILS["ELO_MIN"]),
-            value=(cote is not None and cote >= SEUILS["COTE_MIN"])
-        )
-        
-        # Jockey
-        elo_j = to_float(row.get('elo_jockey'))
-        c.set_driver(row.get('jockey'), elo_j)
-        
-        chevaux.append(c)
-    
-    # Tri du schéma
-    schema = trier_schema([c for c in chevaux if c.est_dans_domaine()])
+    # Domaine + tri du schéma (même ordre que trier_schema)
+    schema = champ_partants(partants_df, regles, avec_musique).schema()
     
     if len(schema) < 2:
         return None, [], 0.0
     
     # Confiance
-    conf = calcul_confiance(schema, hippodrome)
+    conf = calcul_confiance(schema.chevaux(), hippodrome, discipline=discipline, distance=distance,
+                            tables_bordas=tables_bordas or {})
     
     # Ticket (on prend les 3 premiers pour simplifier)
-    ticket = [c.numero for c in schema[:3]]
-    base = schema[0].numero
+    ticket = schema.numero[:3].tolist()
+    base = ticket[0]
     
     return base, ticket, conf
 
@@ -95,19 +105,535 @@ def evaluer_resultat(base, ticket, arrivee):
     
     return resultats
 
-def backtest_complet(fichier_excel):
+def colonne_course(df):
     """
-    Lance le backtest sur toutes les courses
+    Nom de la colonne du numéro de course ('numero_course' ou 'course')
     """
-    print("🏇 BACKTEST SYSTÈME 1RSE")
-    print("=" * 70)
-    
-    # Charger les données
-    df_partants = pd.read_excel(fichier_excel, sheet_name='Partants')
-    df_courses = pd.read_excel(fichier_excel, sheet_name='Courses')
-    
-    print(f"📊 {len(df_courses)} courses à analyser")
-    
+    return 'numero_course' if 'numero_course' in df.columns else 'course'
+
+# ==================================================
+# MOTEUR VECTORISÉ (partants groupés une seule fois)
+# ==================================================
+def _colonne(df, nom):
+    """Colonne convertie en float (NaN si absente ou invalide)"""
+    if nom not in df.columns:
+        return np.full(len(df), np.nan)
+    return to_float_serie(df[nom]).to_numpy()
+
+def indexer_partants(df_partants, df_courses):
+    """
+    Regroupe UNE fois les partants par (date, hippodrome, course) et
+    pré-calcule les colonnes qui ne dépendent d'aucun paramètre.
+    Retourne un dict de tableaux numpy :
+    - niveau course  : hippodrome, discipline, arrivee (n x 3), arrivee_valide
+    - niveau partant : idx_course (trié), numero, repos, actif, sigma, ia, ...
+    """
+    col_p = colonne_course(df_partants)
+    col_c = colonne_course(df_courses)
+    cles = ['date', 'hippodrome', col_c]
+
+    courses = df_courses[cles].copy()
+    courses['_idx_course'] = np.arange(len(df_courses))
+    # Une clé NaN ne correspond à aucun partant (NaN != NaN dans le masque)
+    courses = courses.dropna(subset=cles)
+
+    partants = df_partants[['date', 'hippodrome', col_p]].rename(columns={col_p: col_c})
+    partants = partants.assign(_pos=np.arange(len(df_partants)))
+
+    lien = courses.merge(partants, on=cles, how='inner')
+    idx_course = lien['_idx_course'].to_numpy()
+    pos = lien['_pos'].to_numpy()
+    ordre = np.lexsort((pos, idx_course))
+    idx_course, pos = idx_course[ordre], pos[ordre]
+
+    sel = df_partants.iloc[pos]
+
+    # Arrivée : valide seulement si les 3 premières places sont connues
+    arrivee = np.column_stack([
+        pd.to_numeric(df_courses[f'arrivee_{i}'], errors='coerce').to_numpy(dtype=float)
+        for i in (1, 2, 3)
+    ]) if len(df_courses) else np.empty((0, 3))
+    arrivee_valide = ~np.isnan(arrivee).any(axis=1)
+    arrivee = np.where(np.isnan(arrivee), -1, arrivee).astype(np.int64)
+
+    return {
+        'n_courses': len(df_courses),
+        'hippodrome': df_courses['hippodrome'].to_numpy(dtype=object),
+        'discipline': df_courses['discipline'].to_numpy(dtype=object),
+        'distance': _colonne(df_courses, 'distance'),
+        # Tables de corde apprises sur des courses antérieures à la période
+        'tables_bordas': tables_sans_fuite(
+            df_courses['date'].astype(str).str[:10].min() if len(df_courses) else None),
+        'arrivee': arrivee,
+        'arrivee_valide': arrivee_valide,
+        'idx_course': idx_course,
+        'numero': to_float_serie(sel['numero']).to_numpy().astype(np.int64),
+        'repos': _colonne(sel, 'repos'),
+        'actif': (sel['actif'] == 1).to_numpy() if 'actif' in sel.columns else np.zeros(len(sel), dtype=bool),
+        'sigma': _colonne(sel, 'sigma'),
+        'ia': _colonne(sel, 'prediction_ia'),
+        'elo_cheval': _colonne(sel, 'elo_cheval'),
+        'elo_jockey': _colonne(sel, 'elo_jockey'),
+        'cote': _colonne(sel, 'cote'),
+        # Points musique (0-2), utilisés si avec_musique=True
+        'musique': (
+            np.minimum(analyser_musique_serie(sel['musique']).to_numpy() // 2, 2)
+            if 'musique' in sel.columns else np.zeros(len(sel), dtype=np.int64)
+        ),
+    }
+
+def _lookup(bonus, m, numeros, tables):
+    """bonus[m] = valeur des numéros dans tables (la dernière l'emporte, absent = 0)"""
+    lookup = np.zeros(max(max(t, default=0) for t in tables) + 1)
+    for table in tables:
+        for num, b in table.items():
+            lookup[num] = b
+    nums = numeros[m]
+    dans_table = (nums >= 0) & (nums < len(lookup))
+    bonus[m] = np.where(dans_table, lookup[np.clip(nums, 0, len(lookup) - 1)], 0.0)
+
+def _bonus_bordas(hippodromes, numeros, disciplines=None, distances=None, tables=None):
+    """
+    Bonus corde de la base, par table de correspondance : table apprise
+    (tables, cf. bordas.tables_sans_fuite) pour les hippodromes qui y
+    figurent, sinon BORDAS
+    """
+    bonus = np.zeros(len(numeros))
+    appris = np.zeros(len(numeros), dtype=bool)
+
+    if tables and len(numeros):
+        n = len(numeros)
+        disciplines = np.full(n, None, dtype=object) if disciplines is None else disciplines
+        tranches = tranches_distance(np.full(n, np.nan) if distances is None else distances)
+        # Une table par combinaison (hippodrome, discipline, tranche) distincte
+        groupe, _ = pd.factorize(pd.Series(hippodromes, dtype=object).astype(str) + "|"
+                                 + pd.Series(disciplines, dtype=object).astype(str) + "|"
+                                 + pd.Series(tranches, dtype=object).astype(str))
+        premiers = np.unique(groupe, return_index=True)[1]
+        for g, i in enumerate(premiers):
+            chaine = tables_hippodrome(hippodromes[i], disciplines[i], tranches[i], tables)
+            if chaine is None:
+                continue
+            m = groupe == g
+            _lookup(bonus, m, numeros, chaine[::-1])
+            appris |= m
+
+    for hippo, table in BORDAS.items():
+        m = (hippodromes == hippo) & ~appris
+        if m.any():
+            _lookup(bonus, m, numeros, [table])
+    return bonus
+
+def caracteristiques_fixes(index, avec_musique=False):
+    """
+    Colonnes niveau partant qui ne dépendent ni de DOMAINES, ni de SEUILS,
+    ni des poids de la confiance : calculées une fois pour tout un balayage.
+    - score : score RSE (repos + actif [+ musique])
+    - drank / impact : rang et impact du jockey (cf. Cheval)
+    - disciplines / code_discipline : disciplines distinctes et code par course
+    """
+    repos = index['repos']
+    with np.errstate(invalid='ignore'):
+        score = np.where(np.isnan(repos), 0, np.where((repos >= 7) & (repos <= 21), 2, 1))
+    score = score + index['actif'].astype(np.int64)
+    if avec_musique:
+        score = score + index['musique']
+
+    with np.errstate(invalid='ignore'):
+        elo_j = index['elo_jockey']
+        drank = np.where(np.isnan(elo_j), 1, np.where(elo_j >= 1600, 2, np.where(elo_j >= 1450, 1, 0)))
+        impact = np.select(
+            [np.isnan(elo_j), elo_j >= 1600, elo_j >= 1500, elo_j >= 1450],
+            [0.0, 0.12, 0.05, 0.0],
+            default=-0.10
+        )
+
+    disciplines, code = np.unique(index['discipline'].astype(str), return_inverse=True)
+
+    return {
+        'avec_musique': avec_musique,
+        'disciplines': [index['discipline'][code == i][0] for i in range(len(disciplines))],
+        'code_discipline': code,
+        'score': score,
+        'drank': drank,
+        'impact': impact,
+    }
+
+def simuler_courses_vectorise(index, domaines=DOMAINES, seuils=SEUILS, avec_musique=False,
+                              poids=POIDS_CONFIANCE, fixes=None):
+    """
+    Équivalent de simuler_course sur toutes les courses d'un index à la fois.
+    poids : pondération de la confiance (voir POIDS_CONFIANCE)
+    fixes : résultat de caracteristiques_fixes, pour ne pas le recalculer
+    Retourne un dict de tableaux niveau course :
+    jouable, base, ticket (n x 3, -1 si vide), nb_ticket, nb_schema, confiance
+    + schema_ordre / debut_schema : le schéma trié de la course i est
+    index['numero'][schema_ordre[debut_schema[i]:debut_schema[i] + nb_schema[i]]]
+    """
+    n = index['n_courses']
+    idx = index['idx_course']
+    if fixes is None or fixes['avec_musique'] != avec_musique:
+        fixes = caracteristiques_fixes(index, avec_musique)
+    score, drank, impact = fixes['score'], fixes['drank'], fixes['impact']
+
+    # Règles du domaine par course (discipline inconnue => non jouable),
+    # via une table par discipline distincte
+    disciplines, code = fixes['disciplines'], fixes['code_discipline']
+    regle_ok = np.array([d in domaines for d in disciplines], dtype=bool)[code]
+    repos_max = np.array([domaines[d]["repos_max"] if d in domaines else np.nan for d in disciplines])[code]
+    actif_only = np.array([d in domaines and domaines[d]["actif_only"] for d in disciplines], dtype=bool)[code]
+
+    repos = index['repos']
+    actif = index['actif']
+
+    # Domaine
+    V = np.where(actif_only[idx], actif, True)
+    with np.errstate(invalid='ignore'):
+        F = np.isnan(repos) | (repos <= repos_max[idx])
+    dans_domaine = V & F & regle_ok[idx]
+
+    # Signaux (NaN => False)
+    with np.errstate(invalid='ignore'):
+        signaux = (
+            (index['sigma'] >= seuils["SIGMA_MIN"]).astype(np.int64)
+            + (index['ia'] <= seuils["IA_RANK_MAX"])
+            + (index['elo_cheval'] >= seuils["ELO_MIN"])
+            + (index['cote'] >= seuils["COTE_MIN"])
+        )
+
+    # Tri du schéma : même clé que trier_schema, tri stable sur l'ordre d'origine
+    sel = np.flatnonzero(dans_domaine)
+    ordre = sel[np.lexsort((sel, -signaux[sel], -drank[sel], -score[sel], idx[sel]))]
+    idx_s = idx[ordre]
+
+    courses, debut, nb = np.unique(idx_s, return_index=True, return_counts=True)
+    nb_schema = np.zeros(n, dtype=np.int64)
+    nb_schema[courses] = nb
+    debut_schema = np.full(n, -1, dtype=np.int64)
+    debut_schema[courses] = debut
+    jouable = nb_schema >= 2
+
+    c_j = courses[nb >= 2]
+    d_j = debut[nb >= 2]
+    n_j = nb[nb >= 2]
+    p0, p1 = ordre[d_j], ordre[d_j + 1]
+
+    base = np.full(n, -1, dtype=np.int64)
+    base[c_j] = index['numero'][p0]
+
+    ticket = np.full((n, 3), -1, dtype=np.int64)
+    nb_ticket = np.minimum(nb_schema, 3) * jouable
+    for k in range(3):
+        a_k = n_j > k
+        ticket[c_j[a_k], k] = index['numero'][ordre[d_j[a_k] + k]]
+
+    # Confiance (mêmes opérations que calcul_confiance)
+    gap = np.clip((score[p0] - score[p1]) / 5, 0.0, 1.0)
+    sig = signaux[p0] / 4
+    size = np.clip(1 - (n_j - 2) / 8, 0.0, 1.0)
+    conf = poids["gap"] * gap + poids["signaux"] * sig + poids["taille"] * size
+    conf = conf + impact[p0]
+    conf = conf + _bonus_bordas(index['hippodrome'][c_j], base[c_j],
+                                index['discipline'][c_j], index['distance'][c_j], index['tables_bordas'])
+
+    confiance = np.zeros(n)
+    confiance[c_j] = np.clip(conf, 0.0, 1.0)
+
+    return {
+        'jouable': jouable,
+        'base': base,
+        'ticket': ticket,
+        'nb_ticket': nb_ticket,
+        'nb_schema': nb_schema,
+        'confiance': confiance,
+        'schema_ordre': ordre,
+        'debut_schema': debut_schema,
+    }
+
+def evaluer_resultats_vectorise(simulation, index):
+    """
+    Équivalent de evaluer_resultat pour toutes les courses jouables.
+    Une arrivée incomplète (< 3 places) ne compte aucun gain.
+    """
+    arr = index['arrivee']
+    valide = index['arrivee_valide'] & simulation['jouable']
+    base = simulation['base']
+    ticket = simulation['ticket']
+    nb_ticket = simulation['nb_ticket']
+
+    def dans_top3(x):
+        return (x == arr[:, 0]) | (x == arr[:, 1]) | (x == arr[:, 2])
+
+    t0, t1, t2 = ticket[:, 0], ticket[:, 1], ticket[:, 2]
+    return {
+        'base_gagnante': valide & (base == arr[:, 0]),
+        'base_placee': valide & dans_top3(base),
+        'couple_gagnant': valide & (nb_ticket >= 2) & (t0 == arr[:, 0]) & (t1 == arr[:, 1]),
+        'couple_place': valide & (nb_ticket >= 2) & dans_top3(t0) & dans_top3(t1),
+        'trio': valide & (nb_ticket >= 3) & dans_top3(t0) & dans_top3(t1) & dans_top3(t2),
+    }
+
+def backtest_vectorise(df_partants, df_courses, avec_musique=False):
+    """
+    Backtest sans boucle par course : retourne (stats_globales, df_resultats)
+    identiques au chemin simuler_course / evaluer_resultat
+    """
+    index = indexer_partants(df_partants, df_courses)
+    simulation = simuler_courses_vectorise(index, avec_musique=avec_musique)
+    resultats = evaluer_resultats_vectorise(simulation, index)
+
+    jouable = simulation['jouable']
+    stats_globales = {
+        'total_courses': len(df_courses),
+        'courses_jouables': int(jouable.sum()),
+        **{k: int(v.sum()) for k, v in resultats.items()}
+    }
+
+    # Accumulateurs colonnes (une colonne = un tableau)
+    j = np.flatnonzero(jouable)
+    numeros_schema = index['numero'][simulation['schema_ordre']]
+    dates = df_courses['date'].to_numpy()[j]
+    num_courses = df_courses[colonne_course(df_courses)].to_numpy()[j]
+    seeds = [
+        stable_seed_numeros(f"{d}_{h}_C{c}", h, disc, numeros_schema[s:s + k])
+        for d, h, c, disc, s, k in zip(
+            dates, index['hippodrome'][j], num_courses, index['discipline'][j],
+            simulation['debut_schema'][j], simulation['nb_schema'][j]
+        )
+    ]
+    arrivee = index['arrivee'][j]
+    nb_ticket = simulation['nb_ticket'][j]
+    df_resultats = pd.DataFrame({
+        'date': dates,
+        'hippodrome': index['hippodrome'][j],
+        'course': num_courses,
+        'discipline': index['discipline'][j],
+        'base': simulation['base'][j],
+        'ticket': [t[:k].tolist() for t, k in zip(simulation['ticket'][j], nb_ticket)],
+        'confiance': simulation['confiance'][j],
+        'arrivee': [[int(x) for x in a if x >= 0] for a in arrivee],
+        **{k: v[j] for k, v in resultats.items()},
+        'partants': np.bincount(index['idx_course'], minlength=index['n_courses'])[j],
+        # Pour le Monte Carlo du dé (monte_carlo.distribution_backtest)
+        'nb_schema': simulation['nb_schema'][j],
+        'seed': np.array(seeds, dtype=np.int64),
+    })
+
+    return stats_globales, df_resultats
+
+# ==================================================
+# ROI (DIVIDENDES OFFICIELS)
+# ==================================================
+# Seuils de confiance de poids_faces / face_to_pari
+TRANCHES_CONFIANCE = [0.0, 0.5, 0.6, 0.7, 0.75]
+
+# Pari évalué -> (typePari PMU, nombre de chevaux du ticket joués)
+PARIS_ROI = {
+    'Simple Gagnant': ('SIMPLE_GAGNANT', 1),
+    'Simple Placé': ('SIMPLE_PLACE', 1),
+    'Couplé Gagnant': ('COUPLE_GAGNANT', 2),
+    'Couplé Placé': ('COUPLE_PLACE', 2),
+    'Trio': ('TRIO', 3),
+}
+
+def tranche_confiance(confiance, tranches=TRANCHES_CONFIANCE):
+    """Libellé de tranche ('0.50-0.60', ..., '0.75+') pour chaque confiance"""
+    bornes = list(tranches) + [np.inf]
+    libelles = [
+        f"{a:.2f}-{b:.2f}" if np.isfinite(b) else f"{a:.2f}+"
+        for a, b in zip(bornes[:-1], bornes[1:])
+    ]
+    return pd.cut(confiance, bornes, right=False, labels=libelles)
+
+def _cle_course(df):
+    return pd.DataFrame({
+        'date': df['date'].astype(str).to_numpy(),
+        'hippodrome': df['hippodrome'].astype(str).to_numpy(),
+        'course': df['course'].astype(str).to_numpy(),
+    })
+
+def roi_vectorise(df_resultats, df_rapports, mise=1.0, tranches=TRANCHES_CONFIANCE):
+    """
+    Mise, retour et ROI par type de pari et par tranche de confiance,
+    en joignant les tickets du backtest aux dividendes officiels.
+    Une course sans dividende publié pour un pari n'est pas comptée
+    pour ce pari. Combinaisons comparées dans l'ordre PMU (couplés et
+    trio sans ordre). Retourne un DataFrame (tranche 'toutes' = total).
+    """
+    colonnes = ['pari', 'tranche', 'paris', 'gagnants', 'mise', 'retour', 'gain_net', 'roi']
+    if len(df_resultats) == 0 or len(df_rapports) == 0:
+        return pd.DataFrame(columns=colonnes)
+
+    cles = _cle_course(df_resultats)
+    tickets = np.array([(list(t) + [-1, -1, -1])[:3] for t in df_resultats['ticket']], dtype=np.int64)
+    tranche = tranche_confiance(df_resultats['confiance'].to_numpy(dtype=float), tranches)
+
+    # Un pari par course jouable et par type : combinaison normalisée "a-b-c"
+    paris = []
+    for libelle, (type_pmu, k) in PARIS_ROI.items():
+        valide = tickets[:, k - 1] >= 0
+        combi = np.sort(tickets[valide, :k], axis=1).astype(str)
+        combinaison = pd.Series(combi[:, 0])
+        if k > 1:
+            combinaison = combinaison.str.cat([pd.Series(combi[:, i]) for i in range(1, k)], sep='-')
+        paris.append(cles[valide].reset_index(drop=True).assign(
+            pari=libelle, type_pmu=type_pmu,
+            combinaison=combinaison.to_numpy(), tranche=np.asarray(tranche)[valide],
+        ))
+    paris = pd.concat(paris, ignore_index=True)
+
+    rapports = _cle_course(df_rapports).assign(
+        type_pmu=df_rapports['pari'].astype(str).to_numpy(),
+        combinaison=df_rapports['combinaison'].astype(str).to_numpy(),
+        dividende=pd.to_numeric(df_rapports['dividende'], errors='coerce').to_numpy(),
+    )
+    cle_pari = ['date', 'hippodrome', 'course', 'type_pmu']
+    publies = rapports[cle_pari].drop_duplicates()
+    dividendes = rapports.groupby(cle_pari + ['combinaison'], as_index=False)['dividende'].max()
+
+    paris = paris.merge(publies, on=cle_pari, how='inner')
+    paris = paris.merge(dividendes, on=cle_pari + ['combinaison'], how='left')
+    paris['mise'] = mise
+    paris['retour'] = paris['dividende'].fillna(0.0) * mise
+    paris['gagnants'] = paris['retour'] > 0
+
+    def agreger(df, cles_groupe):
+        g = df.groupby(cles_groupe, observed=True).agg(
+            paris=('mise', 'size'), gagnants=('gagnants', 'sum'),
+            mise=('mise', 'sum'), retour=('retour', 'sum'),
+        ).reset_index()
+        g['gain_net'] = g['retour'] - g['mise']
+        g['roi'] = g['gain_net'] / g['mise']
+        return g
+
+    par_tranche = agreger(paris, ['pari', 'tranche'])
+    par_tranche['tranche'] = par_tranche['tranche'].astype(str)
+    total = agreger(paris, ['pari']).assign(tranche='toutes')
+
+    # Ordre de PARIS_ROI, total du pari puis tranches croissantes
+    roi = pd.concat([total, par_tranche], ignore_index=True)
+    roi['_ordre'] = roi['pari'].map({p: i for i, p in enumerate(PARIS_ROI)})
+    roi['_detail'] = roi['tranche'] != 'toutes'
+    roi = roi.sort_values(['_ordre', '_detail', 'tranche'], kind='stable')
+    return roi[colonnes].reset_index(drop=True)
+
+# ==================================================
+# CUBE DE VENTILATION (une seule agrégation)
+# ==================================================
+# Tailles de champ (nombre de partants) : bornes basses des tranches
+TAILLES_CHAMP = [2, 8, 12, 16]
+
+# Indicateur de réussite -> pari correspondant (libellés de PARIS_ROI)
+PARIS_INDICATEURS = {
+    'base_gagnante': 'Simple Gagnant',
+    'base_placee': 'Simple Placé',
+    'couple_gagnant': 'Couplé Gagnant',
+    'couple_place': 'Couplé Placé',
+    'trio': 'Trio',
+}
+
+DIMENSIONS_CUBE = ['hippodrome', 'discipline', 'tranche', 'taille', 'pari']
+
+def tranche_taille(partants, tailles=TAILLES_CHAMP):
+    """Libellé de taille de champ ('2-7', ..., '16+') pour chaque course"""
+    bornes = list(tailles) + [np.inf]
+    libelles = [
+        f"{a}-{b - 1}" if np.isfinite(b) else f"{a}+"
+        for a, b in zip(bornes[:-1], bornes[1:])
+    ]
+    return pd.cut(partants, bornes, right=False, labels=libelles)
+
+def cube_resultats(df_resultats, tranches=TRANCHES_CONFIANCE, tailles=TAILLES_CHAMP):
+    """
+    Cube hippodrome x discipline x tranche de confiance x taille de champ
+    x pari : courses jouables et réussites de chaque cellule non vide,
+    en UNE agrégation sur les résultats par course (une ligne par course
+    et par pari). Les vues se lisent ensuite avec interroger_cube.
+    """
+    colonnes = DIMENSIONS_CUBE + ['courses', 'reussites']
+    if len(df_resultats) == 0:
+        return pd.DataFrame(columns=colonnes)
+
+    n = len(df_resultats)
+    dimensions = {
+        'hippodrome': df_resultats['hippodrome'].astype(str).to_numpy(),
+        'discipline': df_resultats['discipline'].astype(str).to_numpy(),
+        'tranche': np.asarray(tranche_confiance(df_resultats['confiance'].to_numpy(dtype=float), tranches)).astype(str),
+        'taille': np.asarray(tranche_taille(df_resultats['partants'].to_numpy(dtype=float), tailles)).astype(str),
+    }
+    # Réussite absente (arrivée invalide, chemin de référence) = échec
+    lignes = pd.DataFrame({
+        **{d: np.tile(v, len(PARIS_INDICATEURS)) for d, v in dimensions.items()},
+        'pari': np.repeat(list(PARIS_INDICATEURS.values()), n),
+        'reussites': np.concatenate([
+            df_resultats[k].eq(True).to_numpy() if k in df_resultats.columns else np.zeros(n, dtype=bool)
+            for k in PARIS_INDICATEURS
+        ]).astype(np.int64),
+    })
+    cube = lignes.groupby(DIMENSIONS_CUBE, sort=True)['reussites'].agg(['size', 'sum']).reset_index()
+    return cube.rename(columns={'size': 'courses', 'sum': 'reussites'})[colonnes]
+
+def interroger_cube(cube, par=(), **filtres):
+    """
+    Vue du cube sans repasser sur les courses.
+    par : dimensions gardées (le pari est toujours gardé, les courses
+    n'ayant de sens que pari par pari) ; filtres : dimension=valeur ou
+    liste de valeurs. Retourne courses, reussites et taux par groupe.
+    ex : interroger_cube(cube, ['tranche'], hippodrome='vincennes', pari='Trio')
+    """
+    m = pd.Series(True, index=cube.index)
+    for dimension, valeur in filtres.items():
+        valeurs = valeur if isinstance(valeur, (list, tuple, set)) else [valeur]
+        m &= cube[dimension].isin([str(v) for v in valeurs])
+    par = list(par) + (['pari'] if 'pari' not in par else [])
+
+    vue = cube[m].groupby(par, sort=True)[['courses', 'reussites']].sum().reset_index()
+    vue['taux'] = vue['reussites'] / vue['courses'].where(vue['courses'] > 0)
+    return vue
+
+def stats_par(cube, dimension, total_courses=None):
+    """
+    Statistiques au format stats_globales pour chaque valeur d'une
+    dimension (lues dans le cube). total_courses : courses du dataset
+    par valeur (pour 'total_courses'), sinon 0.
+    """
+    vue = interroger_cube(cube, [dimension])
+    reussites = vue.pivot(index=dimension, columns='pari', values='reussites')
+    jouables = vue.groupby(dimension)['courses'].max()
+    total_courses = total_courses if total_courses is not None else {}
+    return {
+        valeur: {
+            'total_courses': int(total_courses.get(valeur, 0)),
+            'courses_jouables': int(jouables[valeur]),
+            **{k: int(reussites.at[valeur, p]) if p in reussites.columns else 0
+               for k, p in PARIS_INDICATEURS.items()},
+        }
+        for valeur in reussites.index
+    }
+
+def _afficher_ventilation(titre, stats, limite=10):
+    """Taux de réussite par valeur, les plus jouées d'abord"""
+    print(f"\n{titre}")
+    valeurs = sorted(stats, key=lambda v: stats[v]['courses_jouables'], reverse=True)[:limite]
+    for v in valeurs:
+        s = stats[v]
+        n = s['courses_jouables']
+        print(f"   {str(v):20s} : {n:4d} jouables | gagnante {s['base_gagnante']/n*100:5.1f}% | "
+              f"placée {s['base_placee']/n*100:5.1f}% | trio {s['trio']/n*100:5.1f}%")
+
+# ==================================================
+# CHEMIN DE RÉFÉRENCE (course par course)
+# ==================================================
+def backtest_reference(df_partants, df_courses, avec_musique=False):
+    """
+    Backtest course par course via simuler_course / evaluer_resultat
+    Retourne (stats_globales, df_resultats)
+    """
+    col_p = colonne_course(df_partants)
+    col_c = colonne_course(df_courses)
+    tables_bordas = tables_sans_fuite(
+        df_courses['date'].astype(str).str[:10].min() if len(df_courses) else None)
+
     stats_globales = {
         'total_courses': 0,
         'courses_jouables': 0,
@@ -118,9 +644,6 @@ def backtest_complet(fichier_excel):
         'trio': 0
     }
     
-    stats_par_hippo = defaultdict(lambda: stats_globales.copy())
-    stats_par_discipline = defaultdict(lambda: stats_globales.copy())
-    
     resultats_detailles = []
     
     for _, course in df_courses.iterrows():
@@ -130,7 +653,7 @@ def backtest_complet(fichier_excel):
         mask = (
             (df_partants['date'] == course['date']) &
             (df_partants['hippodrome'] == course['hippodrome']) &
-            (df_partants['numero_course'] == course['numero_course'])
+            (df_partants[col_p] == course[col_c])
         )
         partants = df_partants[mask]
         
@@ -141,7 +664,10 @@ def backtest_complet(fichier_excel):
         base, ticket, conf = simuler_course(
             partants,
             course['hippodrome'],
-            course['discipline']
+            course['discipline'],
+            avec_musique=avec_musique,
+            distance=course.get('distance'),
+            tables_bordas=tables_bordas
         )
         
         if base is None:
@@ -160,9 +686,9 @@ def backtest_complet(fichier_excel):
         # Évaluer
         resultats = evaluer_resultat(base, ticket, arrivee)
         
-        if resultats['base_gagnante']:
+        if resultats.get('base_gagnante'):
             stats_globales['base_gagnante'] += 1
-        if resultats['base_placee']:
+        if resultats.get('base_placee'):
             stats_globales['base_placee'] += 1
         if resultats.get('couple_gagnant'):
             stats_globales['couple_gagnant'] += 1
@@ -175,15 +701,62 @@ def backtest_complet(fichier_excel):
         resultats_detailles.append({
             'date': course['date'],
             'hippodrome': course['hippodrome'],
-            'course': course['numero_course'],
+            'course': course[col_c],
             'discipline': course['discipline'],
             'base': base,
             'ticket': ticket,
             'confiance': conf,
             'arrivee': arrivee,
-            **resultats
+            **resultats,
+            'partants': len(partants),
         })
     
+    return stats_globales, pd.DataFrame(resultats_detailles)
+
+@point_entree("backtest_complet")
+def backtest_complet(source, moteur="vectorise", date_min=None, date_max=None, hippodromes=None,
+                     avec_musique=False):
+    """
+    Lance le backtest sur toutes les courses
+    source : dataset Parquet (dossier) ou fichier Excel consolidé
+    moteur : "vectorise" (par défaut) ou "reference" (course par course)
+    date_min / date_max / hippodromes : ne charge que les partitions utiles
+    avec_musique : score RSE avec les points musique
+    """
+    print("🏇 BACKTEST SYSTÈME 1RSE")
+    print("=" * 70)
+    
+    # Charger les données
+    with etape("lecture_dataset") as e:
+        df_partants, df_courses = lire_dataset(source, date_min, date_max, hippodromes)
+        e.lignes = len(df_partants)
+    
+    # Dataset consolidé sans repos / actif / musique : reconstruits à la
+    # veille de chaque course (jointure as-of sur tout l'historique)
+    if len(df_partants) and all(
+        c not in df_partants.columns or (df_partants[c].isna() | df_partants[c].eq("")).all()
+        for c in ("repos", "actif", "musique")
+    ):
+        with etape("historique_asof", lignes=len(df_partants)):
+            df_partants = df_partants.copy()
+            df_partants[["repos", "actif", "musique"]] = caracteristiques_asof(
+                df_partants, charger_table(source, date_max))
+        print("📚 Repos / actif / musique reconstruits depuis l'historique")
+    
+    print(f"📊 {len(df_courses)} courses à analyser")
+    
+    with etape(f"backtest_{moteur}", lignes=len(df_courses)):
+        if moteur == "reference":
+            stats_globales, df_resultats = backtest_reference(df_partants, df_courses, avec_musique)
+        else:
+            stats_globales, df_resultats = backtest_vectorise(df_partants, df_courses, avec_musique)
+    
+    # Ventilation : un cube, puis les vues par hippodrome / discipline
+    with etape("cube", lignes=len(df_resultats)):
+        cube = cube_resultats(df_resultats)
+        stats_par_hippo = stats_par(cube, 'hippodrome', df_courses['hippodrome'].astype(str).value_counts())
+        stats_par_discipline = stats_par(cube, 'discipline', df_courses['discipline'].astype(str).value_counts())
+    
     # Afficher les résultats
     print("\n" + "=" * 70)
     print("📊 RÉSULTATS BACKTEST")
@@ -200,23 +773,53 @@ def backtest_complet(fichier_excel):
         print(f"   Couplé gagnant : {stats_globales['couple_gagnant']} ({stats_globales['couple_gagnant']/stats_globales['courses_jouables']*100:.1f}%)")
         print(f"   Couplé placé : {stats_globales['couple_place']} ({stats_globales['couple_place']/stats_globales['courses_jouables']*100:.1f}%)")
         print(f"   Trio : {stats_globales['trio']} ({stats_globales['trio']/stats_globales['courses_jouables']*100:.1f}%)")
+        
+        _afficher_ventilation("📍 PAR HIPPODROME (10 plus joués)", stats_par_hippo)
+        _afficher_ventilation("🏇 PAR DISCIPLINE", stats_par_discipline)
     
     # Sauvegarder les résultats détaillés
-    df_resultats = pd.DataFrame(resultats_detailles)
     fichier_sortie = "backtest_resultats.xlsx"
-    df_resultats.to_excel(fichier_sortie, index=False)
+    with etape("ecriture_excel", lignes=len(df_resultats)):
+        df_resultats.to_excel(fichier_sortie, index=False)
     print(f"\n💾 Résultats détaillés sauvegardés : {fichier_sortie}")
     
+    fichier_cube = "backtest_cube.xlsx"
+    with etape("ecriture_excel", lignes=len(cube)):
+        cube.to_excel(fichier_cube, index=False)
+    print(f"💾 Cube hippodrome x discipline x confiance x taille x pari : {fichier_cube}")
+    
+    # ROI à partir des dividendes officiels (si le dataset les contient)
+    with etape("roi") as e:
+        df_rapports = lire_rapports(source, date_min, date_max, hippodromes)
+        df_roi = roi_vectorise(df_resultats, df_rapports)
+        e.lignes = len(df_rapports)
+    
+    if len(df_roi):
+        print(f"\n💶 ROI PAR TYPE DE PARI (mise 1 €, dividendes officiels)")
+        for _, r in df_roi[df_roi['tranche'] == 'toutes'].iterrows():
+            print(f"   {r['pari']:15s} : {r['paris']:5d} paris | {r['gagnants']:4d} gagnants | "
+                  f"retour {r['retour']:9.2f} € | ROI {r['roi']*100:+.1f}%")
+        fichier_roi = "backtest_roi.xlsx"
+        with etape("ecriture_excel", lignes=len(df_roi)):
+            df_roi.to_excel(fichier_roi, index=False)
+        print(f"💾 ROI par pari et tranche de confiance : {fichier_roi}")
+    
     return stats_globales
 
 def main():
-    fichier = input("📂 Fichier Excel consolidé (ex: backtest_2025_consolide.xlsx) : ").strip()
+    fichier = input("📂 Dataset consolidé (dossier Parquet ou .xlsx, ex: backtest_2025) : ").strip()
     
-    if not fichier.endswith('.xlsx'):
+    if not os.path.isdir(fichier) and not fichier.endswith('.xlsx'):
         fichier += '.xlsx'
     
+    # Période / hippodromes optionnels (seules ces partitions sont lues)
+    date_min = input("📅 Date début AAAA-MM-JJ (vide = tout) : ").strip() or None
+    date_max = input("📅 Date fin AAAA-MM-JJ (vide = tout) : ").strip() or None
+    hippos = input("🏟️ Hippodromes séparés par des virgules (vide = tous) : ").strip()
+    hippodromes = [h.strip() for h in hippos.split(",") if h.strip()] or None
+    
     try:
-        backtest_complet(fichier)
+        backtest_complet(fichier, date_min=date_min, date_max=date_max, hippodromes=hippodromes)
     except FileNotFoundError:
         print(f"❌ Fichier {fichier} introuvable !")
     except Exception as e:
@@ -1,18 +1,25 @@
 import pandas as pd
+import os
 import sys
 from collections import defaultdict
 
-def analyser_favoris(fichier_excel):
+from stockage import lire_courses, lire_dataset
+from telemetrie import etape, point_entree
+
+@point_entree("analyser_favoris")
+def analyser_favoris(source, date_min=None, date_max=None, hippodromes=None):
     """
     Analyse basique : performance des favoris (cote la plus basse)
+    source : dataset Parquet (dossier) ou fichier Excel consolidé
     """
     print("🏇 BACKTEST SIMPLIFIÉ - ANALYSE DES FAVORIS")
     print("=" * 70)
     
-    # Charger les données
+    # Charger les données (dossier Parquet ou Excel)
     try:
-        df_partants = pd.read_excel(fichier_excel, sheet_name='Partants')
-        df_courses = pd.read_excel(fichier_excel, sheet_name='Courses')
+        with etape("lecture_dataset") as e:
+            df_partants, df_courses = lire_dataset(source, date_min, date_max, hippodromes)
+            e.lignes = len(df_partants)
     except Exception as e:
         print(f"❌ Erreur lecture fichier : {e}")
         return
@@ -28,56 +35,57 @@ def analyser_favoris(fichier_excel):
         'top3_gagnant': 0,
     }
     
-    for _, course in df_courses.iterrows():
-        stats['total_courses'] += 1
+    with etape("analyse_favoris", lignes=len(df_courses)):
+        for _, course in df_courses.iterrows():
+            stats['total_courses'] += 1
         
-        # Filtrer les partants de cette course
-        mask = (
-            (df_partants['date'] == course['date']) &
-            (df_partants['reunion'] == course['reunion']) &
-            (df_partants['course'] == course['course'])
-        )
-        partants = df_partants[mask].copy()
+            # Filtrer les partants de cette course
+            mask = (
+                (df_partants['date'] == course['date']) &
+                (df_partants['reunion'] == course['reunion']) &
+                (df_partants['course'] == course['course'])
+            )
+            partants = df_partants[mask].copy()
         
-        if len(partants) == 0:
-            continue
+            if len(partants) == 0:
+                continue
         
-        # Vérifier qu'on a une arrivée
-        arrivee = []
-        for a in [course['arrivee_1'], course['arrivee_2'], course['arrivee_3']]:
-            if pd.notna(a):
-                try:
-                    arrivee.append(int(a))
-                except (ValueError, TypeError):
-                    pass
+            # Vérifier qu'on a une arrivée
+            arrivee = []
+            for a in [course['arrivee_1'], course['arrivee_2'], course['arrivee_3']]:
+                if pd.notna(a):
+                    try:
+                        arrivee.append(int(a))
+                    except (ValueError, TypeError):
+                        pass
         
-        if len(arrivee) == 0:
-            continue
+            if len(arrivee) == 0:
+                continue
         
-        # Vérifier qu'on a des cotes
-        partants_avec_cote = partants[partants['cote'].notna()]
-        if len(partants_avec_cote) == 0:
-            continue
+            # Vérifier qu'on a des cotes
+            partants_avec_cote = partants[partants['cote'].notna()]
+            if len(partants_avec_cote) == 0:
+                continue
         
-        stats['courses_analysables'] += 1
+            stats['courses_analysables'] += 1
         
-        # Trouver le favori (cote la plus basse)
-        favori = partants_avec_cote.loc[partants_avec_cote['cote'].idxmin()]
-        num_favori = favori['numero']
+            # Trouver le favori (cote la plus basse)
+            favori = partants_avec_cote.loc[partants_avec_cote['cote'].idxmin()]
+            num_favori = favori['numero']
         
-        # Trouver les 3 plus petites cotes
-        top3_cotes = partants_avec_cote.nsmallest(3, 'cote')
-        nums_top3 = top3_cotes['numero'].tolist()
+            # Trouver les 3 plus petites cotes
+            top3_cotes = partants_avec_cote.nsmallest(3, 'cote')
+            nums_top3 = top3_cotes['numero'].tolist()
         
-        # Évaluer
-        if num_favori == arrivee[0]:
-            stats['favori_gagnant'] += 1
+            # Évaluer
+            if num_favori == arrivee[0]:
+                stats['favori_gagnant'] += 1
         
-        if num_favori in arrivee[:3]:
-            stats['favori_place'] += 1
+            if num_favori in arrivee[:3]:
+                stats['favori_place'] += 1
         
-        if arrivee[0] in nums_top3:
-            stats['top3_gagnant'] += 1
+            if arrivee[0] in nums_top3:
+                stats['top3_gagnant'] += 1
     
     # Afficher résultats
     print("\n" + "=" * 70)
@@ -98,23 +106,26 @@ def analyser_favoris(fichier_excel):
     
     return stats
 
-def analyser_par_hippodrome(fichier_excel):
+def analyser_par_hippodrome(source, date_min=None, date_max=None, hippodromes=None):
     """
     Analyse par hippodrome
+    Seules les colonnes hippodrome / discipline des Courses sont lues,
+    comptées une fois par couple ; les deux vues en sont des sommes.
     """
     print("\n" + "=" * 70)
     print("📍 ANALYSE PAR HIPPODROME")
     print("=" * 70)
     
     try:
-        df_partants = pd.read_excel(fichier_excel, sheet_name='Partants')
-        df_courses = pd.read_excel(fichier_excel, sheet_name='Courses')
+        df_courses = lire_courses(source, date_min, date_max, hippodromes, colonnes=['hippodrome', 'discipline'])
     except Exception as e:
         print(f"❌ Erreur : {e}")
         return
     
+    comptes = df_courses.groupby(['hippodrome', 'discipline']).size()
+    
     # Compter par hippodrome
-    hippo_counts = df_courses['hippodrome'].value_counts().head(10)
+    hippo_counts = comptes.groupby(level='hippodrome').sum().sort_values(ascending=False, kind='stable').head(10)
     
     print("\n🏟️ Top 10 hippodromes (nombre de courses) :")
     for hippo, count in hippo_counts.items():
@@ -122,7 +133,7 @@ def analyser_par_hippodrome(fichier_excel):
     
     # Statistiques par discipline
     print("\n🏇 Répartition par discipline :")
-    disc_counts = df_courses['discipline'].value_counts()
+    disc_counts = comptes.groupby(level='discipline').sum().sort_values(ascending=False, kind='stable')
     for disc, count in disc_counts.items():
         print(f"   {disc:20s} : {count:4d} courses")
 
@@ -130,12 +141,12 @@ def main():
     print("🏇 BACKTEST SYSTÈME 1RSE")
     print("=" * 70)
     
-    fichier = input("\n📂 Fichier Excel consolidé (défaut: backtest_2025.xlsx) : ").strip()
+    fichier = input("\n📂 Dataset consolidé (dossier Parquet ou .xlsx, défaut: backtest_2025) : ").strip()
     
     if not fichier:
-        fichier = "backtest_2025.xlsx"
+        fichier = "backtest_2025"
     
-    if not fichier.endswith('.xlsx'):
+    if not os.path.isdir(fichier) and not fichier.endswith('.xlsx'):
         fichier += '.xlsx'
     
     try:
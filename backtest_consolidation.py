@@ -1,49 +1,122 @@
 import pandas as pd
 import json
 import os
+import re
 from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
-def lire_triplet_course(dossier, date, reunion, course):
+from elo import EtatElo, appliquer_elo, chemin_etat, mettre_a_jour_elo, sauvegarder_etat
+from historique import appliquer_historique, mettre_a_jour_historique
+from manifeste import Manifeste
+from stockage import (
+    ecrire_dataset, exporter_excel, mettre_a_jour_partitions,
+    cles_courses, ecrire_meta, lire_meta, COLONNES_RAPPORTS
+)
+from telemetrie import etape, point_entree
+
+def charger_triplet(fichier_partants):
     """
-    Lit les 3 fichiers JSON d'une course :
-    - infos.json : données générales
-    - partants.json : liste des chevaux
-    - rapports.json : résultats / arrivée
+    Charge le triplet infos / participants / rapports d'une course
+    à partir de son fichier _participants.json.
+    Retourne (course, erreur) : course = None si rien d'exploitable.
+    Fonction de niveau module pour pouvoir être envoyée à un pool de process.
     """
-    base_name = f"{date}_{reunion}_C{course}"
-    
-    fichier_infos = dossier / date / f"{base_name}_infos.json"
-    fichier_partants = dossier / date / f"{base_name}_partants.json"
-    fichier_rapports = dossier / date / f"{base_name}_rapp_orts.json"
+    fichier = Path(fichier_partants)
+    dossier = fichier.parent
+
+    # Format: 2025-01-10_R4_C6_participants.json
+    # On extrait: date, reunion, course
+    parts = fichier.stem.replace('_participants', '').split('_')
     
-    # Charger infos
-    infos = {}
-    if fichier_infos.exists():
-        with open(fichier_infos, 'r', encoding='utf-8') as f:
-            infos = json.load(f)
+    if len(parts) < 3:
+        return None, None
     
-    # Charger partants
-    partants = []
-    if fichier_partants.exists():
-        with open(fichier_partants, 'r', encoding='utf-8') as f:
-            partants = json.load(f)
+    date = parts[0]  # 2025-01-10
+    reunion = parts[1]  # R4
+    course = parts[2].replace('C', '')  # C6 -> 6
     
-    # Charger rapports/arrivée
-    rapports = {}
-    arrivee = []
-    if fichier_rapports.exists():
-        with open(fichier_rapports, 'r', encoding='utf-8') as f:
-            rapports = json.load(f)
-            # L'arrivée peut être dans différents champs selon le format
-            arrivee = rapports.get('arrivee', rapports.get('ordre_arrivee', []))
+    # Construire les noms des 3 fichiers
+    base_name = f"{date}_{reunion}_C{course}"
+    fichier_infos = dossier / f"{base_name}_infos.json"
+    fichier_rapports = dossier / f"{base_name}_rapports.json"
     
-    return infos, partants, arrivee
+    try:
+        # Charger infos
+        infos = {}
+        if fichier_infos.exists():
+            with open(fichier_infos, 'r', encoding='utf-8') as f:
+                infos = json.load(f)
+        
+        # Charger partants
+        partants = []
+        with open(fichier, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            # Le JSON contient "participants" comme clé racine
+            partants = data.get('participants', data if isinstance(data, list) else [])
+        
+        # Charger rapports/arrivée
+        rapports = {}
+        arrivee = []
+        if fichier_rapports.exists():
+            with open(fichier_rapports, 'r', encoding='utf-8') as f:
+                rapports = json.load(f)
+        
+        # Extraire l'ordre d'arrivée depuis infos.json
+        ordre_arrivee = infos.get('ordreArrivee', [])
+        if ordre_arrivee:
+            arrivee = ordre_arrivee
+        
+        if not partants:  # Seulement si on a des partants
+            return None, None
+        
+        return {
+            'date': date,
+            'reunion': reunion,
+            'course': course,
+            'infos': infos,
+            'partants': partants,
+            'arrivee': arrivee,
+            'rapports': rapports
+        }, None
+            
+    except Exception as e:
+        return None, f"⚠️ Erreur sur {fichier.name}: {e}"
 
-def extraire_tous_les_triplets(dossier_racine):
+def _charger_lot(fichiers):
+    """Charge un lot de fichiers dans un process du pool"""
+    return [charger_triplet(f) for f in fichiers]
+
+def charger_triplets(fichiers, workers=1, taille_lot=64):
+    """
+    Charge une liste de fichiers _participants.json.
+    workers > 1 : répartit des lots de taille_lot fichiers sur un pool de process.
+    Les résultats sont fusionnés dans l'ordre de la liste (identique au mode série).
+    """
+    fichiers = list(fichiers)
+
+    if workers is None or workers <= 1 or len(fichiers) <= taille_lot:
+        resultats = [charger_triplet(f) for f in fichiers]
+    else:
+        lots = [fichiers[i:i + taille_lot] for i in range(0, len(fichiers), taille_lot)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() conserve l'ordre des lots => fusion déterministe
+            resultats = [r for lot in pool.map(_charger_lot, lots) for r in lot]
+
+    courses_extraites = []
+    for course, erreur in resultats:
+        if erreur:
+            print(erreur)
+        if course is not None:
+            courses_extraites.append(course)
+
+    return courses_extraites
+
+def extraire_tous_les_triplets(dossier_racine, workers=1, taille_lot=64):
     """
     Parcourt le dossier dataRaceJson et extrait tous les triplets de courses
     Format: 2025-01-10_R4_C6_participants.json (tous dans le même dossier)
+    workers : nombre de process pour le chargement (1 = série)
+    taille_lot : nombre de fichiers envoyés à un process en une fois
     """
     dossier = Path(dossier_racine)
     
@@ -53,86 +126,17 @@ def extraire_tous_les_triplets(dossier_racine):
     
     print(f"📂 Analyse du dossier : {dossier}")
     
-    # Lister tous les fichiers _participants.json
-    fichiers_participants = list(dossier.glob("*_participants.json"))
+    # Lister tous les fichiers _participants.json (ordre trié => déterministe)
+    fichiers_participants = sorted(dossier.glob("*_participants.json"))
     
     print(f"🐎 {len(fichiers_participants)} fichiers partants trouvés")
     
-    courses_extraites = []
-    
-    for fichier in fichiers_participants:
-        # Format: 2025-01-10_R4_C6_participants.json
-        # On extrait: date, reunion, course
-        parts = fichier.stem.replace('_participants', '').split('_')
-        
-        if len(parts) >= 3:
-            date = parts[0]  # 2025-01-10
-            reunion = parts[1]  # R4
-            course = parts[2].replace('C', '')  # C6 -> 6
-            
-            # Construire les noms des 3 fichiers
-            base_name = f"{date}_{reunion}_C{course}"
-            fichier_infos = dossier / f"{base_name}_infos.json"
-            fichier_partants = fichier
-            fichier_rapports = dossier / f"{base_name}_rapports.json"
-            
-            try:
-                # Charger infos
-                infos = {}
-                if fichier_infos.exists():
-                    with open(fichier_infos, 'r', encoding='utf-8') as f:
-                        infos = json.load(f)
-                
-                # Charger partants
-                partants = []
-                with open(fichier_partants, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Le JSON contient "participants" comme clé racine
-                    partants = data.get('participants', data if isinstance(data, list) else [])
-                
-                # Charger rapports/arrivée
-                rapports = {}
-                arrivee = []
-                if fichier_rapports.exists():
-                    with open(fichier_rapports, 'r', encoding='utf-8') as f:
-                        rapports = json.load(f)
-                
-                # Extraire l'ordre d'arrivée depuis infos.json
-                ordre_arrivee = infos.get('ordreArrivee', [])
-                if ordre_arrivee:
-                    arrivee = ordre_arrivee
-                
-                if partants:  # Seulement si on a des partants
-                    courses_extraites.append({
-                        'date': date,
-                        'reunion': reunion,
-                        'course': course,
-                        'infos': infos,
-                        'partants': partants,
-                        'arrivee': arrivee
-                    })
-                    
-            except Exception as e:
-                print(f"⚠️ Erreur sur {fichier.name}: {e}")
-    
-    return courses_extraites
+    return charger_triplets(fichiers_participants, workers=workers, taille_lot=taille_lot)
 
-def creer_excel_backtest(dossier_json, fichier_sortie="backtest_2025.xlsx"):
+def construire_dataframes(courses):
     """
-    Crée un fichier Excel prêt pour le backtest
+    Transforme les triplets extraits en DataFrames (df_partants, df_courses)
     """
-    print("🏇 CONSOLIDATION DES COURSES POUR BACKTEST")
-    print("=" * 70)
-    
-    courses = extraire_tous_les_triplets(dossier_json)
-    
-    if not courses:
-        print("❌ Aucune course trouvée !")
-        return
-    
-    print(f"\n✅ {len(courses)} courses extraites")
-    
-    # Construire les DataFrames
     toutes_lignes_partants = []
     toutes_lignes_courses = []
     
@@ -178,11 +182,11 @@ def creer_excel_backtest(dossier_json, fichier_sortie="backtest_2025.xlsx"):
                 'cote': p.get('dernierRapportReference', {}).get('rapport', None),
                 'elo_cheval': None,  # À ajouter si disponible
                 'elo_jockey': None,  # À ajouter si disponible
-                'repos': None,  # À ajouter si disponible
-                'actif': None,  # À ajouter si disponible
+                'repos': None,  # reconstruit par historique.py
+                'actif': None,  # reconstruit par historique.py
                 'sigma': None,  # À ajouter si disponible
                 'prediction_ia': None,  # À ajouter si disponible
-                'musique': '',  # À ajouter si disponible
+                'musique': '',  # reconstruit par historique.py
                 'ordre_arrivee': p.get('ordreArrivee', None),
             })
     
@@ -190,12 +194,68 @@ def creer_excel_backtest(dossier_json, fichier_sortie="backtest_2025.xlsx"):
     df_partants = pd.DataFrame(toutes_lignes_partants)
     df_courses = pd.DataFrame(toutes_lignes_courses)
     
-    # Sauvegarder
-    with pd.ExcelWriter(fichier_sortie, engine='openpyxl') as writer:
-        df_partants.to_excel(writer, sheet_name='Partants', index=False)
-        df_courses.to_excel(writer, sheet_name='Courses', index=False)
-    
-    print(f"\n✅ Fichier Excel créé : {fichier_sortie}")
+    return df_partants, df_courses
+
+# ==================================================
+# RAPPORTS (DIVIDENDES OFFICIELS)
+# ==================================================
+def normaliser_combinaison(combinaison, pari):
+    """
+    Combinaison PMU ("3-7", "3 - 7", ["3", "7"]...) -> "3-7".
+    Numéros triés sauf pour les paris dans l'ordre (ORDRE / TIERCE...)
+    """
+    if isinstance(combinaison, (list, tuple)):
+        combinaison = " ".join(str(c) for c in combinaison)
+    numeros = [int(n) for n in re.findall(r"\d+", str(combinaison))]
+    if not numeros:
+        return None
+    if "ORDRE" not in pari:
+        numeros.sort()
+    return "-".join(str(n) for n in numeros)
+
+def extraire_rapports(rapports):
+    """
+    Dividendes d'un _rapports.json : liste de (pari, combinaison, dividende)
+    dividende = rapport net pour 1 € misé
+    (dividendePourUnEuro ou dividende / miseBase, en centimes côté PMU)
+    """
+    if isinstance(rapports, dict):
+        rapports = rapports.get('rapports', [])
+    if not isinstance(rapports, list):
+        return []
+
+    lignes = []
+    for bloc in rapports:
+        if not isinstance(bloc, dict) or not bloc.get('typePari'):
+            continue
+        pari = str(bloc['typePari']).upper()
+        mise_base = bloc.get('miseBase')
+        for r in bloc.get('rapports', []) or []:
+            if r.get('dividendePourUnEuro') is not None:
+                dividende = r['dividendePourUnEuro'] / 100
+            elif r.get('dividende') is not None and mise_base:
+                dividende = r['dividende'] / mise_base
+            else:
+                continue
+            combinaison = normaliser_combinaison(r.get('combinaison'), pari)
+            if combinaison is not None:
+                lignes.append((pari, combinaison, float(dividende)))
+    return lignes
+
+def construire_rapports(courses):
+    """
+    Table compacte des dividendes : une ligne par course, pari et combinaison
+    (clé de course identique à construire_dataframes)
+    """
+    lignes = []
+    for course in courses:
+        hippodrome = course['infos'].get('hippodrome', {}).get('libelleCourt', 'inconnu')
+        for pari, combinaison, dividende in extraire_rapports(course.get('rapports')):
+            lignes.append((course['date'], course['reunion'], course['course'], hippodrome,
+                           pari, combinaison, dividende))
+    return pd.DataFrame(lignes, columns=COLONNES_RAPPORTS)
+
+def afficher_repartition(df_partants, df_courses):
     print(f"📊 {len(df_courses)} courses")
     print(f"🐎 {len(df_partants)} partants")
     
@@ -208,14 +268,182 @@ def creer_excel_backtest(dossier_json, fichier_sortie="backtest_2025.xlsx"):
     print("\n🏇 Répartition par discipline :")
     for disc, count in df_courses['discipline'].value_counts().items():
         print(f"   {disc}: {count} courses")
+
+def enregistrer_manifeste(manifeste, a_charger, df_courses):
+    """
+    Enregistre au manifeste les courses chargées (empreinte + partition).
+    a_charger : {cle: (fichier_partants, empreinte)} (Manifeste.comparer)
+    Retourne les partitions (date, hippodrome) où elles sont stockées.
+    """
+    hippo_par_cle = {}
+    if len(df_courses):
+        hippo_par_cle = dict(zip(cles_courses(df_courses), df_courses['hippodrome'].fillna('inconnu')))
+    partitions = set()
+    for cle, (_, emp) in a_charger.items():
+        hippo = hippo_par_cle.get(cle)
+        date = cle.split('_')[0]
+        if hippo is not None:
+            partitions.add((date, hippo))
+        manifeste.enregistrer(cle, emp, date, hippo)
+    return partitions
+
+@point_entree("creer_dataset_backtest")
+def creer_dataset_backtest(dossier_json, sortie="backtest_2025", format="parquet",
+                           export_excel=None, workers=1):
+    """
+    Crée le dataset consolidé prêt pour le backtest
+    format : "parquet" (dossier partitionné par date / hippodrome) ou "excel"
+    export_excel : chemin d'un export .xlsx optionnel en plus du Parquet
+    workers : nombre de process pour charger les JSON (1 = série)
+    """
+    print("🏇 CONSOLIDATION DES COURSES POUR BACKTEST")
+    print("=" * 70)
+    
+    # Manifeste du dataset Parquet : empreintes prises avant la lecture
+    # (une course modifiée pendant la consolidation sera reparsée à la
+    # prochaine passe incrémentale, qui ne relit rien d'autre)
+    if format != "excel":
+        manifeste = Manifeste(sortie)
+        manifeste.effacer()
+        diff = manifeste.comparer(sorted(Path(dossier_json).glob("*_participants.json")))
+    
+    with etape("lecture_json") as e:
+        courses = extraire_tous_les_triplets(dossier_json, workers=workers)
+        e.lignes = len(courses)
+    
+    if not courses:
+        print("❌ Aucune course trouvée !")
+        return
+    
+    print(f"\n✅ {len(courses)} courses extraites")
+    
+    with etape("normalisation", lignes=len(courses)):
+        df_partants, df_courses = construire_dataframes(courses)
+        df_rapports = construire_rapports(courses)
+    
+    # Repos / actif / musique depuis les courses précédentes de chaque cheval
+    with etape("historique", lignes=len(df_partants)):
+        df_partants = appliquer_historique(df_partants)
+    
+    # Notes ELO avant course (rejeu chronologique complet)
+    with etape("elo", lignes=len(df_partants)):
+        etat_elo = EtatElo()
+        df_partants = appliquer_elo(df_partants, etat_elo)
+    
+    # Sauvegarder
+    if format == "excel":
+        if not sortie.endswith('.xlsx'):
+            sortie += '.xlsx'
+        with etape("ecriture_excel", lignes=len(df_partants)):
+            exporter_excel(df_partants, df_courses, sortie, df_rapports)
+        print(f"\n✅ Fichier Excel créé : {sortie}")
+    else:
+        with etape("ecriture_parquet", lignes=len(df_partants)):
+            ecrire_dataset(df_partants, df_courses, sortie, df_rapports)
+            enregistrer_manifeste(manifeste, diff['nouvelles'], df_courses)
+            manifeste.sauvegarder()
+        print(f"\n✅ Dataset Parquet créé : {sortie}")
+        if export_excel:
+            with etape("ecriture_excel", lignes=len(df_partants)):
+                exporter_excel(df_partants, df_courses, export_excel, df_rapports)
+            print(f"✅ Export Excel : {export_excel}")
     
-    return fichier_sortie
+    sauvegarder_etat(chemin_etat(sortie), etat_elo)
+    print(f"🏆 ELO : {len(etat_elo.chevaux)} chevaux, {len(etat_elo.jockeys)} jockeys notés")
+    print(f"💶 {len(df_rapports)} dividendes extraits des rapports")
+    
+    afficher_repartition(df_partants, df_courses)
+    
+    return sortie
+
+@point_entree("consolider_incremental")
+def consolider_incremental(dossier_json, dossier_dataset="backtest_2025", workers=1):
+    """
+    Consolidation incrémentale du dataset Parquet :
+    seules les courses nouvelles ou modifiées (taille / mtime / sha256
+    comparés au manifeste) sont reparsées, les courses dont les fichiers
+    ont disparu sont retirées. Seules les partitions touchées sont réécrites.
+    """
+    print("🏇 CONSOLIDATION INCRÉMENTALE")
+    print("=" * 70)
+    
+    dossier = Path(dossier_json)
+    if not dossier.exists():
+        print(f"❌ Le dossier {dossier} n'existe pas !")
+        return None
+    
+    manifeste = Manifeste(dossier_dataset)
+    fichiers_participants = sorted(dossier.glob("*_participants.json"))
+    diff = manifeste.comparer(fichiers_participants)
+    
+    a_charger = {**diff['nouvelles'], **diff['modifiees']}
+    print(f"🆕 {len(diff['nouvelles'])} nouvelles | ✏️ {len(diff['modifiees'])} modifiées | "
+          f"🗑️ {len(diff['supprimees'])} supprimées | ⏭️ {diff['inchangees']} inchangées")
+    
+    # Anciennes partitions des courses modifiées / supprimées
+    partitions = {manifeste.partition(cle) for cle in list(diff['modifiees']) + diff['supprimees']} - {None}
+    # Les nouvelles aussi : un dataset écrit sans manifeste peut déjà les contenir
+    cles_retirees = list(a_charger) + diff['supprimees']
+    
+    with etape("lecture_json", lignes=len(a_charger)):
+        courses = charger_triplets([f for f, _ in a_charger.values()], workers=workers)
+    with etape("normalisation", lignes=len(courses)):
+        df_partants, df_courses = construire_dataframes(courses)
+        df_rapports = construire_rapports(courses)
+    
+    # Nouvelles partitions + mise à jour du manifeste
+    if len(df_courses):
+        df_courses['hippodrome'] = df_courses['hippodrome'].fillna('inconnu')
+        df_partants['hippodrome'] = df_partants['hippodrome'].fillna('inconnu')
+        df_rapports['hippodrome'] = df_rapports['hippodrome'].fillna('inconnu')
+    partitions |= enregistrer_manifeste(manifeste, a_charger, df_courses)
+    for cle in diff['supprimees']:
+        manifeste.retirer(cle)
+    
+    Path(dossier_dataset).mkdir(parents=True, exist_ok=True)
+    with etape("ecriture_parquet", lignes=len(df_partants)):
+        mettre_a_jour_partitions(dossier_dataset, partitions, cles_retirees, df_partants, df_courses,
+                                 df_rapports)
+    colonnes = lire_meta(dossier_dataset)['colonnes']
+    if len(df_courses) and 'rapports' not in colonnes:
+        ecrire_meta(dossier_dataset, {
+            'partants': list(df_partants.columns),
+            'courses': list(df_courses.columns),
+            'rapports': list(df_rapports.columns),
+            **colonnes,
+        })
+    manifeste.sauvegarder()
+    
+    # Historique puis ELO des partants à partir de la première date touchée
+    dates_touchees = [cle.split('_')[0] for cle in cles_retirees]
+    if dates_touchees:
+        with etape("historique", lignes=len(df_partants)):
+            mettre_a_jour_historique(dossier_dataset, depuis=min(dates_touchees))
+        with etape("elo", lignes=len(df_partants)):
+            mettre_a_jour_elo(dossier_dataset, depuis=min(dates_touchees))
+    
+    print(f"\n✅ Dataset Parquet à jour : {dossier_dataset} ({len(partitions)} partitions réécrites)")
+    
+    return {
+        'nouvelles': len(diff['nouvelles']),
+        'modifiees': len(diff['modifiees']),
+        'supprimees': len(diff['supprimees']),
+        'inchangees': diff['inchangees'],
+    }
+
+@point_entree("creer_excel_backtest")
+def creer_excel_backtest(dossier_json, fichier_sortie="backtest_2025.xlsx", workers=1):
+    """
+    Crée un fichier Excel prêt pour le backtest
+    workers : nombre de process pour charger les JSON (1 = série)
+    """
+    return creer_dataset_backtest(dossier_json, fichier_sortie, format="excel", workers=workers)
 
 def main():
     # Chemin par défaut
     chemin_defaut = "../dataRaceJson"
     
-    print("🏇 CONSOLIDATION JSON → EXCEL POUR BACKTEST")
+    print("🏇 CONSOLIDATION JSON → PARQUET / EXCEL POUR BACKTEST")
     print("=" * 70)
     
     chemin = input(f"\n📂 Chemin du dossier dataRaceJson (défaut: {chemin_defaut}) : ").strip()
@@ -239,8 +467,24 @@ def main():
     for item in items:
         print(f"   - {item.name}")
     
-    # Créer le fichier Excel
-    creer_excel_backtest(chemin)
+    # Nombre de process pour le chargement des JSON
+    workers = input(f"\n⚙️ Nombre de process pour la lecture (défaut: 1, max: {os.cpu_count()}) : ").strip()
+    workers = int(workers) if workers.isdigit() else 1
+    
+    # Format de sortie
+    choix = input("\n💾 Format (1 - Parquet [défaut], 2 - Excel, 3 - Parquet incrémental) : ").strip()
+    
+    if choix == "3":
+        consolider_incremental(chemin, "backtest_2025", workers=workers)
+    elif choix == "2":
+        creer_dataset_backtest(chemin, "backtest_2025.xlsx", format="excel", workers=workers)
+    else:
+        export = input("📤 Export Excel en plus ? (o/N) : ").strip().lower() == "o"
+        creer_dataset_backtest(
+            chemin, "backtest_2025", format="parquet",
+            export_excel="backtest_2025.xlsx" if export else None,
+            workers=workers
+        )
     
     print("\n🎯 PROCHAINE ÉTAPE : Lance 'python backtest_analyse.py' !")
 
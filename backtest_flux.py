@@ -0,0 +1,151 @@
+# backtest_flux.py
+# ==================================================
+# BACKTEST EN FLUX : JSON → STATISTIQUES (SANS CLASSEUR)
+# ==================================================
+# Remplace la chaîne consolidation → backtest_2025.xlsx → backtest.py :
+# les triplets de dataRaceJson sont lus par lots, normalisés avec
+# construire_dataframes, backtestés puis cumulés dans stats_globales.
+# Seul le lot courant est en mémoire (le pool ne garde que quelques
+# lots d'avance) et aucun fichier intermédiaire n'est écrit.
+# Un lot ne coupe jamais une date : les courses d'un même jour sont
+# toujours backtestées ensemble, comme dans le classeur consolidé.
+# Repos / actif / musique et notes ELO dépendent de tout l'historique
+# antérieur : un IndexHistorique et un EtatElo sont portés d'un lot à
+# l'autre (lots dans l'ordre des dates), d'où les mêmes valeurs qu'à la
+# consolidation.
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from backtest import backtest_vectorise, backtest_reference
+from backtest_consolidation import charger_triplets, construire_dataframes
+from elo import EtatElo, appliquer_elo
+from historique import IndexHistorique, appliquer_historique
+
+TAILLE_LOT = 200
+
+# ==================================================
+# LECTURE PAR LOTS
+# ==================================================
+def lots_par_date(fichiers, taille_lot=TAILLE_LOT):
+    """
+    Découpe la liste triée des _participants.json en lots d'environ
+    taille_lot fichiers, coupés uniquement entre deux dates
+    """
+    lot = []
+    for f in fichiers:
+        date = Path(f).name.split('_')[0]
+        if len(lot) >= taille_lot and Path(lot[-1]).name.split('_')[0] != date:
+            yield lot
+            lot = []
+        lot.append(f)
+    if lot:
+        yield lot
+
+def flux_triplets(dossier_json, taille_lot=TAILLE_LOT, workers=1):
+    """
+    Générateur de lots de courses (liste de triplets, comme
+    charger_triplets). workers > 1 : lecture sur un pool de process,
+    au plus 2 lots d'avance par process, dans l'ordre des fichiers.
+    """
+    fichiers = sorted(Path(dossier_json).glob("*_participants.json"))
+    lots = lots_par_date(fichiers, taille_lot)
+
+    if workers is None or workers <= 1:
+        for lot in lots:
+            yield charger_triplets(lot)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_cours = deque()
+        for lot in lots:
+            en_cours.append(pool.submit(charger_triplets, lot))
+            if len(en_cours) >= 2 * workers:
+                yield en_cours.popleft().result()
+        while en_cours:
+            yield en_cours.popleft().result()
+
+# ==================================================
+# BACKTEST EN FLUX
+# ==================================================
+def backtest_flux(dossier_json, taille_lot=TAILLE_LOT, workers=1, moteur="vectorise",
+                  avec_musique=False):
+    """
+    Backtest direct depuis dataRaceJson, lot par lot.
+    Mêmes statistiques que creer_dataset_backtest puis backtest_complet.
+    moteur : "vectorise" (par défaut) ou "reference" (simuler_course /
+    evaluer_resultat course par course)
+    """
+    print("🏇 BACKTEST EN FLUX (JSON → STATISTIQUES)")
+    print("=" * 70)
+
+    if not Path(dossier_json).exists():
+        print(f"❌ Le dossier {dossier_json} n'existe pas !")
+        return None
+
+    stats_globales = {
+        'total_courses': 0,
+        'courses_jouables': 0,
+        'base_gagnante': 0,
+        'base_placee': 0,
+        'couple_gagnant': 0,
+        'couple_place': 0,
+        'trio': 0
+    }
+    moteur_lot = backtest_reference if moteur == "reference" else backtest_vectorise
+
+    index = IndexHistorique()
+    etat_elo = EtatElo()
+
+    nb_lots = 0
+    for courses in flux_triplets(dossier_json, taille_lot, workers):
+        if not courses:
+            continue
+        df_partants, df_courses = construire_dataframes(courses)
+        index.ajouter(df_partants)
+        df_partants = appliquer_elo(appliquer_historique(df_partants, index), etat_elo)
+        stats_lot, _ = moteur_lot(df_partants, df_courses, avec_musique)
+        for k in stats_globales:
+            stats_globales[k] += stats_lot[k]
+        nb_lots += 1
+        print(f"   📦 Lot {nb_lots} : {len(df_courses)} courses "
+              f"(total {stats_globales['total_courses']})")
+
+    print("\n" + "=" * 70)
+    print("📊 RÉSULTATS BACKTEST")
+    print("=" * 70)
+
+    jouables = stats_globales['courses_jouables']
+    print(f"\n🎯 STATISTIQUES GLOBALES")
+    print(f"   Courses analysées : {stats_globales['total_courses']}")
+    print(f"   Courses jouables : {jouables}")
+    if jouables > 0:
+        print(f"   Taux de sélection : {jouables/stats_globales['total_courses']*100:.1f}%")
+        print()
+        print(f"   Base gagnante : {stats_globales['base_gagnante']} ({stats_globales['base_gagnante']/jouables*100:.1f}%)")
+        print(f"   Base placée : {stats_globales['base_placee']} ({stats_globales['base_placee']/jouables*100:.1f}%)")
+        print(f"   Couplé gagnant : {stats_globales['couple_gagnant']} ({stats_globales['couple_gagnant']/jouables*100:.1f}%)")
+        print(f"   Couplé placé : {stats_globales['couple_place']} ({stats_globales['couple_place']/jouables*100:.1f}%)")
+        print(f"   Trio : {stats_globales['trio']} ({stats_globales['trio']/jouables*100:.1f}%)")
+
+    return stats_globales
+
+def main():
+    chemin_defaut = "../dataRaceJson"
+    chemin = input(f"📂 Chemin du dossier dataRaceJson (défaut: {chemin_defaut}) : ").strip() or chemin_defaut
+    chemin = os.path.expanduser(chemin)
+
+    if not os.path.exists(chemin):
+        print(f"❌ Le dossier {chemin} n'existe pas !")
+        sys.exit(1)
+
+    workers = input(f"⚙️ Nombre de process pour la lecture (défaut: 1, max: {os.cpu_count()}) : ").strip()
+    workers = int(workers) if workers.isdigit() else 1
+
+    backtest_flux(chemin, workers=workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# backtest_glissant.py
+# ==================================================
+# BACKTEST WALK-FORWARD (FENÊTRE GLISSANTE OU CUMULÉE)
+# ==================================================
+# Les compteurs de backtest_complet sont calculés jour par jour puis
+# gardés dans un fichier d'état (backtest_glissant.json à côté du
+# dataset), avec l'empreinte des paramètres (SEUILS, DOMAINES, musique)
+# et celle des fichiers de chaque date. Une relance ne backteste que
+# les jours à partir de la première date ajoutée, réécrite ou retirée
+# (consolider_incremental réécrit aussi les partitions suivantes :
+# historique et ELO) ; la série par fenêtre est ensuite recalculée à
+# partir des compteurs journaliers, en ajoutant le jour qui entre et en
+# retirant celui qui sort.
+
+import hashlib
+import json
+import os
+import sys
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest_vectorise
+from stockage import lire_dataset, est_dataset_parquet, empreintes_par_date
+from test_rse_turfbzh import DOMAINES, SEUILS
+
+VERSION_ETAT = 2
+NOM_ETAT = "backtest_glissant.json"
+
+RESULTATS = ['base_gagnante', 'base_placee', 'couple_gagnant', 'couple_place', 'trio']
+COMPTEURS = ['total_courses', 'courses_jouables'] + RESULTATS
+
+# ==================================================
+# COMPTEURS JOURNALIERS
+# ==================================================
+def stats_par_jour(df_partants, df_courses, avec_musique=False):
+    """
+    Compteurs de stats_globales pour chaque date :
+    {date: [total_courses, courses_jouables, base_gagnante, ...]}
+    """
+    if len(df_courses) == 0:
+        return {}
+
+    _, df_resultats = backtest_vectorise(df_partants, df_courses, avec_musique)
+
+    total = df_courses['date'].astype(str).value_counts()
+    jours = pd.DataFrame({'total_courses': total})
+    if len(df_resultats):
+        r = df_resultats.assign(date=df_resultats['date'].astype(str), courses_jouables=1)
+        jours = jours.join(r.groupby('date')[['courses_jouables'] + RESULTATS].sum())
+    jours = jours.reindex(columns=COMPTEURS).fillna(0).astype(np.int64).sort_index()
+
+    return {date: ligne.tolist() for date, ligne in zip(jours.index, jours.to_numpy())}
+
+# ==================================================
+# ÉTAT (CHECKPOINT)
+# ==================================================
+def chemin_etat(source):
+    """Fichier d'état : dans le dossier Parquet, ou à côté du .xlsx"""
+    if est_dataset_parquet(source):
+        return Path(source) / NOM_ETAT
+    return Path(source).with_suffix(".glissant.json")
+
+def empreinte_parametres(avec_musique=False):
+    """Empreinte des paramètres dont dépendent les compteurs"""
+    parametres = {"seuils": SEUILS, "domaines": DOMAINES, "avec_musique": avec_musique}
+    return hashlib.sha256(json.dumps(parametres, sort_keys=True).encode()).hexdigest()[:16]
+
+def empreintes_dataset(source):
+    """
+    Parquet : {date: empreinte des partitions de la date}
+    Excel : {"fichier": taille + mtime} (toute modification recalcule tout)
+    """
+    if est_dataset_parquet(source):
+        return empreintes_par_date(source)
+    st = Path(source).stat()
+    return {"fichier": f"{st.st_size}:{st.st_mtime_ns}"}
+
+def etat_vide(parametres):
+    return {"version": VERSION_ETAT, "parametres": parametres, "empreintes": {}, "jours": {}}
+
+def charger_etat(chemin, parametres):
+    """État sauvegardé, ou état vide s'il manque ou ne correspond plus"""
+    if not Path(chemin).exists():
+        return etat_vide(parametres)
+    with open(chemin, "r", encoding="utf-8") as f:
+        etat = json.load(f)
+    if etat.get("version") != VERSION_ETAT or etat.get("parametres") != parametres:
+        return etat_vide(parametres)
+    return etat
+
+def dates_modifiees(anciennes, nouvelles):
+    """Clés ajoutées, retirées ou dont l'empreinte a changé (triées)"""
+    return sorted(k for k in anciennes.keys() | nouvelles.keys() if anciennes.get(k) != nouvelles.get(k))
+
+def sauvegarder_etat(chemin, etat):
+    """Écriture atomique (fichier temporaire puis remplacement)"""
+    chemin = Path(chemin)
+    tmp = chemin.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(etat, f, ensure_ascii=False)
+    os.replace(tmp, chemin)
+
+def mettre_a_jour_etat(source, avec_musique=False, reinitialiser=False):
+    """
+    Recalcule les jours à partir de la première date modifiée depuis le
+    dernier passage (tout si les paramètres ou le fichier Excel ont
+    changé). Seules ces dates sont lues (partitions Parquet).
+    Retourne (etat, nb_jours_calcules)
+    """
+    chemin = chemin_etat(source)
+    parametres = empreinte_parametres(avec_musique)
+    etat = etat_vide(parametres) if reinitialiser else charger_etat(chemin, parametres)
+
+    empreintes = empreintes_dataset(source)
+    modifiees = dates_modifiees(etat["empreintes"], empreintes)
+    if etat["jours"] and not modifiees:
+        return etat, 0
+
+    depuis = modifiees[0] if etat["jours"] and est_dataset_parquet(source) else None
+    df_partants, df_courses = lire_dataset(source, date_min=depuis)
+    nouveaux = stats_par_jour(df_partants, df_courses, avec_musique)
+
+    gardes = {d: v for d, v in etat["jours"].items() if depuis is not None and d < depuis}
+    etat["jours"] = dict(sorted({**gardes, **nouveaux}.items()))
+    etat["empreintes"] = empreintes
+    sauvegarder_etat(chemin, etat)
+    return etat, len(nouveaux)
+
+# ==================================================
+# SÉRIE PAR FENÊTRE
+# ==================================================
+def serie_glissante(jours, fenetre=None):
+    """
+    Une ligne par jour de course : compteurs et taux de la fenêtre qui
+    se termine ce jour-là.
+    fenetre=None : fenêtre cumulée depuis le premier jour
+    fenetre=N    : les N derniers jours calendaires (jour courant inclus)
+    """
+    dates = sorted(jours)
+    cumul = np.zeros(len(COMPTEURS), dtype=np.int64)
+    dans_fenetre = deque()
+    lignes = []
+
+    for date in dates:
+        valeurs = np.asarray(jours[date], dtype=np.int64)
+        cumul += valeurs
+        dans_fenetre.append((date, valeurs))
+
+        if fenetre is not None:
+            limite = (pd.Timestamp(date) - pd.Timedelta(days=fenetre - 1)).strftime("%Y-%m-%d")
+            while dans_fenetre[0][0] < limite:
+                cumul -= dans_fenetre.popleft()[1]
+
+        lignes.append([date, dans_fenetre[0][0], len(dans_fenetre), *cumul])
+
+    df = pd.DataFrame(lignes, columns=['date', 'debut_fenetre', 'nb_jours'] + COMPTEURS)
+    jouables = df['courses_jouables'].replace(0, np.nan)
+    df['taux_selection'] = df['courses_jouables'] / df['total_courses'].replace(0, np.nan)
+    for k in RESULTATS:
+        df[f'taux_{k}'] = df[k] / jouables
+    return df
+
+def backtest_glissant(source, fenetre=None, avec_musique=False, reinitialiser=False, sortie=None):
+    """
+    Walk-forward : met à jour les compteurs journaliers puis calcule
+    la série par fenêtre (voir serie_glissante)
+    """
+    print("🏇 BACKTEST GLISSANT 1RSE")
+    print("=" * 70)
+
+    etat, nb_calcules = mettre_a_jour_etat(source, avec_musique, reinitialiser)
+    print(f"📅 {len(etat['jours'])} jours de course ({nb_calcules} recalculés)")
+
+    df = serie_glissante(etat["jours"], fenetre)
+    if len(df) == 0:
+        print("❌ Aucune course dans le dataset")
+        return df
+
+    libelle = "cumulée" if fenetre is None else f"{fenetre} jours"
+    print(f"\n📈 FENÊTRE {libelle.upper()} (derniers jours)")
+    colonnes = ['date', 'nb_jours', 'courses_jouables', 'taux_base_gagnante', 'taux_base_placee', 'taux_trio']
+    print(df[colonnes].tail(10).to_string(index=False, float_format=lambda x: f"{x * 100:.1f}%"))
+
+    if sortie:
+        df.to_excel(sortie, index=False)
+        print(f"\n💾 Série sauvegardée : {sortie}")
+
+    return df
+
+def main():
+    source = input("📂 Dataset consolidé (dossier Parquet ou .xlsx, défaut: backtest_2025) : ").strip() or "backtest_2025"
+    if not os.path.exists(source):
+        print(f"❌ {source} introuvable !")
+        sys.exit(1)
+
+    f = input("🪟 Fenêtre en jours (vide = cumulée depuis le début) : ").strip()
+    fenetre = int(f) if f else None
+
+    backtest_glissant(source, fenetre=fenetre, sortie="backtest_glissant.xlsx")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# balayage.py
+# ==================================================
+# BALAYAGE DES PARAMÈTRES 1RSE (GRILLE OU ALÉATOIRE)
+# ==================================================
+# Paramètres balayés (noms à plat) :
+#   - SEUILS : SIGMA_MIN, IA_RANK_MAX, ELO_MIN, COTE_MIN
+#   - DOMAINES : repos_max_trot, repos_max_monte, repos_max_plat, repos_max_obstacle
+#   - POIDS_CONFIANCE : poids_gap, poids_signaux, poids_taille
+#   - conf_min : on ne joue que les courses dont la confiance atteint ce seuil
+#     (sans lui, les poids ne changent ni la base ni le ticket)
+# Un paramètre absent de l'espace garde la valeur de test_rse_turfbzh.
+#
+# Les partants sont indexés et les colonnes indépendantes des paramètres
+# (score RSE, jockey) calculées UNE fois ; chaque process du pool les
+# reçoit à son démarrage puis n'évalue que des configurations.
+
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from test_rse_turfbzh import DOMAINES, SEUILS, POIDS_CONFIANCE
+from backtest import (
+    indexer_partants, caracteristiques_fixes,
+    simuler_courses_vectorise, evaluer_resultats_vectorise,
+)
+from stockage import lire_dataset
+
+RESULTATS = ['base_gagnante', 'base_placee', 'couple_gagnant', 'couple_place', 'trio']
+
+# Espace par défaut : liste = valeurs possibles, tuple (min, max) = intervalle
+# (une grille n'accepte que des listes). Grille complète : 3 888
+# configurations (quelques minutes), valeurs actuelles comprises.
+ESPACE_DEFAUT = {
+    "SIGMA_MIN": [50.0, 55.0, 60.0],
+    "IA_RANK_MAX": [4.0, 5.0, 6.0],
+    "ELO_MIN": [1350.0, 1400.0, 1450.0],
+    "COTE_MIN": [2.0, 3.0, 4.0],
+    "repos_max_trot": [21, 30],
+    "repos_max_plat": [25, 35],
+    "poids_gap": [0.45, 0.55],
+    "poids_signaux": [0.25, 0.35],
+    "conf_min": [0.0, 0.5, 0.7],
+}
+
+# ==================================================
+# ESPACE DE RECHERCHE
+# ==================================================
+def parametres_defaut():
+    """Configuration actuelle de test_rse_turfbzh, à plat"""
+    return {
+        **SEUILS,
+        **{f"repos_max_{d}": r["repos_max"] for d, r in DOMAINES.items()},
+        **{f"poids_{k}": v for k, v in POIDS_CONFIANCE.items()},
+        "conf_min": 0.0,
+    }
+
+def configuration(params):
+    """Paramètres à plat -> (domaines, seuils, poids, conf_min)"""
+    p = {**parametres_defaut(), **params}
+    domaines = {
+        d: {**r, "repos_max": p[f"repos_max_{d}"]}
+        for d, r in DOMAINES.items()
+    }
+    seuils = {k: p[k] for k in SEUILS}
+    poids = {k: p[f"poids_{k}"] for k in POIDS_CONFIANCE}
+    return domaines, seuils, poids, p["conf_min"]
+
+def grille(espace):
+    """Toutes les combinaisons d'un espace de listes"""
+    noms = list(espace)
+    for nom in noms:
+        if not isinstance(espace[nom], list):
+            raise ValueError(f"Grille : '{nom}' doit être une liste de valeurs")
+    return [dict(zip(noms, valeurs)) for valeurs in itertools.product(*espace.values())]
+
+def aleatoire(espace, n, seed=0):
+    """
+    n configurations tirées au hasard (reproductible avec seed) :
+    liste = choix uniforme, tuple (min, max) = uniforme continu
+    """
+    rng = random.Random(seed)
+    candidats = []
+    for _ in range(n):
+        config = {}
+        for nom, valeurs in espace.items():
+            if isinstance(valeurs, tuple):
+                config[nom] = rng.uniform(*valeurs)
+            else:
+                config[nom] = rng.choice(valeurs)
+        candidats.append(config)
+    return candidats
+
+# ==================================================
+# ÉVALUATION
+# ==================================================
+# Données partagées, initialisées une fois par process
+_INDEX = None
+_FIXES = None
+
+def _init_process(index, fixes):
+    global _INDEX, _FIXES
+    _INDEX, _FIXES = index, fixes
+
+def evaluer_configuration(params, index, fixes):
+    """Compteurs de réussite d'une configuration (une ligne du classement)"""
+    domaines, seuils, poids, conf_min = configuration(params)
+    simulation = simuler_courses_vectorise(
+        index, domaines, seuils, fixes['avec_musique'], poids=poids, fixes=fixes
+    )
+    resultats = evaluer_resultats_vectorise(simulation, index)
+
+    jouees = simulation['jouable'] & (simulation['confiance'] >= conf_min)
+    ligne = {**params, 'courses_jouees': int(jouees.sum())}
+    for k in RESULTATS:
+        ligne[k] = int((resultats[k] & jouees).sum())
+    return ligne
+
+def _evaluer_lot(lot):
+    return [evaluer_configuration(params, _INDEX, _FIXES) for params in lot]
+
+def classement(lignes, total_courses, critere="base_placee", min_courses=30):
+    """
+    Tableau trié : un taux par type de résultat (sur les courses jouées),
+    meilleur critère en tête. Les configurations jouant moins de
+    min_courses courses sont classées après les autres.
+    """
+    df = pd.DataFrame(lignes)
+    jouees = df['courses_jouees'].replace(0, np.nan)
+    df['taux_selection'] = df['courses_jouees'] / max(total_courses, 1)
+    for k in RESULTATS:
+        df[f'taux_{k}'] = (df[k] / jouees).fillna(0.0)
+
+    df['echantillon_ok'] = df['courses_jouees'] >= min_courses
+    df = df.sort_values(
+        ['echantillon_ok', f'taux_{critere}', 'courses_jouees'],
+        ascending=[False, False, False],
+        kind='stable'
+    )
+    df.insert(0, 'rang', np.arange(1, len(df) + 1))
+    return df.reset_index(drop=True)
+
+def balayer(df_partants, df_courses, candidats, workers=None, avec_musique=False,
+            critere="base_placee", min_courses=30, taille_lot=50):
+    """
+    Évalue chaque configuration de candidats sur l'historique consolidé.
+    workers=1 : dans le process courant ; sinon pool de process
+    (None = nombre de CPU). Le classement ne dépend pas de workers.
+    """
+    index = indexer_partants(df_partants, df_courses)
+    fixes = caracteristiques_fixes(index, avec_musique)
+
+    lots = [candidats[i:i + taille_lot] for i in range(0, len(candidats), taille_lot)]
+    if workers == 1:
+        _init_process(index, fixes)
+        lignes = [l for lot in lots for l in _evaluer_lot(lot)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_process,
+                                 initargs=(index, fixes)) as pool:
+            lignes = [l for res in pool.map(_evaluer_lot, lots) for l in res]
+
+    return classement(lignes, index['n_courses'], critere, min_courses)
+
+# ==================================================
+# MAIN
+# ==================================================
+def main():
+    print("🔬 BALAYAGE DES PARAMÈTRES 1RSE")
+    print("=" * 70)
+
+    source = input("📂 Dataset consolidé (dossier Parquet ou .xlsx, défaut: backtest_2025) : ").strip() or "backtest_2025"
+    if not os.path.exists(source):
+        print(f"❌ {source} introuvable !")
+        sys.exit(1)
+
+    print("\n🧮 Type de recherche :")
+    print(f"1. Grille complète ({len(grille(ESPACE_DEFAUT))} configurations)")
+    print("2. Aléatoire")
+    mode = input("Choix (1 ou 2, défaut: 2) : ").strip() or "2"
+
+    if mode == "1":
+        candidats = grille(ESPACE_DEFAUT)
+    else:
+        n = int(input("🎲 Nombre de configurations (défaut: 2000) : ").strip() or 2000)
+        candidats = aleatoire(ESPACE_DEFAUT, n)
+
+    w = input("⚙️ Nombre de process (vide = tous les CPU) : ").strip()
+    workers = int(w) if w else None
+
+    df_partants, df_courses = lire_dataset(source)
+    print(f"\n📊 {len(df_courses)} courses | {len(candidats)} configurations")
+
+    debut = time.perf_counter()
+    df = balayer(df_partants, df_courses, candidats, workers=workers)
+    duree = time.perf_counter() - debut
+    print(f"⏱️ {duree:.1f}s ({len(candidats) / max(duree, 1e-9):.0f} configurations/s)")
+
+    colonnes = [c for c in df.columns if c == 'rang' or c.startswith('taux_') or c == 'courses_jouees']
+    print("\n🏆 TOP 10")
+    print(df.head(10)[colonnes + [c for c in ESPACE_DEFAUT]].to_string(index=False))
+
+    sortie = "balayage_resultats.xlsx"
+    df.to_excel(sortie, index=False)
+    print(f"\n💾 Classement complet sauvegardé : {sortie}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# batch_turfbzh.py
+# ==================================================
+# ANALYSE 1RSE EN LOT (DOSSIER DE CLASSEURS TURFBZH)
+# ==================================================
+# python batch_turfbzh.py DOSSIER [--workers 8] [--mapping courses.json]
+#                                 [--sortie verdicts_jour.xlsx]
+#
+# Hippodrome et discipline sont déduits, par ordre de priorité :
+#   1. du fichier de correspondance (clé = nom du fichier, nom sans
+#      extension, ou code réunion/course "R3C3")
+#   2. du nom du fichier (ex: 15012026-R3C3-vincennes-trot-turfbzh.xlsx)
+#   3. de la clé "defaut" du fichier de correspondance
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from test_rse_turfbzh import analyser_classeur, HIPPODROMES, DISCIPLINES
+
+NOM_MAPPING = "turfbzh.json"
+
+COLONNES_VERDICTS = [
+    "fichier", "hippodrome", "discipline", "verdict", "base", "ticket", "pari",
+    "confiance", "face", "seed", "nb_partants", "nb_eligibles", "schema",
+    "recommandation", "erreur",
+]
+
+
+def charger_mapping(chemin):
+    """Charge le fichier de correspondance JSON (vide s'il n'existe pas)"""
+    if not chemin or not Path(chemin).exists():
+        return {}
+    with open(chemin, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def code_course(nom_fichier):
+    """Code réunion/course du nom de fichier ('R3C3') ou None"""
+    m = re.search(r"R\d+C\d+", nom_fichier.upper())
+    return m.group(0) if m else None
+
+
+def date_course(nom_fichier):
+    """Date de course du nom de fichier (15012026-... -> '2026-01-15') ou None"""
+    m = re.match(r"(\d{2})(\d{2})(\d{4})\D", Path(nom_fichier).name)
+    return f"{m.group(3)}-{m.group(2)}-{m.group(1)}" if m else None
+
+
+def deduire_course(fichier, mapping=None):
+    """
+    Retourne (hippodrome, discipline) pour un classeur,
+    None si l'information est introuvable
+    """
+    mapping = mapping or {}
+    p = Path(fichier)
+    infos = {}
+
+    # Du plus général au plus précis : le plus précis l'emporte
+    for cle in (code_course(p.name), p.stem, p.name):
+        if cle and cle in mapping:
+            infos.update(mapping[cle])
+
+    nom = p.stem.lower()
+    jetons = set(re.split(r"[^a-zàâçéèêëîïôûùüÿ]+", nom))
+    defaut = mapping.get("defaut", {})
+
+    hippo = infos.get("hippodrome")
+    if hippo is None:
+        hippo = next((h for h in HIPPODROMES.values() if h and h in jetons), defaut.get("hippodrome"))
+    disc = infos.get("discipline")
+    if disc is None:
+        disc = next((d for d in DISCIPLINES.values() if d in jetons), defaut.get("discipline"))
+
+    return hippo, disc
+
+
+_historique = None  # table historique.charger_table() du process (option --historique)
+
+
+def _init_historique(table):
+    global _historique
+    _historique = table
+
+
+def _analyser_fichier(args):
+    """
+    Analyse un classeur dans un process du pool.
+    Les erreurs sont renvoyées dans la ligne, jamais levées.
+    """
+    fichier, hippo, disc = args
+    try:
+        if disc is None:
+            raise ValueError("Discipline introuvable (nom de fichier ou correspondance)")
+        return analyser_classeur(fichier, hippo, disc, historique=_historique, date=date_course(fichier))
+    except Exception as e:
+        return {
+            "fichier": os.path.basename(fichier),
+            "hippodrome": hippo,
+            "discipline": disc,
+            "verdict": "ERREUR",
+            "erreur": f"{type(e).__name__}: {e}",
+        }
+
+
+def lister_classeurs(dossier):
+    return sorted(
+        f for f in Path(dossier).glob("*.xlsx")
+        if not f.name.startswith("resultat_") and not f.name.startswith("~$")
+    )
+
+
+def analyser_dossier(dossier, workers=None, mapping=None, sortie=None, historique=None):
+    """
+    Analyse tous les classeurs d'un dossier sur un pool de process
+    et écrit un tableau unique de verdicts (xlsx ou csv selon l'extension).
+    Un fichier en erreur est journalisé sans arrêter le lot.
+    historique : table historique.charger_table() ; repos / actif manquants
+    complétés à la veille de la date du nom de fichier
+    """
+    if mapping is None:
+        mapping = charger_mapping(Path(dossier) / NOM_MAPPING)
+
+    fichiers = lister_classeurs(dossier)
+    print(f"📂 {len(fichiers)} classeurs dans {dossier}")
+    if not fichiers:
+        return pd.DataFrame(columns=COLONNES_VERDICTS)
+
+    taches = [(str(f), *deduire_course(f, mapping)) for f in fichiers]
+
+    if workers == 1:
+        _init_historique(historique)
+        lignes = [_analyser_fichier(t) for t in taches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_historique,
+                                 initargs=(historique,)) as pool:
+            lignes = list(pool.map(_analyser_fichier, taches))
+
+    for ligne in lignes:
+        if ligne.get("erreur"):
+            print(f"⚠️ {ligne['fichier']} : {ligne['erreur']}")
+
+    df = pd.DataFrame(lignes).reindex(columns=COLONNES_VERDICTS)
+    df = df.sort_values("fichier").reset_index(drop=True)
+
+    if sortie:
+        if str(sortie).endswith(".csv"):
+            df.to_csv(sortie, index=False)
+        else:
+            df.to_excel(sortie, index=False)
+        print(f"💾 Verdicts sauvegardés : {sortie}")
+
+    nb_erreurs = int((df["verdict"] == "ERREUR").sum())
+    nb_jouer = int((df["verdict"] == "JOUER").sum())
+    print(f"✅ {nb_jouer} courses jouables | ❌ {len(df) - nb_jouer - nb_erreurs} NO BET | ⚠️ {nb_erreurs} erreurs")
+
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse 1RSE d'un dossier de classeurs turfbzh")
+    parser.add_argument("dossier", help="Dossier contenant les *-turfbzh.xlsx")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de process (défaut: nb de CPU)")
+    parser.add_argument("--mapping", default=None, help=f"Correspondance JSON (défaut: DOSSIER/{NOM_MAPPING})")
+    parser.add_argument("--sortie", default="resultat_verdicts.xlsx", help="Tableau de verdicts (.xlsx ou .csv)")
+    parser.add_argument("--historique", default=None,
+                        help="Dataset consolidé : repos / actif manquants complétés depuis l'historique")
+    args = parser.parse_args()
+
+    if not Path(args.dossier).is_dir():
+        print(f"❌ Le dossier {args.dossier} n'existe pas !")
+        sys.exit(1)
+
+    mapping = charger_mapping(args.mapping) if args.mapping else None
+
+    print("🏇 ANALYSE 1RSE EN LOT")
+    print("=" * 70)
+    historique = None
+    if args.historique:
+        from historique import charger_table
+        historique = charger_table(args.historique)
+        print(f"📚 Historique : {historique['cle'].nunique()} chevaux ({args.historique})")
+
+    analyser_dossier(args.dossier, workers=args.workers, mapping=mapping, sortie=args.sortie,
+                     historique=historique)
+
+
+if __name__ == "__main__":
+    main()
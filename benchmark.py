@@ -0,0 +1,334 @@
+# benchmark.py
+# ==================================================
+# BENCHMARKS DES CHEMINS CRITIQUES (DONNÉES SYNTHÉTIQUES)
+# ==================================================
+# python benchmark.py [--taille petite|moyenne|grande] [--repetitions 5]
+#                     [--sortie bench.json] [--comparer ancien.json]
+#
+# Les données viennent de synthetique.py (seed fixe) : deux rapports
+# produits avec la même taille et la même seed mesurent le même travail.
+# Pour chaque mesure : temps médian / min / max sur les répétitions
+# (préparation non chronométrée), puis un passage supplémentaire sous
+# tracemalloc pour le pic mémoire (allocations Python et numpy).
+# Certaines mesures ont un budget (BUDGETS) : un dépassement fait
+# échouer le run, comme une régression.
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import cache_classeurs
+import synthetique
+from test_rse_turfbzh import (
+    normalize_columns, SchemaTurfbzh, lire_classeur, lire_classeur_excel, construire_chevaux,
+    calcul_confiance, trier_schema, DOMAINES,
+)
+from backtest import champ_partants, simuler_course, backtest_vectorise
+from backtest_consolidation import creer_dataset_backtest, extraire_tous_les_triplets
+from backtest_flux import backtest_flux
+from backtest_analyse import analyser_favoris
+from stockage import ecrire_dataset, lire_dataset
+
+VERSION_RAPPORT = 1
+DOSSIER_PROJET = Path(__file__).resolve().parent
+
+# Budgets de temps médian (s). Le démarrage de rse_checker inclut celui
+# de l'interpréteur (~15 ms) : le chemin CSV ne doit pas importer pandas.
+BUDGETS = {
+    "demarrage rse_checker (process)": 0.10,
+}
+
+# Lance rse_checker sur un CSV dans un interpréteur neuf ;
+# code retour 3 si pandas a été importé
+CODE_DEMARRAGE = (
+    "import sys, rse_checker; sys.argv[1:] = [sys.argv[1]]; rse_checker.main(); "
+    "sys.exit(3 if 'pandas' in sys.modules else 0)"
+)
+
+TAILLES = {
+    "petite":  {"classeurs": 20,  "partants": 14, "courses": 500,   "jours": 5,  "courses_par_jour": 20},
+    "moyenne": {"classeurs": 100, "partants": 16, "courses": 3000,  "jours": 20, "courses_par_jour": 40},
+    "grande":  {"classeurs": 300, "partants": 18, "courses": 15000, "jours": 60, "courses_par_jour": 60},
+}
+
+# ==================================================
+# DONNÉES
+# ==================================================
+class Donnees:
+    """Jeu de données synthétique d'une taille, écrit dans dossier"""
+
+    def __init__(self, taille, seed, dossier):
+        t = TAILLES[taille]
+        dossier = Path(dossier)
+
+        self.classeurs = [synthetique.classeur_turfbzh(t["partants"], seed + i) for i in range(t["classeurs"])]
+        self.fichiers_xlsx = [
+            synthetique.ecrire_classeur_turfbzh(dossier / f"classeur_{i}.xlsx", t["partants"], seed + i)
+            for i in range(min(t["classeurs"], 20))
+        ]
+
+        # Course CSV du chemin léger (rse_checker)
+        self.csv_course = dossier / "course.csv"
+        with open(self.csv_course, "w", encoding="utf-8") as f:
+            f.write("numero,nom,ferrure,repos,cote,distance_ok,piste_ok\n")
+            for ligne in synthetique.lignes_turfbzh(t["partants"], seed):
+                f.write(f"{ligne[1]},{ligne[2]},D4,{ligne[10] or ''},{ligne[16]},1,{int(ligne[0])}\n")
+
+        # Cache des classeurs propre au benchmark
+        self.dossier_cache = dossier / "cache"
+
+        self.dossier_json = dossier / "dataRaceJson"
+        self.nb_triplets = synthetique.ecrire_triplets_json(
+            self.dossier_json, t["jours"], t["courses_par_jour"], seed)
+        self.lot_flux = t["courses_par_jour"]  # un lot par jour
+        self.dataset_json = dossier / "dataset_json"
+        self._stats_consolidees = None
+
+        self.df_partants, self.df_courses = synthetique.frames_consolides(t["courses"], seed)
+        self.dataset = dossier / "dataset"
+        ecrire_dataset(self.df_partants, self.df_courses, self.dataset)
+
+        # Partants groupés par course (comme le filtre de backtest_reference)
+        self.courses = [
+            (partants, cle[1], partants["discipline"].iloc[0])
+            for cle, partants in self.df_partants.groupby(["date", "hippodrome", "reunion", "course"], sort=False)
+        ]
+
+    def cache_rempli(self):
+        """Classeurs xlsx, tous déjà présents dans le cache disque"""
+        for f in self.fichiers_xlsx:
+            cache_classeurs.charger(f, lire_classeur_excel, self.dossier_cache)
+        return self.fichiers_xlsx
+
+    def stats_consolidees(self):
+        """Statistiques de creer_dataset_backtest puis backtest (calculées une fois)"""
+        if self._stats_consolidees is None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                creer_dataset_backtest(self.dossier_json, sortie=self.dataset_json)
+            self._stats_consolidees = backtest_vectorise(*lire_dataset(self.dataset_json))[0]
+        return self.dossier_json, self.lot_flux, self._stats_consolidees
+
+    def classeurs_normalises(self):
+        return [normalize_columns(df.copy()) for df in self.classeurs]
+
+    def schemas_chevaux(self):
+        """(chevaux du domaine, hippodrome) par classeur, pour calcul_confiance / trier_schema"""
+        regles = DOMAINES["trot"]
+        resultats = []
+        for i, df in enumerate(self.classeurs_normalises()):
+            chevaux = construire_chevaux(df, regles, SchemaTurfbzh(df.columns))
+            hippo = synthetique.HIPPODROMES[i % len(synthetique.HIPPODROMES)]
+            resultats.append(([c for c in chevaux if c.est_dans_domaine()], hippo))
+        return resultats
+
+# ==================================================
+# MESURES
+# ==================================================
+def _normalisation(classeurs):
+    for df in classeurs:
+        SchemaTurfbzh(normalize_columns(df).columns)
+
+def _scoring(classeurs):
+    regles = DOMAINES["trot"]
+    for df in classeurs:
+        construire_chevaux(df, regles, SchemaTurfbzh(df.columns))
+
+def _confiance_tri(schemas):
+    for chevaux, hippo in schemas:
+        schema = trier_schema(chevaux)
+        calcul_confiance(schema, hippo, afficher=False)
+
+def _simuler_course(courses):
+    for partants, hippo, disc in courses:
+        simuler_course(partants, hippo, disc)
+
+def _champ_schema(courses):
+    for partants, hippo, disc in courses:
+        champ_partants(partants, DOMAINES[disc]).schema()
+
+def _demarrage_rse_checker(csv_course):
+    resultat = subprocess.run(
+        [sys.executable, "-c", CODE_DEMARRAGE, str(csv_course)],
+        cwd=DOSSIER_PROJET, capture_output=True, text=True,
+    )
+    if resultat.returncode == 3:
+        raise RuntimeError("rse_checker importe pandas au démarrage")
+    resultat.check_returncode()
+
+def _backtest_flux(args):
+    dossier_json, taille_lot, attendu = args
+    stats = backtest_flux(dossier_json, taille_lot=taille_lot)
+    if stats != attendu:
+        raise RuntimeError(f"backtest_flux {stats} != dataset consolidé {attendu}")
+
+def mesures(d):
+    """
+    Nom -> (préparation, exécution, nombre d'éléments, unité).
+    La préparation est refaite avant chaque répétition, hors chrono.
+    """
+    nb_classeurs = len(d.classeurs)
+    return {
+        "normalize_columns+detecter_colonne": (
+            lambda: [df.copy() for df in d.classeurs], _normalisation, nb_classeurs, "classeurs"),
+        "demarrage rse_checker (process)": (
+            lambda: d.csv_course, _demarrage_rse_checker, 1, "process"),
+        "lire_classeur": (
+            lambda: d.fichiers_xlsx, lambda fichiers: [lire_classeur(f, cache=False) for f in fichiers],
+            len(d.fichiers_xlsx), "classeurs"),
+        "lire_classeur (cache disque)": (
+            d.cache_rempli,
+            lambda fichiers: [cache_classeurs.charger(f, lire_classeur_excel, d.dossier_cache) for f in fichiers],
+            len(d.fichiers_xlsx), "classeurs"),
+        "scoring_main (construire_chevaux)": (
+            d.classeurs_normalises, _scoring, nb_classeurs, "classeurs"),
+        "calcul_confiance+trier_schema": (
+            d.schemas_chevaux, _confiance_tri, nb_classeurs, "schémas"),
+        "simuler_course": (
+            lambda: d.courses, _simuler_course, len(d.courses), "courses"),
+        "ChampCourse (domaine+schéma)": (
+            lambda: d.courses, _champ_schema, len(d.courses), "courses"),
+        "backtest_vectorise": (
+            lambda: (d.df_partants, d.df_courses), lambda a: backtest_vectorise(*a),
+            len(d.df_courses), "courses"),
+        "extraire_tous_les_triplets": (
+            lambda: d.dossier_json, extraire_tous_les_triplets, d.nb_triplets, "courses"),
+        "analyser_favoris": (
+            lambda: d.dataset, analyser_favoris, len(d.df_courses), "courses"),
+        # Échoue si le flux ne donne pas les statistiques du dataset consolidé
+        "backtest_flux (= consolidé)": (
+            d.stats_consolidees, _backtest_flux, d.nb_triplets, "courses"),
+    }
+
+def mesurer(preparer, executer, repetitions):
+    """Temps de chaque répétition (s) et pic mémoire (Mo)"""
+    temps = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repetitions):
+            arg = preparer()
+            debut = time.perf_counter()
+            executer(arg)
+            temps.append(time.perf_counter() - debut)
+
+        arg = preparer()
+        tracemalloc.start()
+        try:
+            executer(arg)
+            pic = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return temps, pic / 1e6
+
+def lancer(taille="petite", repetitions=5, seed=0, filtre=None):
+    """Lance les mesures et retourne le rapport (dict sérialisable en JSON)"""
+    rapport = {
+        "version": VERSION_RAPPORT,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "taille": taille,
+        "parametres": TAILLES[taille],
+        "seed": seed,
+        "repetitions": repetitions,
+        "environnement": {
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "mesures": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🧪 Génération des données ({taille}, seed={seed})...")
+        d = Donnees(taille, seed, tmp)
+
+        for nom, (preparer, executer, n, unite) in mesures(d).items():
+            if filtre and filtre not in nom:
+                continue
+            temps, pic = mesurer(preparer, executer, repetitions)
+            median = statistics.median(temps)
+            rapport["mesures"][nom] = {
+                "elements": n,
+                "unite": unite,
+                "median_s": median,
+                "min_s": min(temps),
+                "max_s": max(temps),
+                "par_element_ms": median / max(n, 1) * 1000,
+                "pic_memoire_mo": pic,
+            }
+            print(f"   ⏱️ {nom:38s} {median * 1000:9.1f} ms  ({n} {unite}, pic {pic:.1f} Mo)")
+            if nom in BUDGETS:
+                rapport["mesures"][nom]["budget_s"] = BUDGETS[nom]
+                if median > BUDGETS[nom]:
+                    print(f"      ⚠️ hors budget ({BUDGETS[nom] * 1000:.0f} ms)")
+
+    return rapport
+
+def hors_budget(rapport):
+    """Mesures dont le temps médian dépasse leur budget"""
+    return [
+        nom for nom, m in rapport["mesures"].items()
+        if "budget_s" in m and m["median_s"] > m["budget_s"]
+    ]
+
+def comparer(rapport, ancien, seuil=0.10):
+    """Affiche le rapport médian nouveau / ancien ; retourne les mesures en régression"""
+    regressions = []
+    if ancien.get("taille") != rapport["taille"] or ancien.get("seed") != rapport["seed"]:
+        print("⚠️ Tailles ou seeds différentes : comparaison indicative")
+
+    print("\n📊 COMPARAISON (médiane nouvelle / ancienne)")
+    for nom, m in rapport["mesures"].items():
+        a = ancien.get("mesures", {}).get(nom)
+        if not a:
+            print(f"   🆕 {nom}")
+            continue
+        ratio = m["median_s"] / a["median_s"] if a["median_s"] else float("inf")
+        ratio_mem = m["pic_memoire_mo"] / a["pic_memoire_mo"] if a["pic_memoire_mo"] else float("inf")
+        signe = "⚠️" if ratio > 1 + seuil else "✅"
+        print(f"   {signe} {nom:38s} temps x{ratio:.2f} | mémoire x{ratio_mem:.2f}")
+        if ratio > 1 + seuil:
+            regressions.append(nom)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks 1RSE sur données synthétiques")
+    parser.add_argument("--taille", choices=list(TAILLES), default="petite")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filtre", default=None, help="Ne lancer que les mesures contenant ce texte")
+    parser.add_argument("--sortie", default="benchmark.json", help="Rapport JSON")
+    parser.add_argument("--comparer", default=None, help="Rapport JSON d'un run précédent")
+    parser.add_argument("--seuil", type=float, default=0.10, help="Régression si temps > ancien x (1 + seuil)")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARKS 1RSE")
+    print("=" * 70)
+    rapport = lancer(args.taille, args.repetitions, args.seed, args.filtre)
+
+    with open(args.sortie, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Rapport sauvegardé : {args.sortie}")
+
+    echec = bool(hors_budget(rapport))
+    if args.comparer:
+        with open(args.comparer, "r", encoding="utf-8") as f:
+            ancien = json.load(f)
+        echec = bool(comparer(rapport, ancien, args.seuil)) or echec
+    if echec:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
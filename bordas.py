@@ -0,0 +1,312 @@
+# bordas.py
+# ==================================================
+# TABLES DE CORDE APPRISES (BIAIS DU NUMÉRO AU DÉPART)
+# ==================================================
+# python bordas.py [backtest_2025] [--date-max AAAA-MM-JJ] [--sortie bordas.json]
+#
+# BORDAS (test_rse_turfbzh.py) est saisi à la main pour 7 hippodromes.
+# Ici, le biais est mesuré sur les arrivées consolidées, par
+# hippodrome x discipline x tranche de distance et par numéro :
+#   excès = placé (top 3) - probabilité attendue (3 / partants)
+# Petits échantillons : chaque niveau est tiré vers le niveau au-dessus
+# (tranche -> discipline -> hippodrome -> 0), avec FORCE_A_PRIORI
+# partants fictifs :
+#   biais = (somme des excès + FORCE x biais du parent) / (n + FORCE)
+# Tout est calculé par agrégations groupées (aucune boucle par course).
+#
+# Résultat : bordas.json (versionné), chargé une seule fois par
+# calcul_confiance, puis consulté en O(1). Un hippodrome absent de la
+# table garde BORDAS ; RSE_BORDAS=chemin pour un autre fichier,
+# RSE_BORDAS=0 pour ignorer la table apprise.
+#
+# Pas de look-ahead en backtest : tables_sans_fuite n'y laisse entrer
+# qu'une table construite sur des courses strictement antérieures à la
+# période testée (date_max de l'artefact, cf. --date-max) ; sinon elle
+# est ignorée (BORDAS seul), avec un avertissement.
+
+import argparse
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from elo import cle_nom
+
+VERSION_BORDAS = 1
+VARIABLE = "RSE_BORDAS"
+FICHIER_DEFAUT = Path(__file__).resolve().parent / "bordas.json"
+
+FORCE_A_PRIORI = 30.0   # partants fictifs au biais du niveau parent
+MIN_COURSES = 20        # en dessous, l'hippodrome garde BORDAS
+BONUS_MAX = 0.35        # même amplitude que les tables saisies
+NB_PLACES = 3
+
+# Tranches de distance (mètres) : bornes basses exclues de la tranche précédente
+BORNES_DISTANCE = [1600, 2200, 2800]
+TRANCHES_DISTANCE = ["-1600", "1600-2199", "2200-2799", "2800+"]
+TOUTES = "*"
+
+# Discipline PMU -> discipline DOMAINES
+DISCIPLINES = {
+    "trot": "trot", "attele": "trot", "monte": "monte", "plat": "plat",
+    "obstacle": "obstacle", "haie": "obstacle", "steeple": "obstacle", "cross": "obstacle",
+}
+
+_artefacts = {}   # chemin -> (tables, date_max), (None, None) si absent
+_avertis = set()
+
+
+def cle_hippodrome(hippodrome):
+    """'CAGNES-SUR-MER ' / 'Cagnes-sur-mer' -> 'cagnes-sur-mer'"""
+    cle = cle_nom(hippodrome)
+    return cle.lower() if cle else None
+
+
+def cle_discipline(discipline):
+    d = str(discipline or "").lower().replace("é", "e")
+    return next((v for prefixe, v in DISCIPLINES.items() if d.startswith(prefixe)), None)
+
+
+def tranches_distance(distances):
+    """Tranche de chaque distance en mètres (tableau object, None si inconnue)"""
+    distances = np.array([_metres(d) for d in distances], dtype=float)
+    tranches = np.array(TRANCHES_DISTANCE, dtype=object)[np.searchsorted(BORNES_DISTANCE, distances, side="right")]
+    tranches[np.isnan(distances)] = None
+    return tranches
+
+
+def _metres(distance):
+    try:
+        return float(distance)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# ==================================================
+# CALCUL
+# ==================================================
+def _exces_par_partant(df_partants, df_courses):
+    """
+    Une ligne par partant d'une course à l'arrivée connue :
+    h / d / t (clés), numero, exces = placé - attendu
+    """
+    import pandas as pd
+
+    cles = [c for c in ("date", "reunion", "hippodrome", "course") if c in df_partants.columns and c in df_courses.columns]
+    df = df_partants[list(dict.fromkeys(cles + ["hippodrome", "discipline", "numero", "ordre_arrivee"]))]
+    if "distance" in df_courses.columns:
+        df = df.merge(df_courses[cles + ["distance"]].drop_duplicates(cles), on=cles, how="left")
+    else:
+        df = df.assign(distance=np.nan)
+
+    df = df.assign(
+        numero=pd.to_numeric(df["numero"], errors="coerce"),
+        place=pd.to_numeric(df["ordre_arrivee"], errors="coerce"),
+        _course=df.groupby(cles, sort=False, dropna=False).ngroup(),
+    )
+    df = df[df["numero"].notna()]
+
+    # Courses sans aucune place connue : pas d'arrivée, ignorées
+    par_course = df.groupby("_course")
+    n = par_course["numero"].transform("size")
+    arrivee = par_course["place"].transform("count") > 0
+    df, n = df[arrivee], n[arrivee]
+
+    place = df["place"]
+    exces = ((place >= 1) & (place <= NB_PLACES)).astype(float) - np.minimum(NB_PLACES, n) / n
+
+    hippos = {h: cle_hippodrome(h) for h in pd.unique(df["hippodrome"])}
+    discs = {d: cle_discipline(d) for d in pd.unique(df["discipline"])}
+    tranche = tranches_distance(pd.to_numeric(df["distance"], errors="coerce").to_numpy(dtype=float))
+
+    return pd.DataFrame({
+        "h": df["hippodrome"].map(hippos).to_numpy(),
+        "d": df["discipline"].map(discs).to_numpy(),
+        "t": tranche,
+        "numero": df["numero"].to_numpy().astype(np.int64),
+        "exces": exces.to_numpy(),
+        "_course": df["_course"].to_numpy(),
+    })
+
+
+def _niveau(df, cles, parent=None, force=FORCE_A_PRIORI):
+    """Biais rétréci par (cles, numero), tiré vers parent (ou vers 0)"""
+    agg = df.groupby(cles + ["numero"])["exces"].agg(["sum", "size"]).reset_index()
+    if parent is None:
+        agg["biais"] = agg["sum"] / (agg["size"] + force)
+    else:
+        cles_parent = [c for c in parent.columns if c not in ("biais", "sum", "size", "_parent")]
+        agg = agg.merge(parent[cles_parent + ["biais"]].rename(columns={"biais": "_parent"}),
+                        on=cles_parent, how="left")
+        agg["biais"] = (agg["sum"] + force * agg["_parent"].fillna(0.0)) / (agg["size"] + force)
+    return agg
+
+
+def calculer_bordas(df_partants, df_courses, force=FORCE_A_PRIORI, min_courses=MIN_COURSES):
+    """
+    Tables de corde apprises :
+    {hippodrome: {discipline | '*': {tranche | '*': {numero: bonus}}}}
+    et nombre de courses par hippodrome retenu.
+    """
+    df = _exces_par_partant(df_partants, df_courses)
+    df = df[df["h"].notna()]
+    nb_courses = df.groupby("h")["_course"].nunique()
+    nb_courses = nb_courses[nb_courses >= min_courses]
+    df = df[df["h"].isin(nb_courses.index)]
+
+    n1 = _niveau(df, ["h"], force=force)
+    df = df[df["d"].notna()]
+    n2 = _niveau(df, ["h", "d"], n1, force)
+    n3 = _niveau(df[df["t"].notna()], ["h", "d", "t"], n2, force)
+
+    tables = {}
+    for niveau, cles in ((n1, ["h"]), (n2, ["h", "d"]), (n3, ["h", "d", "t"])):
+        bonus = np.clip(niveau["biais"].to_numpy(), -BONUS_MAX, BONUS_MAX).round(4)
+        colonnes = [niveau[c].to_numpy() for c in cles] + [niveau["numero"].to_numpy()]
+        for *cle, numero, b in zip(*colonnes, bonus):
+            h, d, t = (cle + [TOUTES, TOUTES])[:3]
+            tables.setdefault(h, {}).setdefault(d, {}).setdefault(t, {})[int(numero)] = float(b)
+
+    return tables, {h: int(n) for h, n in nb_courses.items()}
+
+
+# ==================================================
+# ARTEFACT
+# ==================================================
+def sauvegarder_bordas(chemin, tables, effectifs, source=None, date_max=None, force=FORCE_A_PRIORI):
+    """Écriture atomique du fichier versionné"""
+    chemin = Path(chemin)
+    contenu = {
+        "version": VERSION_BORDAS,
+        "parametres": {"force_a_priori": force, "bonus_max": BONUS_MAX, "places": NB_PLACES,
+                       "tranches": TRANCHES_DISTANCE},
+        "genere_le": date.today().isoformat(),
+        "source": str(source) if source is not None else None,
+        "date_max": date_max,
+        "courses": effectifs,
+        "tables": tables,
+    }
+    tmp = chemin.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(contenu, f, ensure_ascii=False)
+    os.replace(tmp, chemin)
+
+
+def chemin_bordas():
+    """Fichier de la table apprise, None si désactivée (RSE_BORDAS=0)"""
+    valeur = os.environ.get(VARIABLE, "").strip()
+    if valeur.lower() in ("0", "non", "false"):
+        return None
+    return Path(valeur).expanduser() if valeur else FICHIER_DEFAUT
+
+
+def _artefact(chemin=None):
+    """(tables, date_max) lus une seule fois par chemin, (None, None) si absent"""
+    chemin = chemin or chemin_bordas()
+    if chemin is None:
+        return None, None
+    cle = str(chemin)
+    if cle not in _artefacts:
+        tables, date_max = None, None
+        if Path(chemin).exists():
+            with open(chemin, "r", encoding="utf-8") as f:
+                contenu = json.load(f)
+            if contenu.get("version") == VERSION_BORDAS:
+                # Numéros en entiers (clés JSON = chaînes)
+                tables = {h: {d: {t: {int(n): b for n, b in nums.items()} for t, nums in pard.items()}
+                              for d, pard in parh.items()}
+                          for h, parh in contenu["tables"].items()}
+                date_max = contenu.get("date_max")
+        _artefacts[cle] = (tables, date_max)
+    return _artefacts[cle]
+
+
+def charger_bordas(chemin=None):
+    """
+    Tables apprises (lues une seule fois par chemin), None si le fichier
+    manque ou n'est pas de la version attendue
+    """
+    return _artefact(chemin)[0]
+
+
+def tables_sans_fuite(date_debut, chemin=None):
+    """
+    Tables apprises utilisables pour un backtest dont la première course
+    est le date_debut : seulement si l'artefact a été construit sur des
+    courses strictement antérieures (date_max < date_debut). Sinon {}
+    (aucune table apprise : BORDAS seul), avec un avertissement.
+    """
+    tables, date_max = _artefact(chemin)
+    if not tables:
+        return {}
+    date_debut = str(date_debut)[:10] if date_debut is not None else None
+    if date_max is not None and date_debut is not None and str(date_max)[:10] < date_debut:
+        return tables
+    if (date_max, date_debut) not in _avertis:
+        _avertis.add((date_max, date_debut))
+        print(f"⚠️ Table de corde apprise ignorée (construite jusqu'au {date_max}, "
+              f"période testée à partir du {date_debut}) : BORDAS seul")
+    return {}
+
+
+def tables_hippodrome(hippodrome, discipline=None, tranche=None, tables=None):
+    """
+    Tables du plus précis au plus général pour une course, ou None si
+    l'hippodrome n'a pas de table apprise
+    """
+    tables = charger_bordas() if tables is None else tables
+    if not tables or not hippodrome:
+        return None
+    parh = tables.get(cle_hippodrome(hippodrome))
+    if parh is None:
+        return None
+    chaine = []
+    pard = parh.get(cle_discipline(discipline)) if discipline else None
+    if pard is not None:
+        if tranche is not None and tranche in pard:
+            chaine.append(pard[tranche])
+        chaine.append(pard[TOUTES])
+    chaine.append(parh[TOUTES][TOUTES])
+    return chaine
+
+
+def bonus_appris(hippodrome, numero, discipline=None, distance=None, tables=None):
+    """Bonus corde appris (numéro absent du niveau fin => niveau parent), None si hippodrome sans table"""
+    chaine = tables_hippodrome(hippodrome, discipline, tranches_distance([distance])[0], tables)
+    if chaine is None:
+        return None
+    for table in chaine:
+        if numero in table:
+            return table[numero]
+    return 0.0
+
+
+def main():
+    from stockage import lire_dataset
+
+    parser = argparse.ArgumentParser(description="Tables de corde apprises depuis les arrivées consolidées")
+    parser.add_argument("source", nargs="?", default="backtest_2025", help="Dataset Parquet ou .xlsx")
+    parser.add_argument("--date-max", default=None, help="N'utiliser que les courses <= AAAA-MM-JJ")
+    parser.add_argument("--sortie", default=None, help=f"Fichier produit (défaut : {FICHIER_DEFAUT.name})")
+    parser.add_argument("--force", type=float, default=FORCE_A_PRIORI, help="Partants fictifs du rétrécissement")
+    args = parser.parse_args()
+
+    print("🎯 TABLES DE CORDE APPRISES")
+    print("=" * 70)
+    df_partants, df_courses = lire_dataset(args.source, date_max=args.date_max)
+    tables, effectifs = calculer_bordas(df_partants, df_courses, force=args.force)
+    sortie = args.sortie or chemin_bordas() or FICHIER_DEFAUT
+    date_max = args.date_max or (str(df_courses["date"].max()) if len(df_courses) else None)
+    sauvegarder_bordas(sortie, tables, effectifs, args.source, date_max, args.force)
+
+    print(f"✅ {len(tables)} hippodromes ({sum(effectifs.values())} courses) -> {sortie}")
+    for h in sorted(effectifs, key=effectifs.get, reverse=True)[:10]:
+        corde = tables[h][TOUTES][TOUTES]
+        extremes = " | ".join(f"#{n}: {corde[n]:+.2f}" for n in sorted(corde)[:3])
+        print(f"   {h:20s} {effectifs[h]:5d} courses  {extremes}")
+
+
+if __name__ == "__main__":
+    main()
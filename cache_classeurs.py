@@ -0,0 +1,241 @@
+# cache_classeurs.py
+# ==================================================
+# CACHE DISQUE DES CLASSEURS TURFBZH LUS
+# ==================================================
+# pd.read_excel(header=[0, 1]) prend ~100 ms à plusieurs secondes par
+# classeur, l'analyse quelques millisecondes. Le DataFrame normalisé
+# est gardé sur disque en Parquet (pyarrow, rien n'est exécuté à la
+# relecture, contrairement à pickle), sous le sha256 du contenu du
+# classeur :
+#   - fichier modifié => autre empreinte => relu (invalidation automatique)
+#   - même contenu sous un autre nom => même entrée
+# Taille bornée : au-delà de TAILLE_MAX_MO, les entrées les moins
+# récemment utilisées sont supprimées.
+#
+# Colonnes renommées par position dans le fichier ; libellés d'origine,
+# colonnes texte et colonnes de types mélangés (valeurs encodées "type:
+# valeur") sont décrits dans les métadonnées du schéma, pour retrouver
+# exactement le DataFrame de la lecture Excel.
+#
+# Dossier : $RSE_CACHE ou ~/.cache/rse_turfbzh ; RSE_CACHE=0 le désactive.
+# Sans pyarrow, le cache est désactivé (lecture directe).
+
+import datetime
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from manifeste import hash_fichier
+
+VERSION_CACHE = 2
+TAILLE_MAX_MO = 200
+VARIABLE = "RSE_CACHE"
+EXTENSION = ".parquet"
+CLE_META = b"rse_cache"
+
+_statistiques = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def dossier_cache():
+    """Dossier du cache, None si désactivé (RSE_CACHE=0)"""
+    valeur = os.environ.get(VARIABLE, "").strip()
+    if valeur.lower() in ("0", "non", "false"):
+        return None
+    if valeur:
+        return Path(valeur).expanduser()
+    return Path.home() / ".cache" / "rse_turfbzh"
+
+
+def _pyarrow():
+    """Import paresseux de pyarrow (None si absent : pas de cache)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    return pa, pq
+
+
+def _entree(dossier, empreinte):
+    return Path(dossier) / f"{empreinte}-v{VERSION_CACHE}{EXTENSION}"
+
+
+# -----------------
+# Colonnes object : texte pur ou types mélangés
+# -----------------
+def _est_texte(valeurs):
+    """Que des str et des NaN : colonne texte native (NaN <-> null)"""
+    return all(type(v) is str or (type(v) is float and v != v) for v in valeurs)
+
+
+def _encoder(v):
+    t = type(v)
+    if v is None:
+        return "n:"
+    if t is str:
+        return "s:" + v
+    if t is bool:
+        return "b:" + str(int(v))
+    if t is int:
+        return "i:" + str(v)
+    if t is float:
+        return "f:" + repr(v)
+    if t is pd.Timestamp:
+        return "T:" + v.isoformat()
+    if t is datetime.datetime:
+        return "d:" + v.isoformat()
+    raise TypeError(f"type non mis en cache : {t.__name__}")
+
+
+def _decoder(s):
+    t, v = s[0], s[2:]
+    if t == "n":
+        return None
+    if t == "s":
+        return v
+    if t == "b":
+        return v == "1"
+    if t == "i":
+        return int(v)
+    if t == "f":
+        return float(v)
+    if t == "T":
+        return pd.Timestamp(v)
+    if t == "d":
+        return datetime.datetime.fromisoformat(v)
+    raise ValueError(f"valeur de cache invalide : {s!r}")
+
+
+def _vers_table(pa, df):
+    """DataFrame -> table Arrow (colonnes "0", "1"... + description en métadonnées)"""
+    multi = isinstance(df.columns, pd.MultiIndex)
+    meta = {
+        "multi": multi,
+        "colonnes": [list(c) if multi else c for c in df.columns],
+        "textes": [],
+        "mixtes": [],
+    }
+    colonnes = {}
+    for i in range(df.shape[1]):
+        serie = df.iloc[:, i]
+        if serie.dtype == object:
+            if _est_texte(serie):
+                meta["textes"].append(i)
+            else:
+                serie = serie.map(_encoder)
+                meta["mixtes"].append(i)
+        colonnes[str(i)] = serie
+    table = pa.Table.from_pandas(pd.DataFrame(colonnes, index=df.index))
+    return table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        CLE_META: json.dumps(meta, ensure_ascii=False).encode(),
+    })
+
+
+def _depuis_table(table):
+    """Inverse de _vers_table"""
+    meta = json.loads(table.schema.metadata[CLE_META])
+    df = table.to_pandas()
+    for i in meta["textes"]:
+        col = df.iloc[:, i]
+        df.isetitem(i, col.astype(object).where(col.notna(), np.nan))
+    for i in meta["mixtes"]:
+        df.isetitem(i, df.iloc[:, i].map(_decoder).astype(object))
+    if meta["multi"]:
+        df.columns = pd.MultiIndex.from_tuples([tuple(c) for c in meta["colonnes"]])
+    else:
+        df.columns = meta["colonnes"]
+    return df
+
+
+def charger(fichier, lecteur, dossier=None, taille_max_mo=TAILLE_MAX_MO):
+    """
+    DataFrame du classeur : depuis le cache si son contenu y est déjà,
+    sinon lecteur(fichier) puis mise en cache.
+    Une erreur d'accès au cache ne bloque jamais la lecture.
+    """
+    dossier = dossier or dossier_cache()
+    arrow = _pyarrow()
+    if dossier is None or arrow is None:
+        return lecteur(fichier)
+    pa, pq = arrow
+
+    entree = _entree(dossier, hash_fichier(fichier))
+    try:
+        df = _depuis_table(pq.read_table(entree))
+        os.utime(entree)  # date d'utilisation pour l'éviction LRU
+        _statistiques["hits"] += 1
+        return df
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        # Entrée illisible (écriture interrompue, métadonnées absentes) : relue puis remplacée
+        pass
+
+    _statistiques["misses"] += 1
+    df = lecteur(fichier)
+    try:
+        table = _vers_table(pa, df)
+        entree.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entree.with_name(f"{entree.name}.{os.getpid()}.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, entree)
+        evincer(dossier, taille_max_mo)
+    except (OSError, ValueError, TypeError):
+        # Type de valeur non géré ou disque plein : pas de mise en cache
+        pass
+    return df
+
+
+def entrees(dossier=None):
+    """Entrées du cache : liste de (chemin, taille, date d'utilisation)"""
+    dossier = dossier or dossier_cache()
+    resultat = []
+    if dossier is None or not Path(dossier).is_dir():
+        return resultat
+    dossier = Path(dossier)
+    for f in dossier.glob(f"*{EXTENSION}"):
+        try:
+            st = f.stat()
+        except FileNotFoundError:  # supprimée par un autre process
+            continue
+        resultat.append((f, st.st_size, st.st_mtime_ns))
+    return resultat
+
+
+def evincer(dossier=None, taille_max_mo=TAILLE_MAX_MO):
+    """Supprime les entrées les moins récemment utilisées au-delà de taille_max_mo"""
+    liste = sorted(entrees(dossier), key=lambda e: e[2])
+    total = sum(taille for _, taille, _ in liste)
+    limite = taille_max_mo * 1024 * 1024
+    for f, taille, _ in liste:
+        if total <= limite:
+            break
+        try:
+            f.unlink()
+            _statistiques["evictions"] += 1
+        except FileNotFoundError:
+            pass
+        total -= taille
+
+
+def vider(dossier=None):
+    """Supprime toutes les entrées du cache"""
+    for f, _, _ in entrees(dossier):
+        try:
+            f.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def statistiques(dossier=None):
+    """Compteurs du process (hits, misses, évictions) et occupation du disque"""
+    liste = entrees(dossier)
+    return {
+        **_statistiques,
+        "entrees": len(liste),
+        "taille_mo": sum(taille for _, taille, _ in liste) / (1024 * 1024),
+    }
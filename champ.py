@@ -0,0 +1,201 @@
+# champ.py
+# ==================================================
+# CHAMP D'UNE COURSE : STRUCTURE DE TABLEAUX
+# ==================================================
+# Un tableau numpy par attribut au lieu d'une liste d'objets Cheval :
+# filtrage du domaine, tri du schéma et export se font en bloc.
+# Cheval reste disponible comme vue (vue(i) / chevaux()).
+# Utilisé par backtest.simuler_course (via backtest.champ_partants).
+
+import numpy as np
+
+from cheval import Cheval
+
+COLONNES = (
+    "numero", "nom", "V", "F", "score_RSE",
+    "SIGMA_OK", "IA_OK", "ELO_OK", "VALUE_OK",
+    "driver_nom", "driver_elo", "musique", "cote",
+)
+SIGNAUX = ("SIGMA_OK", "IA_OK", "ELO_OK", "VALUE_OK")
+
+# Signaux stockés en int8 : 1 = True, 0 = False, -1 = non renseigné (None)
+NON_RENSEIGNE = -1
+
+
+def _signal(v):
+    return NON_RENSEIGNE if v is None else int(bool(v))
+
+
+def _valeur(v):
+    return None if v is None or np.isnan(v) else float(v)
+
+
+class ChampCourse:
+    """
+    Les partants d'une course en colonnes typées :
+    - numero, score_RSE : int64
+    - V, F : bool
+    - SIGMA_OK, IA_OK, ELO_OK, VALUE_OK : int8 (-1 = None)
+    - driver_elo, cote : float64 (NaN = None)
+    - nom, driver_nom, musique : object
+    """
+
+    __slots__ = COLONNES
+
+    def __init__(self, numero, nom=None, V=None, F=None, score_RSE=None,
+                 SIGMA_OK=None, IA_OK=None, ELO_OK=None, VALUE_OK=None,
+                 driver_nom=None, driver_elo=None, musique=None, cote=None):
+        n = len(numero)
+
+        def tab(val, dtype, defaut):
+            if val is None:
+                return np.full(n, defaut, dtype=dtype)
+            return np.asarray(val, dtype=dtype)
+
+        self.numero = np.asarray(numero, dtype=np.int64)
+        self.nom = tab(nom, object, "")
+        self.V = tab(V, bool, True)
+        self.F = tab(F, bool, True)
+        self.score_RSE = tab(score_RSE, np.int64, 0)
+        self.SIGMA_OK = tab(SIGMA_OK, np.int8, NON_RENSEIGNE)
+        self.IA_OK = tab(IA_OK, np.int8, NON_RENSEIGNE)
+        self.ELO_OK = tab(ELO_OK, np.int8, NON_RENSEIGNE)
+        self.VALUE_OK = tab(VALUE_OK, np.int8, NON_RENSEIGNE)
+        self.driver_nom = tab(driver_nom, object, None)
+        self.driver_elo = tab(driver_elo, np.float64, np.nan)
+        self.musique = tab(musique, object, None)
+        self.cote = tab(cote, np.float64, np.nan)
+
+    def __len__(self):
+        return len(self.numero)
+
+    # -----------------
+    # Conversion Cheval <-> colonnes
+    # -----------------
+    @classmethod
+    def depuis_chevaux(cls, chevaux):
+        """Construit le champ à partir d'une liste de Cheval"""
+        def nan(v):
+            return np.nan if v is None else v
+
+        return cls(
+            numero=[c.numero for c in chevaux],
+            nom=[c.nom for c in chevaux],
+            V=[c.V for c in chevaux],
+            F=[c.F for c in chevaux],
+            score_RSE=[c.score_RSE for c in chevaux],
+            **{s: [_signal(getattr(c, s)) for c in chevaux] for s in SIGNAUX},
+            driver_nom=[c.driver_nom for c in chevaux],
+            driver_elo=[nan(c.driver_elo) for c in chevaux],
+            musique=[c.musique for c in chevaux],
+            cote=[nan(c.cote) for c in chevaux],
+        )
+
+    def vue(self, i):
+        """Cheval équivalent à la ligne i (pour le code existant)"""
+        c = Cheval(self.numero[i], self.nom[i])
+        c.set_domaine(self.V[i], self.F[i])
+        c.set_score_rse(self.score_RSE[i])
+        c.set_signaux(*(
+            None if getattr(self, s)[i] == NON_RENSEIGNE else bool(getattr(self, s)[i])
+            for s in SIGNAUX
+        ))
+        c.set_driver(self.driver_nom[i], _valeur(self.driver_elo[i]))
+        c.set_musique(self.musique[i])
+        c.set_cote(_valeur(self.cote[i]))
+        return c
+
+    def chevaux(self):
+        return [self.vue(i) for i in range(len(self))]
+
+    def sous_champ(self, index):
+        """Nouveau champ restreint à un masque booléen ou à des indices"""
+        champ = object.__new__(ChampCourse)
+        for col in COLONNES:
+            setattr(champ, col, getattr(self, col)[index])
+        return champ
+
+    # -----------------
+    # Logique (vectorisée)
+    # -----------------
+    def definir_domaine(self, regles, repos, actif):
+        """
+        Domaine (V, F) de tous les chevaux d'un coup, mêmes règles que main :
+        repos en float (NaN = inconnu), actif en bool
+        """
+        repos = np.asarray(repos, dtype=np.float64)
+        actif = np.asarray(actif, dtype=bool)
+        self.V = actif.copy() if regles["actif_only"] else np.ones(len(self), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            self.F = np.isnan(repos) | (repos <= regles["repos_max"])
+
+    def dans_domaine(self):
+        return self.V & self.F
+
+    def domaine(self):
+        return self.sous_champ(self.dans_domaine())
+
+    def signaux_ok(self):
+        """Équivalent de compter_signaux_ok pour chaque cheval"""
+        return sum((getattr(self, s) == 1).astype(np.int64) for s in SIGNAUX)
+
+    def driver_niveau(self):
+        elo = self.driver_elo
+        with np.errstate(invalid="ignore"):
+            return np.where(np.isnan(elo) | ((elo >= 1450) & (elo < 1600)), "MOYEN",
+                            np.where(elo >= 1600, "FORT", "FAIBLE")).astype(object)
+
+    def driver_rang(self):
+        """Équivalent de driver_rank : FORT=2, MOYEN=1, FAIBLE=0"""
+        elo = self.driver_elo
+        with np.errstate(invalid="ignore"):
+            return np.where(np.isnan(elo), 1, np.where(elo >= 1600, 2, np.where(elo >= 1450, 1, 0)))
+
+    def impact_driver(self):
+        """Équivalent de Cheval.impact_driver pour chaque cheval"""
+        elo = self.driver_elo
+        with np.errstate(invalid="ignore"):
+            return np.select(
+                [np.isnan(elo), elo >= 1600, elo >= 1500, elo >= 1450],
+                [0.0, 0.12, 0.05, 0.0],
+                default=-0.10
+            )
+
+    def ordre_schema(self):
+        """
+        Indices triés comme trier_schema (score_RSE, driver, signaux
+        décroissants ; à égalité l'ordre d'origine est conservé)
+        """
+        pos = np.arange(len(self))
+        return np.lexsort((pos, -self.signaux_ok(), -self.driver_rang(), -self.score_RSE))
+
+    def schema(self):
+        """Chevaux du domaine, triés comme trier_schema"""
+        dom = self.domaine()
+        return dom.sous_champ(dom.ordre_schema())
+
+    # -----------------
+    # Export
+    # -----------------
+    def to_dict(self):
+        """Colonnes au format de Cheval.to_dict (listes)"""
+        def signal(s):
+            return [None if v == NON_RENSEIGNE else bool(v) for v in getattr(self, s)]
+
+        return {
+            "numero": self.numero.tolist(),
+            "nom": self.nom.tolist(),
+            "V": self.V.tolist(),
+            "F": self.F.tolist(),
+            "score_RSE": self.score_RSE.tolist(),
+            **{s: signal(s) for s in SIGNAUX},
+            "JOCKEY": self.driver_nom.tolist(),
+            "ELO_JOCKEY": [_valeur(v) for v in self.driver_elo],
+            "JOCKEY_NIVEAU": self.driver_niveau().tolist(),
+            "musique": self.musique.tolist(),
+            "cote": [_valeur(v) for v in self.cote],
+        }
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.to_dict())
@@ -11,8 +11,17 @@ class Cheval:
     - Signaux cheval : SIGMA, IA, ELO, VALUE
     - Jockey : nom + ELO + niveau
     - Données supplémentaires : musique, cote
+    Classe à __slots__ : pas de __dict__ par cheval.
+    Pour un champ complet en colonnes, voir champ.ChampCourse.
     """
 
+    __slots__ = (
+        "numero", "nom", "V", "F", "score_RSE",
+        "SIGMA_OK", "IA_OK", "ELO_OK", "VALUE_OK",
+        "driver_nom", "driver_elo", "driver_niveau",
+        "musique", "cote",
+    )
+
     def __init__(self, numero, nom):
         self.numero = int(numero)
         self.nom = str(nom)
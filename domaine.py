@@ -12,3 +12,41 @@ DOMAINES = {
         "cote_min": 10.0
     }
 }
+
+
+def _nombre(valeur):
+    """Valeur CSV -> float (virgule décimale acceptée), None si vide ou illisible"""
+    if valeur is None:
+        return None
+    valeur = str(valeur).strip().replace(",", ".")
+    if not valeur:
+        return None
+    try:
+        return float(valeur)
+    except ValueError:
+        return None
+
+
+def _drapeau(valeur):
+    """Colonne 0/1 : absente ou vide = validée"""
+    n = _nombre(valeur)
+    return True if n is None else n != 0
+
+
+def appliquer_domaine(cheval, row, domaine="SG"):
+    """
+    Domaine d'un cheval depuis une ligne CSV (dict) :
+    - V : distance et piste validées (distance_ok / piste_ok)
+    - F : repos <= repos_max et cote >= cote_min du domaine
+    Une donnée manquante n'exclut pas le cheval.
+    """
+    regles = DOMAINES[domaine]
+    repos = _nombre(row.get("repos"))
+    cote = _nombre(row.get("cote"))
+
+    V = _drapeau(row.get("distance_ok")) and _drapeau(row.get("piste_ok"))
+    F = (repos is None or repos <= regles["repos_max"]) and (cote is None or cote >= regles["cote_min"])
+
+    cheval.set_domaine(V, F)
+    cheval.set_cote(cote)
+    return cheval
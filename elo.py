@@ -0,0 +1,281 @@
+# elo.py
+# ==================================================
+# CLASSEMENT ELO DES CHEVAUX ET DES JOCKEYS
+# ==================================================
+# python elo.py [backtest_2025] [--reinitialiser]
+#
+# Les courses consolidées sont rejouées dans l'ordre chronologique.
+# Chaque course compte comme un ensemble de duels : un partant gagne
+# contre tous ceux qu'il devance (non classés = ex aequo derniers).
+#   variation = K x (score réel - score attendu) / (partants - 1)
+# Les jockeys / drivers sont notés de la même façon, sur leurs montes.
+#
+# Pas de look-ahead : elo_cheval / elo_jockey d'une ligne Partants
+# sont les notes au matin du jour de la course (les courses d'une même
+# journée ne se voient pas entre elles). Jamais couru = vide.
+#
+# État (notes + dernière date) sauvegardé dans elo.json : une nouvelle
+# passe ne rejoue que les jours postérieurs.
+
+import argparse
+import json
+import os
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stockage import est_dataset_parquet, lire_dataset, lire_rapports, lire_table, ecrire_table, exporter_excel
+
+VERSION_ETAT = 1
+NOM_ETAT = "elo.json"
+
+ELO_INITIAL = 1500.0
+ECHELLE = 400.0
+K_CHEVAL = 32.0
+K_JOCKEY = 16.0
+
+COLONNES_ELO = ["date", "reunion", "course", "nom", "jockey", "ordre_arrivee"]
+
+
+def cle_nom(nom):
+    """
+    Clé d'un cheval ou d'un jockey : majuscules sans accents ni
+    espaces superflus ("Hermès  du Bocage" -> "HERMES DU BOCAGE")
+    """
+    if nom is None or (isinstance(nom, float) and np.isnan(nom)):
+        return None
+    nom = unicodedata.normalize("NFKD", str(nom))
+    nom = "".join(c for c in nom if not unicodedata.combining(c))
+    nom = " ".join(nom.upper().split())
+    return nom or None
+
+
+# ==================================================
+# ÉTAT
+# ==================================================
+class EtatElo:
+    """Notes courantes (clé -> [note, nombre de courses]) et dernière date intégrée"""
+
+    def __init__(self, chevaux=None, jockeys=None, derniere_date=None, nb_courses=0):
+        self.chevaux = chevaux or {}
+        self.jockeys = jockeys or {}
+        self.derniere_date = derniere_date
+        self.nb_courses = nb_courses
+
+    def to_dict(self):
+        return {
+            "version": VERSION_ETAT,
+            "parametres": {"initial": ELO_INITIAL, "echelle": ECHELLE, "k_cheval": K_CHEVAL, "k_jockey": K_JOCKEY},
+            "derniere_date": self.derniere_date,
+            "nb_courses": self.nb_courses,
+            "chevaux": self.chevaux,
+            "jockeys": self.jockeys,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["chevaux"], d["jockeys"], d["derniere_date"], d["nb_courses"])
+
+
+def chemin_etat(source):
+    """Fichier d'état : dans le dossier Parquet, ou à côté du .xlsx"""
+    if est_dataset_parquet(source):
+        return Path(source) / NOM_ETAT
+    return Path(source).with_suffix(".elo.json")
+
+
+def charger_etat(chemin):
+    """État sauvegardé, ou état vide s'il manque ou si les paramètres ont changé"""
+    if not Path(chemin).exists():
+        return EtatElo()
+    with open(chemin, "r", encoding="utf-8") as f:
+        d = json.load(f)
+    if d.get("version") != VERSION_ETAT or d.get("parametres") != EtatElo().to_dict()["parametres"]:
+        return EtatElo()
+    return EtatElo.from_dict(d)
+
+
+def sauvegarder_etat(chemin, etat):
+    """Écriture atomique (fichier temporaire puis remplacement)"""
+    chemin = Path(chemin)
+    tmp = chemin.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(etat.to_dict(), f, ensure_ascii=False)
+    os.replace(tmp, chemin)
+
+
+# ==================================================
+# CALCUL
+# ==================================================
+def variations(notes, places, k):
+    """
+    Variation de note de chaque partant d'une course.
+    places : rang d'arrivée (inf = non classé)
+    """
+    n = len(notes)
+    attendu = 1.0 / (1.0 + 10.0 ** ((notes[None, :] - notes[:, None]) / ECHELLE))
+    reel = (places[:, None] < places[None, :]) + 0.5 * (places[:, None] == places[None, :])
+    np.fill_diagonal(attendu, 0.0)
+    np.fill_diagonal(reel, 0.0)
+    return k * (reel.sum(axis=1) - attendu.sum(axis=1)) / (n - 1)
+
+
+def _noter_course(table, cles, places, k, en_attente):
+    """
+    Cumule dans en_attente (clé -> [variation, courses]) les variations
+    d'une course, calculées sur les notes du matin. Faux si rien n'est noté.
+    """
+    valides = [i for i, c in enumerate(cles) if c is not None]
+    if len(valides) < 2 or not np.isfinite(places[valides]).any():
+        return False  # pas d'adversaire ou pas d'arrivée connue
+    notes = np.array([table[cles[i]][0] if cles[i] in table else ELO_INITIAL for i in valides])
+    for i, d in zip(valides, variations(notes, places[valides], k)):
+        cumul = en_attente.setdefault(cles[i], [0.0, 0])
+        cumul[0] += d
+        cumul[1] += 1
+    return True
+
+
+def _appliquer(table, en_attente):
+    """Fin de journée : les variations cumulées entrent dans les notes"""
+    for cle, (d, nb) in en_attente.items():
+        note = table.setdefault(cle, [ELO_INITIAL, 0])
+        note[0] += d
+        note[1] += nb
+
+
+def noter_partants(df_partants, etat):
+    """
+    Rejoue les courses de df_partants (dates postérieures à l'état) et
+    met l'état à jour. Retourne (elo_cheval, elo_jockey) : notes avant
+    la course, alignées sur les lignes de df_partants (NaN = jamais couru).
+    """
+    n = len(df_partants)
+    elo_cheval = np.full(n, np.nan)
+    elo_jockey = np.full(n, np.nan)
+    if n == 0:
+        return elo_cheval, elo_jockey
+
+    dates = df_partants["date"].astype(str).to_numpy()
+    if etat.derniere_date is not None and dates.min() <= etat.derniere_date:
+        raise ValueError(f"Dates déjà intégrées à l'état ELO (jusqu'au {etat.derniere_date})")
+
+    course = (df_partants["date"].astype(str) + "_" + df_partants["reunion"].astype(str)
+              + "_" + df_partants["course"].astype(str)).to_numpy()
+    ordre = np.lexsort((course, dates))
+    chevaux = [cle_nom(x) for x in df_partants["nom"].to_numpy()[ordre]]
+    jockeys = [cle_nom(x) for x in df_partants["jockey"].to_numpy()[ordre]]
+    places = pd.to_numeric(df_partants["ordre_arrivee"], errors="coerce").to_numpy(dtype=float)[ordre]
+    places = np.where(places > 0, places, np.inf)
+    dates, course = dates[ordre], course[ordre]
+
+    # Bornes des courses dans l'ordre (date, course)
+    debuts = np.flatnonzero(np.r_[True, course[1:] != course[:-1]])
+    fins = np.r_[debuts[1:], n]
+
+    jour = None
+    attente_c, attente_j = {}, {}
+    for a, b in zip(debuts, fins):
+        if dates[a] != jour:
+            _appliquer(etat.chevaux, attente_c)
+            _appliquer(etat.jockeys, attente_j)
+            attente_c, attente_j = {}, {}
+            jour = dates[a]
+
+        for i in range(a, b):
+            note = etat.chevaux.get(chevaux[i])
+            if note is not None:
+                elo_cheval[ordre[i]] = note[0]
+            note = etat.jockeys.get(jockeys[i])
+            if note is not None:
+                elo_jockey[ordre[i]] = note[0]
+
+        if _noter_course(etat.chevaux, chevaux[a:b], places[a:b], K_CHEVAL, attente_c):
+            etat.nb_courses += 1
+        _noter_course(etat.jockeys, jockeys[a:b], places[a:b], K_JOCKEY, attente_j)
+
+    _appliquer(etat.chevaux, attente_c)
+    _appliquer(etat.jockeys, attente_j)
+    etat.derniere_date = str(dates[-1])
+    return elo_cheval, elo_jockey
+
+
+def appliquer_elo(df_partants, etat):
+    """Copie de df_partants avec elo_cheval / elo_jockey avant course"""
+    df = df_partants.copy()
+    df["elo_cheval"], df["elo_jockey"] = noter_partants(df, etat)
+    return df
+
+
+# ==================================================
+# DATASET CONSOLIDÉ
+# ==================================================
+def mettre_a_jour_elo(source, depuis=None, reinitialiser=False):
+    """
+    Renseigne elo_cheval / elo_jockey dans les Partants d'un dataset.
+    Par défaut : seuls les jours postérieurs à l'état sauvegardé sont
+    notés (lecture / réécriture de leurs seules partitions).
+    depuis : des courses ont changé à partir de cette date => tout est
+    rejoué depuis le début, seules les partitions >= depuis sont réécrites.
+    Un .xlsx est toujours entièrement recalculé puis réécrit.
+    Retourne l'état.
+    """
+    chemin = chemin_etat(source)
+    etat = EtatElo() if reinitialiser else charger_etat(chemin)
+    parquet = est_dataset_parquet(source)
+
+    if not parquet:
+        df_partants, df_courses = lire_dataset(source)
+        df_rapports = lire_rapports(source)
+        etat = EtatElo()
+        df_partants = appliquer_elo(df_partants, etat)
+        exporter_excel(df_partants, df_courses, source, df_rapports if len(df_rapports) else None)
+        sauvegarder_etat(chemin, etat)
+        return etat
+
+    if depuis is not None and etat.derniere_date is not None and str(depuis) > etat.derniere_date:
+        depuis = None  # les changements sont tous après l'état : incrémental
+    rejouer = depuis is not None or etat.derniere_date is None
+
+    if rejouer:
+        # Notes du matin de `depuis` : rejeu des seules colonnes utiles
+        etat = EtatElo()
+        if depuis is not None:
+            historique = lire_table(source, "partants", colonnes=COLONNES_ELO)
+            historique = historique[historique["date"].astype(str) < str(depuis)]
+            noter_partants(historique, etat)
+        df = lire_table(source, "partants", date_min=depuis)
+    else:
+        df = lire_table(source, "partants", date_min=etat.derniere_date)
+        df = df[df["date"].astype(str) > etat.derniere_date]
+
+    if len(df):
+        df = appliquer_elo(df, etat)
+        ecrire_table(df, source, "partants")
+    sauvegarder_etat(chemin, etat)
+    return etat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notes ELO chevaux / jockeys du dataset consolidé")
+    parser.add_argument("source", nargs="?", default="backtest_2025", help="Dataset Parquet ou .xlsx")
+    parser.add_argument("--reinitialiser", action="store_true", help="Rejouer tout l'historique")
+    args = parser.parse_args()
+
+    print("🏆 CLASSEMENT ELO")
+    print("=" * 70)
+    etat = mettre_a_jour_elo(args.source, reinitialiser=args.reinitialiser)
+    print(f"✅ {etat.nb_courses} courses notées jusqu'au {etat.derniere_date}")
+    print(f"🐎 {len(etat.chevaux)} chevaux | 🏇 {len(etat.jockeys)} jockeys")
+
+    meilleurs = sorted(etat.chevaux.items(), key=lambda x: x[1][0], reverse=True)[:10]
+    if meilleurs:
+        print("\n🥇 Meilleurs chevaux :")
+        for nom, (note, nb) in meilleurs:
+            print(f"   {nom:30s} {note:7.1f} ({nb} courses)")
+
+
+if __name__ == "__main__":
+    main()
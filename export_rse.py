@@ -1,4 +1,6 @@
-import pandas as pd
-
 def exporter_excel(df, fichier="resultat_rse.xlsx"):
+    import pandas as pd  # import paresseux : rse_checker démarre sans pandas
+
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df)
     df.to_excel(fichier, index=False)
@@ -0,0 +1,260 @@
+# historique.py
+# ==================================================
+# INDEX DE L'HISTORIQUE PAR CHEVAL (REPOS / ACTIF / MUSIQUE)
+# ==================================================
+# Les JSON PMU d'une course ne donnent ni repos, ni activité, ni
+# musique : on les reconstruit depuis les courses consolidées.
+# Index = pour chaque cheval (clé de nom normalisée, voir elo.cle_nom)
+# le tableau trié par date de ses courses. Pour un partant, les courses
+# strictement antérieures au jour de la course sont trouvées par
+# recherche dichotomique (O(log n)), jamais par relecture du dataset :
+#   - repos : jours depuis la dernière course (vide si débutant)
+#   - actif : 1 si la dernière course date de ACTIF_JOURS jours au plus
+#   - musique : NB_MUSIQUE dernières places, la plus récente d'abord
+#     ("1a 0a 3m", 0 = non placé ou au-delà de la 9e place)
+
+import argparse
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from asof import joindre_asof, numero_jour
+from elo import cle_nom
+from stockage import est_dataset_parquet, lire_dataset, lire_rapports, lire_table, ecrire_table, exporter_excel
+
+ACTIF_JOURS = 90
+NB_MUSIQUE = 10
+
+COLONNES_HISTORIQUE = ["date", "reunion", "course", "nom", "discipline", "ordre_arrivee"]
+
+# Discipline PMU -> lettre de musique (préfixe, en minuscules)
+LETTRES_DISCIPLINE = {
+    "trot": "a", "attele": "a", "monte": "m", "plat": "p",
+    "obstacle": "h", "haie": "h", "steeple": "s", "cross": "c",
+}
+
+
+def lettre_discipline(discipline):
+    d = str(discipline or "").lower().replace("é", "e")
+    return next((l for prefixe, l in LETTRES_DISCIPLINE.items() if d.startswith(prefixe)), "")
+
+
+def code_place(place):
+    """Place d'arrivée -> caractère de musique ('0' = non placé, absent ou > 9)"""
+    if place is None or np.isnan(place) or place < 1 or place > 9:
+        return "0"
+    return str(int(place))
+
+
+class IndexHistorique:
+    """
+    Courses de chaque cheval, triées par date.
+    courses[cle] = (jours, jetons) : numéros de jour (liste triée) et
+    jeton de musique de chaque course ("1a", "0m"...)
+    """
+
+    def __init__(self, df_partants=None):
+        self.courses = {}
+        if df_partants is None or len(df_partants) == 0:
+            return
+
+        cles = _cles(df_partants["nom"])
+        jours = numero_jour(df_partants["date"])
+        places = pd.to_numeric(df_partants["ordre_arrivee"], errors="coerce").to_numpy(dtype=float)
+        lettres = df_partants["discipline"].map(lettre_discipline).to_numpy()
+
+        # Deux courses le même jour : ordre fixe (réunion, course), quel que
+        # soit l'ordre des lignes
+        courses, _ = pd.factorize(df_partants["reunion"].astype(str) + "_" + df_partants["course"].astype(str),
+                                  sort=True)
+        codes, _ = pd.factorize(cles)  # -1 = nom absent
+        ordre = np.lexsort((courses, jours, codes))
+        ordre = ordre[codes[ordre] >= 0]
+        codes = codes[ordre]
+        jetons = [code_place(p) + l for p, l in zip(places[ordre], lettres[ordre])]
+        jours = jours[ordre].tolist()
+
+        debuts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(ordre) else []
+        fins = np.r_[debuts[1:], len(ordre)] if len(ordre) else []
+        for a, b in zip(debuts, fins):
+            self.courses[cles[ordre[a]]] = (jours[a:b], jetons[a:b])
+
+    def __len__(self):
+        return len(self.courses)
+
+    def ajouter(self, df_partants):
+        """
+        Ajoute des courses toutes postérieures à celles de l'index (flux
+        par lots de dates croissantes, un lot ne coupant jamais un jour).
+        Lève ValueError si un cheval a déjà couru à cette date ou après.
+        Des courses déjà indexées, seules les NB_MUSIQUE dernières sont
+        gardées (dernier jour couru + musique) : la mémoire dépend du
+        nombre de chevaux, pas de la saison. L'index ne répond ensuite
+        qu'aux jours postérieurs aux courses précédemment indexées.
+        """
+        for cle, (jours, jetons) in IndexHistorique(df_partants).courses.items():
+            historique = self.courses.get(cle)
+            if historique is None:
+                self.courses[cle] = (jours, jetons)
+                continue
+            if jours[0] <= historique[0][-1]:
+                raise ValueError(f"Historique : courses de {cle} non postérieures à l'index")
+            self.courses[cle] = (historique[0][-NB_MUSIQUE:] + jours, historique[1][-NB_MUSIQUE:] + jetons)
+
+    def avant(self, cle, jour):
+        """(jours, jetons) des courses du cheval strictement avant le jour donné"""
+        historique = self.courses.get(cle)
+        if historique is None:
+            return (), ()
+        jours, jetons = historique
+        k = bisect_left(jours, jour)
+        return jours[:k], jetons[:k]
+
+    def caracteristiques(self, df_partants):
+        """
+        (repos, actif, musique) de chaque ligne de df_partants,
+        calculés sur les seules courses antérieures au jour de la course
+        """
+        n = len(df_partants)
+        repos = np.full(n, np.nan)
+        actif = np.zeros(n)
+        musique = [""] * n
+        if n == 0:
+            return repos, actif, musique
+
+        cles = _cles(df_partants["nom"])
+        jours = numero_jour(df_partants["date"]).tolist()
+        for i, (cle, jour) in enumerate(zip(cles, jours)):
+            historique = self.courses.get(cle)
+            if historique is None:
+                continue
+            j, jetons = historique
+            k = bisect_left(j, jour)
+            if k == 0:
+                continue
+            repos[i] = jour - j[k - 1]
+            actif[i] = float(repos[i] <= ACTIF_JOURS)
+            musique[i] = " ".join(reversed(jetons[max(0, k - NB_MUSIQUE):k]))
+        return repos, actif, musique
+
+    def table(self):
+        """
+        Table de caractéristiques pour asof.joindre_asof : une ligne par
+        cheval et jour couru, état connu le soir de ce jour
+        (cle, date, derniere_course = numéro du jour, musique)
+        """
+        lignes = []
+        for cle, (jours, jetons) in self.courses.items():
+            for k, jour in enumerate(jours):
+                if k + 1 < len(jours) and jours[k + 1] == jour:
+                    continue  # autre course le même jour : état du soir seulement
+                lignes.append((cle, jour, " ".join(reversed(jetons[max(0, k + 1 - NB_MUSIQUE):k + 1]))))
+        table = pd.DataFrame(lignes, columns=["cle", "derniere_course", "musique"])
+        table.insert(1, "date", table["derniere_course"].to_numpy().astype("datetime64[D]").astype(str))
+        return table
+
+
+def caracteristiques_asof(cibles, table):
+    """
+    repos / actif / musique de lignes quelconques (nom + date de course),
+    par jointure as-of sur IndexHistorique.table() : seules les courses
+    strictement antérieures au jour de chaque ligne comptent.
+    Retourne un DataFrame aligné sur cibles.
+    """
+    gauche = pd.DataFrame({"cle": _cles(cibles["nom"]), "date": cibles["date"].to_numpy()}, index=cibles.index)
+    connu = joindre_asof(gauche, table, "cle", ["derniere_course", "musique"])
+    repos = numero_jour(gauche["date"]) - connu["derniere_course"].to_numpy(dtype=float)
+    return pd.DataFrame({
+        "repos": repos,
+        "actif": np.where(np.isnan(repos), 0.0, (repos <= ACTIF_JOURS).astype(float)),
+        "musique": connu["musique"].fillna("").to_numpy(),
+    }, index=cibles.index)
+
+
+def completer_classeur(df, schema, date, table):
+    """
+    Classeur turfbzh normalisé (colonnes résolues par schema) : repos et
+    actif manquants complétés par l'historique consolidé à la veille de
+    date. Les valeurs présentes dans le classeur sont gardées.
+    """
+    cibles = pd.DataFrame({"nom": df[schema.nom].astype(str).str.strip(), "date": str(date)}, index=df.index)
+    h = caracteristiques_asof(cibles, table)
+    df = df.copy()
+    for col, valeurs in ((schema.repos or "Repos", h["repos"]), (schema.actif or "Actif", h["actif"])):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(valeurs)
+        else:
+            df[col] = valeurs
+    return df
+
+
+def charger_table(source, date_max=None):
+    """Table de caractéristiques des chevaux d'un dataset consolidé (courses <= date_max)"""
+    if est_dataset_parquet(source):
+        df = lire_table(source, "partants", date_max=date_max, colonnes=COLONNES_HISTORIQUE)
+    else:
+        df = lire_dataset(source, date_max=date_max)[0]
+    return IndexHistorique(df).table()
+
+
+def _cles(noms):
+    """Clés normalisées d'une colonne de noms (calculées une fois par nom distinct)"""
+    uniques = {nom: cle_nom(nom) for nom in pd.unique(noms)}
+    return np.array([uniques[nom] for nom in noms], dtype=object)
+
+
+def appliquer_historique(df_partants, index=None):
+    """
+    Copie de df_partants avec repos / actif / musique reconstruits.
+    index : historique à utiliser (par défaut, celui de df_partants)
+    """
+    if index is None:
+        index = IndexHistorique(df_partants)
+    df = df_partants.copy()
+    repos, actif, musique = index.caracteristiques(df)
+    df["repos"], df["actif"], df["musique"] = repos, actif, musique
+    return df
+
+
+# ==================================================
+# DATASET CONSOLIDÉ
+# ==================================================
+def mettre_a_jour_historique(source, depuis=None):
+    """
+    Reconstruit repos / actif / musique dans les Partants d'un dataset.
+    L'index est construit sur tout l'historique (6 colonnes lues), seules
+    les partitions à partir de `depuis` sont relues et réécrites.
+    Un .xlsx est entièrement recalculé puis réécrit.
+    Retourne l'index.
+    """
+    if not est_dataset_parquet(source):
+        df_partants, df_courses = lire_dataset(source)
+        df_rapports = lire_rapports(source)
+        index = IndexHistorique(df_partants)
+        df_partants = appliquer_historique(df_partants, index)
+        exporter_excel(df_partants, df_courses, source, df_rapports if len(df_rapports) else None)
+        return index
+
+    index = IndexHistorique(lire_table(source, "partants", colonnes=COLONNES_HISTORIQUE))
+    df = lire_table(source, "partants", date_min=depuis)
+    if len(df):
+        ecrire_table(appliquer_historique(df, index), source, "partants")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repos / actif / musique reconstruits depuis l'historique")
+    parser.add_argument("source", nargs="?", default="backtest_2025", help="Dataset Parquet ou .xlsx")
+    parser.add_argument("--depuis", default=None, help="Ne réécrire que les dates >= AAAA-MM-JJ")
+    args = parser.parse_args()
+
+    print("📚 HISTORIQUE DES CHEVAUX")
+    print("=" * 70)
+    index = mettre_a_jour_historique(args.source, args.depuis)
+    nb_courses = sum(len(j) for j, _ in index.courses.values())
+    print(f"✅ {len(index)} chevaux indexés ({nb_courses} courses)")
+
+
+if __name__ == "__main__":
+    main()
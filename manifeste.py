@@ -0,0 +1,161 @@
+# manifeste.py
+# ==================================================
+# MANIFESTE DES COURSES DÉJÀ CONSOLIDÉES
+# ==================================================
+# Pour chaque course (clé 2025-01-10_R4_C6) : taille, mtime et sha256
+# de ses fichiers infos / participants / rapports + la partition
+# (date, hippodrome) où ses lignes sont stockées.
+# Une relance ne reparse que les courses nouvelles ou modifiées.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+VERSION_MANIFESTE = 1
+NOM_MANIFESTE = "manifeste.json"
+SUFFIXES = ("infos", "participants", "rapports")
+
+
+def cle_course(date, reunion, course):
+    """Clé unique d'une course : 2025-01-10_R4_C6"""
+    return f"{date}_{reunion}_C{course}"
+
+
+def fichiers_course(fichier_partants):
+    """
+    Retourne (cle, {suffixe: chemin}) pour un fichier _participants.json
+    ou (None, None) si le nom ne suit pas le format attendu
+    """
+    fichier = Path(fichier_partants)
+    parts = fichier.stem.replace('_participants', '').split('_')
+    if len(parts) < 3:
+        return None, None
+    cle = cle_course(parts[0], parts[1], parts[2].replace('C', ''))
+    return cle, {s: fichier.parent / f"{cle}_{s}.json" for s in SUFFIXES}
+
+
+def hash_fichier(chemin, taille_bloc=1 << 20):
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _stat(chemin):
+    """(taille, mtime_ns) ou None si le fichier n'existe pas"""
+    try:
+        st = os.stat(chemin)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def empreinte(chemins, ancienne=None):
+    """
+    Empreinte {suffixe: {taille, mtime, sha256} | None} des fichiers d'une course.
+    Le sha256 n'est recalculé que si taille ou mtime ont bougé.
+    """
+    ancienne = ancienne or {}
+    resultat = {}
+    for s, chemin in chemins.items():
+        st = _stat(chemin)
+        if st is None:
+            resultat[s] = None
+            continue
+        taille, mtime = st
+        avant = ancienne.get(s)
+        if avant and avant["taille"] == taille and avant["mtime"] == mtime:
+            resultat[s] = avant
+        else:
+            resultat[s] = {"taille": taille, "mtime": mtime, "sha256": hash_fichier(chemin)}
+    return resultat
+
+
+def meme_contenu(a, b):
+    """Compare deux empreintes sur le contenu (sha256), pas sur le mtime"""
+    if a is None or b is None:
+        return False
+    for s in SUFFIXES:
+        fa, fb = a.get(s), b.get(s)
+        if (fa is None) != (fb is None):
+            return False
+        if fa is not None and fa["sha256"] != fb["sha256"]:
+            return False
+    return True
+
+
+class Manifeste:
+    """
+    Manifeste persistant (JSON) du dataset consolidé
+    """
+
+    def __init__(self, dossier):
+        self.chemin = Path(dossier) / NOM_MANIFESTE
+        self.courses = {}
+        if self.chemin.exists():
+            with open(self.chemin, 'r', encoding='utf-8') as f:
+                self.courses = json.load(f).get("courses", {})
+
+    def comparer(self, fichiers_partants):
+        """
+        Compare les fichiers présents au manifeste.
+        Retourne un dict :
+        - nouvelles / modifiees : {cle: (fichier_partants, empreinte)}
+        - supprimees : [cle]
+        - inchangees : nombre de courses ignorées
+        """
+        nouvelles, modifiees = {}, {}
+        presentes = set()
+        inchangees = 0
+
+        for fichier in fichiers_partants:
+            cle, chemins = fichiers_course(fichier)
+            if cle is None:
+                continue
+            presentes.add(cle)
+            entree = self.courses.get(cle)
+            emp = empreinte(chemins, entree["fichiers"] if entree else None)
+
+            if entree is None:
+                nouvelles[cle] = (fichier, emp)
+            elif meme_contenu(entree["fichiers"], emp):
+                entree["fichiers"] = emp  # mtime rafraîchi, pas de reparse
+                inchangees += 1
+            else:
+                modifiees[cle] = (fichier, emp)
+
+        supprimees = sorted(set(self.courses) - presentes)
+        return {
+            "nouvelles": nouvelles,
+            "modifiees": modifiees,
+            "supprimees": supprimees,
+            "inchangees": inchangees,
+        }
+
+    def partition(self, cle):
+        """(date, hippodrome) où sont stockées les lignes de la course, ou None"""
+        entree = self.courses.get(cle)
+        if not entree or entree.get("hippodrome") is None:
+            return None
+        return entree["date"], entree["hippodrome"]
+
+    def enregistrer(self, cle, emp, date=None, hippodrome=None):
+        self.courses[cle] = {"fichiers": emp, "date": date, "hippodrome": hippodrome}
+
+    def retirer(self, cle):
+        self.courses.pop(cle, None)
+
+    def effacer(self):
+        self.courses = {}
+        if self.chemin.exists():
+            self.chemin.unlink()
+
+    def sauvegarder(self):
+        """Écriture atomique (fichier temporaire puis remplacement)"""
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.chemin.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": VERSION_MANIFESTE, "courses": self.courses}, f, ensure_ascii=False)
+        os.replace(tmp, self.chemin)
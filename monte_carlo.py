@@ -0,0 +1,108 @@
+# monte_carlo.py
+# ==================================================
+# MONTE CARLO DU DÉ PONDÉRÉ (tirer_face)
+# ==================================================
+# Au lieu de 5 tirages et d'un mode bruité : des milliers de faces
+# par course en un seul appel numpy, avec les poids de tirer_face.
+# Chaque course a son propre flux aléatoire, initialisé par son
+# stable_seed : le résultat d'une course ne dépend ni de l'ordre
+# des courses ni du découpage entre process.
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from test_rse_turfbzh import poids_faces, face_to_pari
+
+FACES = np.arange(1, 7)
+NB_TIRAGES = 10_000
+
+
+def tirer_faces(conf, disc, n, seed):
+    """n faces tirées en un appel (flux numpy initialisé par seed)"""
+    rng = np.random.default_rng(seed)
+    return rng.choice(FACES, size=n, p=poids_faces(conf, disc))
+
+
+def comptes_course(conf, disc, nb_disponibles, seed, n=NB_TIRAGES):
+    """
+    Comptes par face (1 à 6) après limitation au nombre de chevaux
+    disponibles (comme main), et comptes par type de pari
+    """
+    faces = np.minimum(tirer_faces(conf, disc, n, seed), nb_disponibles)
+    comptes = np.bincount(faces, minlength=7)[1:]
+    paris = Counter()
+    for face, k in zip(FACES, comptes):
+        if k:
+            paris[face_to_pari(int(face), conf, nb_disponibles)] += int(k)
+    return comptes, paris
+
+
+def distribution_course(conf, disc, nb_disponibles, seed, n=NB_TIRAGES):
+    """
+    Distribution complète pour une course :
+    - faces : {face: probabilité}
+    - paris : {type de pari: probabilité}
+    - face_modale : face la plus fréquente
+    """
+    comptes, paris = comptes_course(conf, disc, nb_disponibles, seed, n)
+    return {
+        "n": n,
+        "faces": {int(f): k / n for f, k in zip(FACES, comptes)},
+        "paris": {p: k / n for p, k in paris.most_common()},
+        "face_modale": int(FACES[np.argmax(comptes)]),
+    }
+
+
+def _comptes_lot(lot):
+    """Comptes d'un lot de courses (exécuté dans un process du pool)"""
+    n, courses = lot
+    faces, paris = [], []
+    for conf, disc, nb, seed in courses:
+        c, p = comptes_course(conf, disc, nb, seed, n)
+        faces.append(c)
+        paris.append(p)
+    return faces, paris
+
+
+def distribution_backtest(df_resultats, n=NB_TIRAGES, workers=1, taille_lot=500):
+    """
+    Distribution faces / paris sur toutes les courses d'un backtest.
+    df_resultats : colonnes confiance, discipline, nb_schema, seed
+    (voir backtest.backtest_vectorise)
+    Retourne (df_par_course, resume) :
+    - df_par_course : une ligne par course, P(face=1..6) et face modale
+    - resume : distribution globale des faces et des paris
+    """
+    courses = list(zip(
+        df_resultats["confiance"].astype(float),
+        df_resultats["discipline"],
+        df_resultats["nb_schema"].astype(int),
+        df_resultats["seed"].astype(int),
+    ))
+    lots = [(n, courses[i:i + taille_lot]) for i in range(0, len(courses), taille_lot)]
+
+    if workers is None or workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultats = list(pool.map(_comptes_lot, lots))
+    else:
+        resultats = [_comptes_lot(lot) for lot in lots]
+
+    faces = [c for f, _ in resultats for c in f]
+    paris = [p for _, ps in resultats for p in ps]
+
+    comptes = np.array(faces, dtype=np.int64).reshape(-1, 6)
+    df_par_course = pd.DataFrame(comptes / n, columns=[f"p_face_{f}" for f in FACES], index=df_resultats.index)
+    df_par_course["face_modale"] = FACES[np.argmax(comptes, axis=1)] if len(comptes) else []
+
+    total_paris = sum(paris, Counter())
+    total = max(int(comptes.sum()), 1)
+    resume = {
+        "courses": len(courses),
+        "tirages_par_course": n,
+        "faces": {int(f): int(k) / total for f, k in zip(FACES, comptes.sum(axis=0))},
+        "paris": {p: k / total for p, k in total_paris.most_common()},
+    }
+    return df_par_course, resume
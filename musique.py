@@ -0,0 +1,129 @@
+# musique.py
+# ==================================================
+# PARSEUR COMPLET DE LA MUSIQUE (AVEC CACHE LRU)
+# ==================================================
+# Exemple : "1a 10a Da (24) 3m 0a Ta"
+#   - place : nombre (0 = non placé) ou code incident
+#     D = disqualifié, A = arrêté, T = tombé, R = rétrogradé
+#   - lettre de discipline : a attelé, m monté, p plat, h haies,
+#     s steeple, c cross
+#   - (24) / (2024) : changement d'année, les courses suivantes
+#     sont de l'année indiquée
+# Une musique est souvent vue dans plusieurs courses : le résultat
+# du parsing est mis en cache (taille réglable, compteurs hits/misses).
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+TAILLE_CACHE = 4096
+
+CODES_INCIDENT = "DATR"
+DISQUALIFIE = "D"
+
+DISCIPLINES = "amphsc"
+
+_JETON = re.compile(
+    r"\((\d{2,4})\)"                                              # (24) : année
+    r"|(\d+)([" + DISCIPLINES + r"])?"                            # 10a : place + discipline
+    r"|([" + CODES_INCIDENT + r"])([" + DISCIPLINES + r"])",       # Da : incident + discipline
+    re.IGNORECASE,
+)
+
+
+class Musique(NamedTuple):
+    """
+    Musique parsée (courses de la plus récente à la plus ancienne) :
+    - places : place de chaque course (0 = non placé ou incident)
+    - codes : code incident de chaque course ('' si place numérique)
+    - disciplines : lettre de discipline ('' si absente)
+    - ruptures : (indice de course, année) pour chaque marqueur (24)
+    - nb_non_places : courses à 0 ou terminées sur incident
+    - nb_disqualifies : courses avec code D
+    """
+    places: tuple
+    codes: tuple
+    disciplines: tuple
+    ruptures: tuple
+    nb_non_places: int
+    nb_disqualifies: int
+
+    @property
+    def nb_courses(self):
+        return len(self.places)
+
+
+MUSIQUE_VIDE = Musique((), (), (), (), 0, 0)
+
+
+def _parser(texte):
+    places, codes, disciplines, ruptures = [], [], [], []
+
+    for m in _JETON.finditer(texte):
+        annee, chiffres, disc_place, code, disc_code = m.groups()
+        if annee is not None:
+            a = int(annee)
+            ruptures.append((len(places), a if a >= 100 else 2000 + a))
+        elif chiffres is not None:
+            places.append(int(chiffres))
+            codes.append("")
+            disciplines.append((disc_place or "").lower())
+        else:
+            places.append(0)
+            codes.append(code.upper())
+            disciplines.append(disc_code.lower())
+
+    if not places and not ruptures:
+        return MUSIQUE_VIDE
+
+    return Musique(
+        places=tuple(places),
+        codes=tuple(codes),
+        disciplines=tuple(disciplines),
+        ruptures=tuple(ruptures),
+        nb_non_places=sum(1 for p in places if p == 0),
+        nb_disqualifies=codes.count(DISQUALIFIE),
+    )
+
+
+_parser_cache = lru_cache(maxsize=TAILLE_CACHE)(_parser)
+
+
+def configurer_cache(taille):
+    """Change la taille du cache (None = illimité) ; le vide au passage"""
+    global _parser_cache
+    _parser_cache = lru_cache(maxsize=taille)(_parser)
+
+
+def statistiques_cache():
+    """Compteurs du cache : hits, misses, taille max, taille courante"""
+    info = _parser_cache.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "taille_max": info.maxsize,
+        "taille": info.currsize,
+    }
+
+
+def parser_musique(val):
+    """
+    Parse une musique (str, None ou NaN) en Musique, via le cache LRU
+    """
+    if val is None or (isinstance(val, float) and val != val):
+        return MUSIQUE_VIDE
+    texte = str(val).strip()
+    if texte == "" or texte.lower() == "nan":
+        return MUSIQUE_VIDE
+    return _parser_cache(texte)
+
+
+def score_musique(musique, nb=3):
+    """
+    Score des nb dernières courses : 1-3 = +2, 4-6 = +1,
+    7+ / non placé / incident = 0 (max 6 pour nb=3)
+    """
+    return sum(
+        2 if 1 <= p <= 3 else 1 if 4 <= p <= 6 else 0
+        for p in musique.places[:nb]
+    )
@@ -1,18 +1,24 @@
 # rse_checker.py
+# python rse_checker.py [course.csv] [--domaine SG|COUPLE|CHAOS] [--excel resultat_rse.xlsx]
+#
+# Chemin léger : csv + Cheval + domaine.py + chaos.py, sans pandas.
+# pandas n'est importé que pour l'export Excel (--excel).
 
+import argparse
 import csv
 from cheval import Cheval
-from domaine import appliquer_domaine
+from chaos import chaos_total
+from domaine import DOMAINES, appliquer_domaine
 
 
-def charger_course(fichier):
+def charger_course(fichier, domaine="SG"):
     chevaux = []
 
     with open(fichier, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             cheval = Cheval(row["numero"], row["nom"])
-            cheval = appliquer_domaine(cheval, row)
+            cheval = appliquer_domaine(cheval, row, domaine)
             chevaux.append(cheval)
 
     return chevaux
@@ -20,7 +26,7 @@ def charger_course(fichier):
 
 def existe_1RSE(chevaux):
     schema = [c for c in chevaux if c.V and c.F]
-    return len(schema) >= 2, schema
+    return not chaos_total(schema), schema
 
 
 def afficher_resultat(chevaux, rse, schema):
@@ -39,7 +45,22 @@ def afficher_resultat(chevaux, rse, schema):
             print(f" - {c.numero} {c.nom} ({int(c.V)},{int(c.F)})")
 
 
-if __name__ == "__main__":
-    chevaux = charger_course("course.csv")
+def main():
+    parser = argparse.ArgumentParser(description="Domaine hippique et 1RSE d'une course CSV")
+    parser.add_argument("fichier", nargs="?", default="course.csv")
+    parser.add_argument("--domaine", choices=list(DOMAINES), default="SG")
+    parser.add_argument("--excel", default=None, help="Export Excel des chevaux (importe pandas)")
+    args = parser.parse_args()
+
+    chevaux = charger_course(args.fichier, args.domaine)
     rse, schema = existe_1RSE(chevaux)
     afficher_resultat(chevaux, rse, schema)
+
+    if args.excel:
+        from export_rse import exporter_excel
+        exporter_excel([c.to_dict() for c in chevaux], args.excel)
+        print(f"\n💾 Export : {args.excel}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+# service_rse.py
+# ==================================================
+# SERVICE HTTP LOCAL D'ANALYSE 1RSE (ASYNCIO)
+# ==================================================
+# python service_rse.py [--port 8765] [--workers 2]
+#
+# Écoute uniquement sur la boucle locale (127.0.0.1 / localhost).
+# Le calcul (lecture Excel, scoring, verdict) part dans un pool de
+# process préchauffés : la boucle asyncio ne fait que l'I/O, plusieurs
+# requêtes simultanées ne se bloquent pas entre elles.
+#
+#   GET  /sante
+#   POST /analyse/classeur?fichier=15012026-R3C3-vincennes-trot-turfbzh.xlsx
+#        [&hippodrome=vincennes&discipline=trot]
+#        corps = le classeur .xlsx brut (curl --data-binary @classeur.xlsx)
+#        hippodrome / discipline absents : déduits du nom (batch_turfbzh)
+#   POST /analyse/partants
+#        {"hippodrome": "vincennes", "discipline": "trot", "course": "R3C3",
+#         "partants": [{"numero": 1, "nom": "...", "repos": 14, "actif": 1,
+#                       "cote": 5.2, "musique": "1a 3a", ...}, ...]}
+#
+# Réponse JSON : schéma, confiance, distribution du dé, tirages, face,
+# ticket, pari et recommandation (mêmes fonctions que test_rse_turfbzh).
+
+import argparse
+import asyncio
+import io
+import ipaddress
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+HOTE = "127.0.0.1"
+PORT = 8765
+TAILLE_MAX_MO = 20
+
+# Clé JSON d'un partant -> colonne du classeur normalisé
+# (noms reconnus par SchemaTurfbzh)
+COLONNES_PARTANTS = {
+    "numero": "N°",
+    "nom": "CHEVAL",
+    "jockey": "JOCKEY",
+    "actif": "Actif",
+    "repos": "Repos",
+    "cote": "COTE",
+    "elo_cheval": "RATING ELO | CHEVAL",
+    "elo_jockey": "RATING ELO | JOCKEY",
+    "sigma": "SIGMA",
+    "prediction_ia": "PREDICTION IA | Gagnant",
+    "musique": "MUSIQUE",
+}
+
+
+class ErreurRequete(Exception):
+    """Requête invalide : renvoyée au client avec son statut HTTP"""
+
+    def __init__(self, message, statut=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.statut = statut
+
+
+# ==================================================
+# CALCUL (PROCESS DU POOL)
+# ==================================================
+def _prechauffer():
+    """
+    Initialiseur du pool : imports (y compris paresseux) et schémas de
+    colonnes prêts une fois par process, via un classeur synthétique
+    """
+    from surveillance_turfbzh import prechauffer
+    prechauffer()
+
+
+def _rien():
+    """Tâche vide : force le démarrage (donc le préchauffage) d'un process"""
+    return os.getpid()
+
+
+def creer_pool(workers=None):
+    """
+    Pool de process démarré et préchauffé AVANT la première connexion :
+    sans cela, le premier client paie les imports et, en "fork", le
+    process créé pendant sa requête hérite de sa socket (pas d'EOF après
+    fermeture). forkserver (ou spawn) : aucune socket héritée.
+    """
+    workers = workers or os.cpu_count() or 1
+    methode = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(methode),
+                               initializer=_prechauffer)
+    # Une tâche par process, soumises avant d'en attendre une seule
+    for tache in [pool.submit(_rien) for _ in range(workers)]:
+        tache.result()
+    return pool
+
+
+def _reponse(resultat):
+    """Ligne d'analyser_classeur + distribution du dé de la confiance"""
+    from test_rse_turfbzh import poids_faces
+
+    des = None
+    if resultat["verdict"] == "JOUER":
+        poids = poids_faces(resultat["confiance"], resultat["discipline"])
+        des = {str(face): round(p, 6) for face, p in enumerate(poids, start=1)}
+    return {**resultat, "des": des}
+
+
+def analyser_octets(octets, fichier, hippo, disc):
+    """Analyse un classeur .xlsx reçu en mémoire"""
+    import pandas as pd
+    from test_rse_turfbzh import analyser_classeur, normalize_columns
+
+    try:
+        df = normalize_columns(pd.read_excel(io.BytesIO(octets), header=[0, 1]))
+    except Exception as e:
+        raise ValueError(f"Classeur illisible : {type(e).__name__}: {e}")
+    return _reponse(analyser_classeur(fichier, hippo, disc, df=df))
+
+
+def classeur_depuis_partants(partants):
+    """DataFrame normalisé (comme lire_classeur) d'une liste de partants JSON"""
+    import pandas as pd
+
+    if not isinstance(partants, list) or not partants:
+        raise ValueError("'partants' doit être une liste non vide")
+    if not all(isinstance(p, dict) for p in partants):
+        raise ValueError("Chaque partant doit être un objet JSON")
+    inconnues = {k for p in partants for k in p} - set(COLONNES_PARTANTS)
+    if inconnues:
+        raise ValueError(f"Champs inconnus : {', '.join(sorted(inconnues))}")
+
+    lignes = [{COLONNES_PARTANTS[k]: v for k, v in p.items()} for p in partants]
+    colonnes = [c for k, c in COLONNES_PARTANTS.items() if any(k in p for p in partants)]
+    return pd.DataFrame(lignes, columns=colonnes)
+
+
+def analyser_partants(partants, course, hippo, disc):
+    """Analyse une course décrite en JSON (liste de partants)"""
+    from test_rse_turfbzh import analyser_classeur
+
+    df = classeur_depuis_partants(partants)
+    return _reponse(analyser_classeur(course, hippo, disc, df=df))
+
+
+# ==================================================
+# ROUTES
+# ==================================================
+class ServiceRSE:
+    """Routes HTTP ; les analyses passent par le pool de process"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def _calculer(self, fonction, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.pool, fonction, *args)
+        except ValueError as e:
+            raise ErreurRequete(str(e))
+
+    async def classeur(self, params, corps):
+        fichier = params.get("fichier", "classeur-turfbzh.xlsx")
+        hippo, disc = params.get("hippodrome"), params.get("discipline")
+        if hippo is None or disc is None:
+            from batch_turfbzh import deduire_course
+            h, d = deduire_course(fichier)
+            hippo, disc = hippo or h, disc or d
+        if disc is None:
+            raise ErreurRequete("Discipline introuvable (paramètre 'discipline' ou nom de fichier)")
+        if not corps:
+            raise ErreurRequete("Corps vide : envoyer le classeur .xlsx")
+        return await self._calculer(analyser_octets, corps, fichier, hippo, disc)
+
+    async def partants(self, params, corps):
+        try:
+            donnees = json.loads(corps or b"{}")
+        except json.JSONDecodeError as e:
+            raise ErreurRequete(f"JSON invalide : {e}")
+        if not isinstance(donnees, dict):
+            raise ErreurRequete("Objet JSON attendu")
+        if not donnees.get("discipline"):
+            raise ErreurRequete("Champ 'discipline' obligatoire")
+        return await self._calculer(
+            analyser_partants, donnees.get("partants"), str(donnees.get("course", "partants")),
+            donnees.get("hippodrome"), donnees["discipline"])
+
+    async def traiter(self, methode, chemin, params, corps):
+        if chemin == "/sante":
+            if methode != "GET":
+                raise ErreurRequete("Méthode non autorisée", HTTPStatus.METHOD_NOT_ALLOWED)
+            return {"statut": "ok"}
+
+        routes = {"/analyse/classeur": self.classeur, "/analyse/partants": self.partants}
+        if chemin not in routes:
+            raise ErreurRequete(f"Route inconnue : {chemin}", HTTPStatus.NOT_FOUND)
+        if methode != "POST":
+            raise ErreurRequete("Méthode non autorisée", HTTPStatus.METHOD_NOT_ALLOWED)
+        return await routes[chemin](params, corps)
+
+
+# ==================================================
+# HTTP
+# ==================================================
+async def _lire_requete(reader):
+    """(méthode, chemin, paramètres, corps) d'une requête HTTP/1.1"""
+    try:
+        entete = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise ErreurRequete("En-têtes trop longs", HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+    lignes = entete.decode("latin-1").split("\r\n")
+    try:
+        methode, cible, _ = lignes[0].split(" ", 2)
+    except ValueError:
+        raise ErreurRequete("Ligne de requête invalide")
+
+    entetes = {}
+    for ligne in lignes[1:]:
+        if ":" in ligne:
+            cle, valeur = ligne.split(":", 1)
+            entetes[cle.strip().lower()] = valeur.strip()
+
+    try:
+        longueur = int(entetes.get("content-length", 0))
+    except ValueError:
+        raise ErreurRequete("Content-Length invalide")
+    if longueur > TAILLE_MAX_MO * 1024 * 1024:
+        raise ErreurRequete(f"Corps > {TAILLE_MAX_MO} Mo", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    corps = await reader.readexactly(longueur) if longueur else b""
+
+    url = urlsplit(cible)
+    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    return methode.upper(), url.path, params, corps
+
+
+def _ecrire_reponse(writer, statut, contenu):
+    corps = json.dumps(contenu, ensure_ascii=False, default=str).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {statut.value} {statut.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(corps)}\r\n"
+        "Connection: close\r\n\r\n".encode("latin-1") + corps
+    )
+
+
+async def _connexion(service, reader, writer):
+    try:
+        try:
+            requete = await _lire_requete(reader)
+            statut, contenu = HTTPStatus.OK, await service.traiter(*requete)
+        except ErreurRequete as e:
+            statut, contenu = e.statut, {"erreur": str(e)}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        except Exception as e:
+            statut, contenu = HTTPStatus.INTERNAL_SERVER_ERROR, {"erreur": f"{type(e).__name__}: {e}"}
+        _ecrire_reponse(writer, statut, contenu)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+def verifier_hote(hote):
+    """Refuse toute adresse hors boucle locale"""
+    if hote == "localhost":
+        return hote
+    try:
+        if ipaddress.ip_address(hote).is_loopback:
+            return hote
+    except ValueError:
+        pass
+    raise ValueError(f"Le service n'écoute qu'en local (127.0.0.1, ::1, localhost), pas sur {hote}")
+
+
+async def demarrer(hote=HOTE, port=PORT, pool=None):
+    """Serveur asyncio prêt (port=0 : port libre choisi par le système)"""
+    # Import paresseux de la route classeur, fait ici pour ne pas bloquer
+    # la boucle pendant la première requête
+    import batch_turfbzh  # noqa: F401
+    service = ServiceRSE(pool)
+    return await asyncio.start_server(
+        lambda r, w: _connexion(service, r, w), verifier_hote(hote), port)
+
+
+async def servir(hote=HOTE, port=PORT, workers=None):
+    print("🔥 Démarrage et préchauffage des process...")
+    with creer_pool(workers) as pool:
+        serveur = await demarrer(hote, port, pool)
+        adresse = serveur.sockets[0].getsockname()
+        print(f"🌐 Service 1RSE sur http://{adresse[0]}:{adresse[1]} ({workers or os.cpu_count()} process)")
+        async with serveur:
+            await serveur.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP local d'analyse 1RSE")
+    parser.add_argument("--hote", default=HOTE, help="Adresse de boucle locale")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    try:
+        verifier_hote(args.hote)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(servir(args.hote, args.port, args.workers))
+    except KeyboardInterrupt:
+        print("\n🛑 Service arrêté")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+# stockage.py
+# ==================================================
+# STOCKAGE DU DATASET CONSOLIDÉ (PARQUET / EXCEL)
+# ==================================================
+# Dataset Parquet = un dossier :
+#   <dossier>/partants/date=.../hippodrome=.../part-0.parquet
+#   <dossier>/courses/date=.../hippodrome=.../part-0.parquet
+#   <dossier>/rapports/date=.../hippodrome=.../part-0.parquet  (dividendes)
+#   <dossier>/dataset.json  (version + ordre des colonnes)
+# Un backtest limité à une période ou un hippodrome ne lit que
+# les partitions concernées. L'Excel reste un export optionnel.
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from urllib.parse import unquote
+
+import pandas as pd
+
+VERSION_DATASET = 1
+PARTITIONS = ["date", "hippodrome"]
+TABLES = ("partants", "courses")
+RAPPORTS = "rapports"
+COLONNES_RAPPORTS = ["date", "reunion", "course", "hippodrome", "pari", "combinaison", "dividende"]
+
+# Types forcés avant écriture : toutes les partitions gardent le même schéma
+TYPES_PARTANTS = {
+    "date": "str", "reunion": "str", "course": "str", "numero_course": "str",
+    "hippodrome": "str", "discipline": "str", "nom": "str", "jockey": "str",
+    "musique": "str",
+    "numero": "float", "cote": "float", "elo_cheval": "float", "elo_jockey": "float",
+    "repos": "float", "actif": "float", "sigma": "float", "prediction_ia": "float",
+    "ordre_arrivee": "float",
+}
+
+TYPES_COURSES = {
+    "date": "str", "reunion": "str", "course": "str", "numero_course": "str",
+    "hippodrome": "str", "discipline": "str",
+    "distance": "float", "nb_partants": "float",
+    "arrivee_1": "float", "arrivee_2": "float", "arrivee_3": "float",
+}
+
+TYPES_RAPPORTS = {
+    "date": "str", "reunion": "str", "course": "str", "hippodrome": "str",
+    "pari": "str", "combinaison": "str",
+    "dividende": "float",
+}
+
+TYPES = {"partants": TYPES_PARTANTS, "courses": TYPES_COURSES, RAPPORTS: TYPES_RAPPORTS}
+
+
+def _pyarrow():
+    """Import paresseux de pyarrow (dépendance optionnelle)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise ImportError("❌ pyarrow est requis pour le format Parquet (pip install pyarrow)")
+    return pa, ds
+
+
+def _partitionnement():
+    pa, ds = _pyarrow()
+    schema = pa.schema([(c, pa.string()) for c in PARTITIONS])
+    return ds.partitioning(schema, flavor="hive")
+
+
+def _str_ou_none(v):
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    return str(v)
+
+
+def normaliser_types(df, types):
+    """Force les types connus (str / float) pour un schéma Parquet stable"""
+    df = df.copy()
+    for col, t in types.items():
+        if col not in df.columns:
+            continue
+        if t == "float":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+        else:
+            df[col] = df[col].map(_str_ou_none).astype(object)
+    return df
+
+
+def est_dataset_parquet(source):
+    """Vrai si la source est un dossier de dataset Parquet"""
+    return Path(source).is_dir()
+
+
+# ==================================================
+# ÉCRITURE
+# ==================================================
+def ecrire_table(df, dossier, table, remplacer=False):
+    """
+    Écrit une table (partants / courses) partitionnée par date et hippodrome.
+    remplacer=True : efface toute la table avant écriture.
+    Sinon seules les partitions présentes dans df sont réécrites.
+    """
+    pa, ds = _pyarrow()
+    chemin = Path(dossier) / table
+
+    if remplacer and chemin.exists():
+        shutil.rmtree(chemin)
+
+    if len(df) == 0:
+        return
+
+    df = normaliser_types(df, TYPES[table])
+    for col in PARTITIONS:
+        df[col] = df[col].fillna("inconnu")
+
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        chemin,
+        format="parquet",
+        partitioning=_partitionnement(),
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+
+
+def ecrire_meta(dossier, colonnes):
+    """Écrit dataset.json (version + ordre des colonnes par table)"""
+    meta = {"version": VERSION_DATASET, "colonnes": colonnes}
+    with open(Path(dossier) / "dataset.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def lire_meta(dossier):
+    fichier = Path(dossier) / "dataset.json"
+    if not fichier.exists():
+        return {"version": VERSION_DATASET, "colonnes": {}}
+    with open(fichier, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ecrire_dataset(df_partants, df_courses, dossier, df_rapports=None):
+    """Écrit le dataset complet (remplace l'existant), dividendes compris"""
+    Path(dossier).mkdir(parents=True, exist_ok=True)
+    ecrire_table(df_partants, dossier, "partants", remplacer=True)
+    ecrire_table(df_courses, dossier, "courses", remplacer=True)
+    colonnes = {
+        "partants": list(df_partants.columns),
+        "courses": list(df_courses.columns),
+    }
+    if df_rapports is not None:
+        ecrire_table(df_rapports, dossier, RAPPORTS, remplacer=True)
+        colonnes[RAPPORTS] = list(df_rapports.columns)
+    ecrire_meta(dossier, colonnes)
+
+
+def cles_courses(df):
+    """Clé de course (2025-01-10_R4_C6) de chaque ligne"""
+    col = "numero_course" if "numero_course" in df.columns else "course"
+    return df["date"].astype(str) + "_" + df["reunion"].astype(str) + "_C" + df[col].astype(str)
+
+
+def _supprimer_partition(dossier, table, date, hippodrome):
+    """Supprime les fichiers d'une partition (date, hippodrome) devenue vide"""
+    _, ds = _pyarrow()
+    chemin = Path(dossier) / table
+    if not chemin.exists():
+        return
+    dataset = ds.dataset(chemin, format="parquet", partitioning=_partitionnement())
+    filtre = (ds.field("date") == date) & (ds.field("hippodrome") == hippodrome)
+    for fragment in dataset.get_fragments(filter=filtre):
+        fichier = Path(fragment.path)
+        fichier.unlink()
+        # Nettoyer les dossiers vides hippodrome=... puis date=...
+        for parent in (fichier.parent, fichier.parent.parent):
+            if parent != chemin and not any(parent.iterdir()):
+                parent.rmdir()
+
+
+def _concatener(existant, nouvelles, types):
+    """
+    existant + nouvelles lignes, aux types de normaliser_types ; une
+    colonne tout-NA prend le type de l'autre table (le résultat ne dépend
+    pas des règles de pandas sur les colonnes vides ou tout-NA).
+    """
+    parties = [normaliser_types(df, types) for df in (existant, nouvelles) if len(df)]
+    if not parties:
+        return nouvelles
+    if len(parties) == 2:
+        a, b = parties
+        for col in a.columns.intersection(b.columns):
+            if a[col].dtype == b[col].dtype:
+                continue
+            if b[col].isna().all():
+                b[col] = b[col].astype(a[col].dtype)
+            elif a[col].isna().all():
+                a[col] = a[col].astype(b[col].dtype)
+    return pd.concat(parties, ignore_index=True)
+
+
+def mettre_a_jour_partitions(dossier, partitions, cles_retirees, df_partants, df_courses,
+                             df_rapports=None):
+    """
+    Mise à jour incrémentale : seules les partitions (date, hippodrome)
+    touchées sont relues puis réécrites = lignes existantes
+    moins les courses retirées, plus les nouvelles lignes.
+    df_rapports : dividendes des nouvelles courses (table non touchée si None)
+    """
+    partitions = set(partitions)
+    if not partitions:
+        return
+    dates = sorted({d for d, _ in partitions})
+    hippos = sorted({h for _, h in partitions})
+    nouvelles = {"partants": df_partants, "courses": df_courses}
+    if df_rapports is not None:
+        nouvelles[RAPPORTS] = df_rapports
+
+    for table in nouvelles:
+        existant = lire_table(dossier, table, dates[0], dates[-1], hippos)
+        if len(existant):
+            dans_partition = pd.Series(
+                list(zip(existant["date"], existant["hippodrome"])), index=existant.index
+            ).isin(partitions)
+            existant = existant[dans_partition & ~cles_courses(existant).isin(set(cles_retirees))]
+
+        df = _concatener(existant, nouvelles[table], TYPES[table])
+
+        # Partitions vidées (courses supprimées sans remplaçante)
+        restantes = set(zip(df["date"], df["hippodrome"].fillna("inconnu"))) if len(df) else set()
+        for date, hippo in partitions - restantes:
+            _supprimer_partition(dossier, table, date, hippo)
+
+        ecrire_table(df, dossier, table)
+
+
+def exporter_excel(df_partants, df_courses, fichier, df_rapports=None):
+    """Export Excel (onglets Partants / Courses, + Rapports si fourni)"""
+    with pd.ExcelWriter(fichier, engine="openpyxl") as writer:
+        df_partants.to_excel(writer, sheet_name="Partants", index=False)
+        df_courses.to_excel(writer, sheet_name="Courses", index=False)
+        if df_rapports is not None:
+            df_rapports.to_excel(writer, sheet_name="Rapports", index=False)
+
+
+# ==================================================
+# LECTURE
+# ==================================================
+def _filtre(date_min=None, date_max=None, hippodromes=None):
+    _, ds = _pyarrow()
+    expr = None
+    conditions = []
+    if date_min is not None:
+        conditions.append(ds.field("date") >= str(date_min))
+    if date_max is not None:
+        conditions.append(ds.field("date") <= str(date_max))
+    if hippodromes:
+        conditions.append(ds.field("hippodrome").isin([str(h) for h in hippodromes]))
+    for c in conditions:
+        expr = c if expr is None else expr & c
+    return expr
+
+
+def lire_table(dossier, table, date_min=None, date_max=None, hippodromes=None, colonnes=None):
+    """
+    Lit une table Parquet en ne parcourant que les partitions utiles.
+    colonnes : sous-ensemble de colonnes à lire (None = toutes)
+    """
+    _, ds = _pyarrow()
+    chemin = Path(dossier) / table
+    ordre = lire_meta(dossier)["colonnes"].get(table)
+
+    if not chemin.exists():
+        return pd.DataFrame(columns=colonnes or ordre or [])
+
+    dataset = ds.dataset(chemin, format="parquet", partitioning=_partitionnement())
+    if colonnes is not None:
+        colonnes = [c for c in colonnes if c in dataset.schema.names]
+    df = dataset.to_table(
+        columns=colonnes,
+        filter=_filtre(date_min, date_max, hippodromes),
+    ).to_pandas()
+
+    # Remettre l'ordre d'origine des colonnes (les partitions arrivent en dernier)
+    if ordre:
+        df = df[[c for c in ordre if c in df.columns] + [c for c in df.columns if c not in ordre]]
+    return df
+
+
+def empreintes_par_date(dossier, tables=TABLES):
+    """
+    {date: empreinte} des fichiers Parquet de chaque date (chemin, taille,
+    mtime), sans lire les données : une date dont une partition a été
+    ajoutée, réécrite ou supprimée change d'empreinte.
+    """
+    fichiers = {}
+    for table in tables:
+        for f in sorted((Path(dossier) / table).glob("date=*/*/*.parquet")):
+            date = unquote(f.parent.parent.name.split("=", 1)[1])
+            st = f.stat()
+            fichiers.setdefault(date, []).append(f"{f.relative_to(dossier)}:{st.st_size}:{st.st_mtime_ns}")
+    return {
+        date: hashlib.sha256("\n".join(lignes).encode()).hexdigest()[:16]
+        for date, lignes in sorted(fichiers.items())
+    }
+
+
+def lire_dataset(source, date_min=None, date_max=None, hippodromes=None):
+    """
+    Charge (df_partants, df_courses) depuis un dataset Parquet (dossier)
+    ou un fichier Excel consolidé. Filtres optionnels sur la période
+    (dates ISO 'AAAA-MM-JJ', bornes incluses) et les hippodromes.
+    """
+    if est_dataset_parquet(source):
+        return tuple(
+            lire_table(source, t, date_min, date_max, hippodromes)
+            for t in TABLES
+        )
+
+    df_partants = pd.read_excel(source, sheet_name="Partants")
+    df_courses = pd.read_excel(source, sheet_name="Courses")
+
+    if date_min is None and date_max is None and not hippodromes:
+        return df_partants, df_courses
+
+    return (
+        _filtrer_excel(df_partants, date_min, date_max, hippodromes),
+        _filtrer_excel(df_courses, date_min, date_max, hippodromes),
+    )
+
+
+def lire_courses(source, date_min=None, date_max=None, hippodromes=None, colonnes=None):
+    """Table Courses seule (les Partants, bien plus gros, ne sont pas lus)"""
+    if est_dataset_parquet(source):
+        return lire_table(source, "courses", date_min, date_max, hippodromes, colonnes)
+    df = _filtrer_excel(pd.read_excel(source, sheet_name="Courses"), date_min, date_max, hippodromes)
+    return df[colonnes] if colonnes else df
+
+
+def _filtrer_excel(df, date_min=None, date_max=None, hippodromes=None):
+    """Mêmes filtres que _filtre, sur un onglet Excel déjà chargé"""
+    m = pd.Series(True, index=df.index)
+    if date_min is not None:
+        m &= df["date"].astype(str) >= str(date_min)
+    if date_max is not None:
+        m &= df["date"].astype(str) <= str(date_max)
+    if hippodromes:
+        m &= df["hippodrome"].astype(str).isin([str(h) for h in hippodromes])
+    return df[m].reset_index(drop=True)
+
+
+def lire_rapports(source, date_min=None, date_max=None, hippodromes=None):
+    """
+    Table des dividendes (date, reunion, course, hippodrome, pari,
+    combinaison, dividende) ; vide si le dataset n'en contient pas
+    """
+    if est_dataset_parquet(source):
+        df = lire_table(source, RAPPORTS, date_min, date_max, hippodromes)
+        return df if len(df.columns) else pd.DataFrame(columns=COLONNES_RAPPORTS)
+
+    try:
+        df = pd.read_excel(source, sheet_name="Rapports", dtype={"combinaison": str})
+    except ValueError:  # onglet absent (ancien export)
+        return pd.DataFrame(columns=COLONNES_RAPPORTS)
+    return _filtrer_excel(df, date_min, date_max, hippodromes)
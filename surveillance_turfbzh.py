@@ -0,0 +1,182 @@
+# surveillance_turfbzh.py
+# ==================================================
+# ANALYSE 1RSE EN CONTINU (DOSSIER SURVEILLÉ)
+# ==================================================
+# python surveillance_turfbzh.py DOSSIER [--journal verdicts.jsonl]
+#                                        [--intervalle 0.2] [--existants]
+#
+# Un seul process reste lancé : pandas, openpyxl, le cache des schémas
+# de colonnes et les tables BORDAS sont chargés une fois (préchauffage
+# au démarrage). Chaque classeur déposé ou modifié dans DOSSIER est
+# analysé dès que sa taille et sa date ne bougent plus entre deux
+# passages (fichier entièrement copié), puis une ligne JSON est ajoutée
+# au journal : verdict, base, ticket, pari, confiance, seed, durée.
+# Hippodrome / discipline : mêmes règles que batch_turfbzh.py.
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from batch_turfbzh import NOM_MAPPING, charger_mapping, deduire_course, lister_classeurs
+from test_rse_turfbzh import analyser_classeur, lire_classeur
+
+NOM_JOURNAL = "verdicts.jsonl"
+INTERVALLE = 0.2
+
+CHAMPS_JOURNAL = [
+    "fichier", "hippodrome", "discipline", "verdict", "base", "ticket", "pari",
+    "confiance", "face", "seed", "nb_eligibles", "erreur",
+]
+
+
+def prechauffer():
+    """
+    Analyse un classeur synthétique (même en-tête que turfbzh) :
+    imports paresseux (openpyxl, monte_carlo...) et cache des schémas
+    de colonnes sont prêts avant le premier vrai fichier
+    """
+    import cache_classeurs  # noqa: F401  (lecture via le cache disque)
+    import synthetique
+
+    debut = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        fichier = synthetique.ecrire_classeur_turfbzh(Path(tmp) / "prechauffage.xlsx")
+        df = lire_classeur(fichier, cache=False)
+        analyser_classeur(fichier, "vincennes", "trot", df=df)
+    return time.perf_counter() - debut
+
+
+class Surveillant:
+    """
+    Suit les classeurs d'un dossier par (taille, mtime) :
+    un fichier est prêt quand son état est identique sur deux passages
+    et différent du dernier état analysé
+    """
+
+    def __init__(self, dossier, journal=None, mapping=None):
+        self.dossier = Path(dossier)
+        self.journal = Path(journal) if journal else self.dossier / NOM_JOURNAL
+        self.mapping = mapping  # None = DOSSIER/turfbzh.json relu à chaque analyse
+        self.vus = {}       # fichier -> état au passage précédent
+        self.analyses = {}  # fichier -> état au moment de l'analyse
+
+    @staticmethod
+    def _etat(fichier):
+        try:
+            st = fichier.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def marquer_existants(self):
+        """Les classeurs déjà présents ne seront analysés que s'ils changent"""
+        for f in lister_classeurs(self.dossier):
+            etat = self._etat(f)
+            self.vus[f] = self.analyses[f] = etat
+
+    def prets(self):
+        """Classeurs nouveaux ou modifiés, stables depuis le passage précédent"""
+        prets = []
+        presents = set()
+        for f in lister_classeurs(self.dossier):
+            presents.add(f)
+            etat = self._etat(f)
+            if etat is None:
+                continue
+            if etat == self.vus.get(f) and etat != self.analyses.get(f):
+                prets.append(f)
+            self.vus[f] = etat
+        for f in set(self.vus) - presents:
+            self.vus.pop(f, None)
+            self.analyses.pop(f, None)
+        return prets
+
+    def analyser(self, fichier):
+        """Analyse un classeur et ajoute sa ligne au journal"""
+        debut = time.perf_counter()
+        mapping = self.mapping if self.mapping is not None else charger_mapping(self.dossier / NOM_MAPPING)
+        hippo, disc = deduire_course(fichier, mapping)
+
+        try:
+            if disc is None:
+                raise ValueError("Discipline introuvable (nom de fichier ou correspondance)")
+            resultat = analyser_classeur(str(fichier), hippo, disc)
+        except Exception as e:
+            resultat = {
+                "fichier": fichier.name, "hippodrome": hippo, "discipline": disc,
+                "verdict": "ERREUR", "erreur": f"{type(e).__name__}: {e}",
+            }
+
+        self.analyses[fichier] = self.vus.get(fichier)
+        ligne = {
+            "horodatage": datetime.now().isoformat(timespec="milliseconds"),
+            **{k: resultat.get(k) for k in CHAMPS_JOURNAL},
+            "duree_ms": round((time.perf_counter() - debut) * 1000, 1),
+        }
+        with open(self.journal, "a", encoding="utf-8") as f:
+            f.write(json.dumps(ligne, ensure_ascii=False, default=str) + "\n")
+        return ligne
+
+    def passage(self):
+        """Un passage : analyse tous les classeurs prêts, retourne leurs lignes"""
+        return [self.analyser(f) for f in self.prets()]
+
+
+def afficher(ligne):
+    if ligne["verdict"] == "ERREUR":
+        print(f"⚠️ {ligne['fichier']} : {ligne['erreur']}")
+    elif ligne["verdict"] == "JOUER":
+        print(f"✅ {ligne['fichier']} | {ligne['hippodrome']} {ligne['discipline']} | "
+              f"BASE {ligne['base']} | Ticket {ligne['ticket']} | {ligne['pari']} | "
+              f"conf {ligne['confiance']:.2f} | seed {ligne['seed']} | {ligne['duree_ms']} ms")
+    else:
+        print(f"❌ {ligne['fichier']} : NO BET ({ligne['duree_ms']} ms)")
+
+
+def surveiller(dossier, journal=None, intervalle=INTERVALLE, existants=False, mapping=None):
+    """
+    Boucle de surveillance (Ctrl+C pour arrêter).
+    existants=True : analyse aussi les classeurs déjà présents au démarrage
+    """
+    print(f"🔥 Préchauffage... ({prechauffer() * 1000:.0f} ms)")
+
+    surveillant = Surveillant(dossier, journal, mapping)
+    if not existants:
+        surveillant.marquer_existants()
+
+    print(f"👀 Surveillance de {dossier} (toutes les {intervalle}s) → {surveillant.journal}")
+    try:
+        while True:
+            for ligne in surveillant.passage():
+                afficher(ligne)
+            time.sleep(intervalle)
+    except KeyboardInterrupt:
+        print("\n🛑 Surveillance arrêtée")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse 1RSE des classeurs turfbzh déposés dans un dossier")
+    parser.add_argument("dossier", help="Dossier surveillé (*-turfbzh.xlsx)")
+    parser.add_argument("--journal", default=None, help=f"Journal JSON lines (défaut: DOSSIER/{NOM_JOURNAL})")
+    parser.add_argument("--intervalle", type=float, default=INTERVALLE, help="Secondes entre deux passages")
+    parser.add_argument("--mapping", default=None, help=f"Correspondance JSON (défaut: DOSSIER/{NOM_MAPPING})")
+    parser.add_argument("--existants", action="store_true", help="Analyser aussi les classeurs déjà présents")
+    args = parser.parse_args()
+
+    if not Path(args.dossier).is_dir():
+        print(f"❌ Le dossier {args.dossier} n'existe pas !")
+        sys.exit(1)
+
+    mapping = charger_mapping(args.mapping) if args.mapping else None
+
+    print("🏇 ANALYSE 1RSE EN CONTINU")
+    print("=" * 70)
+    surveiller(args.dossier, args.journal, args.intervalle, args.existants, mapping)
+
+
+if __name__ == "__main__":
+    main()
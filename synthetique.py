@@ -0,0 +1,218 @@
+# synthetique.py
+# ==================================================
+# GÉNÉRATEUR DE COURSES SYNTHÉTIQUES (SEED FIXE)
+# ==================================================
+# Données de test réalistes, reproductibles, de taille réglable :
+#   - classeurs turfbzh (2 lignes d'en-têtes, comme 15012026-R3C3-turfbzh.xlsx)
+#   - triplets dataRaceJson (_infos / _participants / _rapports.json)
+#   - DataFrames consolidés Partants / Courses (comme construire_dataframes)
+# Même seed => mêmes données, pour comparer des mesures entre deux versions.
+
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from test_rse_turfbzh import BORDAS, DOMAINES
+
+HIPPODROMES = sorted(BORDAS)
+DISCIPLINES = sorted(DOMAINES)
+
+# En-têtes d'un classeur turfbzh (ligne 1, ligne 2) ; "" = cellule vide
+ENTETES_TURFBZH = [
+    ("Actif", ""), ("N°", ""), ("CHEVAL/MUSIQ.", ""), ("AGE", ""),
+    ("DRIVER/ENTRAINEUR", ""), ("INFO+", ""), ("Poids", ""), ("Valeur", ""),
+    ("Gain/Course", ""), ("Moy/Alloc", ""), ("Repos", ""), ("Popularité", ""),
+    ("Evo Popul", ""), ("HISTO", ""), ("EX-FAV ?", ""), ("IMDC", ""),
+    ("COTE", ""), ("CoteBZH", ""), ("PC", ""), ("RANK", ""), ("classement", ""),
+    ("Syn. JCh", ""),
+    ("RATING ELO", "CHEVAL"), ("RATING ELO", "JOCKEY"), ("RATING ELO", "COACH"),
+    ("RATING ELO", "PROPRIO"), ("RATING ELO", "ÉLEVEUR"), ("RATING ELO", "Sigma"),
+    ("PREDICTION IA", "Gagnant"), ("PREDICTION IA", "Couplé"), ("PREDICTION IA", "Trio"),
+    ("PREDICTION IA", "Multi"), ("PREDICTION IA", "Quinté"), ("PREDICTION IA", "Note IA"),
+    ("TP", "Rang J."), ("TP", "TPJ 365"), ("TP", "TPJ 90"), ("TP", "Moy. 1an"),
+    ("TP", "Moy. 3m"), ("TP", "TPch 90"), ("TP", "Moy. 1an.1"), ("TP", "Moy. 3m.1"),
+]
+
+NOMS = ["KENOBI", "JEDEO", "HIER ENCORE", "IDOLE", "GAMIN", "FLECHE", "HERMES",
+        "JASMIN", "LUNA", "ORAGE", "ROYAL", "SULTAN", "TONNERRE", "URANUS"]
+SUFFIXES = ["", " DES VAUX", " D'HERFRAIE", " DU BOCAGE", " DE LA RIVE", " BLEU"]
+JOCKEYS = ["A. LAMY", "TH. DROMIGNY", "M. ABRIVARD", "E. RAFFIN", "F. NIVARD",
+           "Y. LEBOURGEOIS", "B. ROCHARD", "J.M. BAZIRE", "D. THOMAIN", "G. GELORMINI"]
+
+
+def _nom(rng):
+    return rng.choice(NOMS) + rng.choice(SUFFIXES)
+
+
+def _musique(rng, nb=6):
+    lettre = rng.choice("amph")
+    return " ".join(
+        rng.choice(["D", "A", "0"]) + lettre if rng.random() < 0.15 else f"{rng.randint(1, 12)}{lettre}"
+        for _ in range(rng.randint(0, nb))
+    )
+
+
+def _manquant(rng, v, p=0.1):
+    return None if rng.random() < p else v
+
+
+# ==================================================
+# CLASSEURS TURFBZH
+# ==================================================
+def lignes_turfbzh(n_partants=14, seed=0):
+    """Lignes de données d'un classeur (une liste par cheval, ordre ENTETES_TURFBZH)"""
+    rng = random.Random(seed)
+    lignes = []
+    for num in range(1, n_partants + 1):
+        cote = round(rng.uniform(1.5, 60), 1)
+        lignes.append([
+            rng.random() < 0.85, num, _nom(rng), rng.randint(3, 10),
+            f"{rng.choice(JOCKEYS)}/{rng.choice(JOCKEYS)}", None, rng.randint(55, 70), None,
+            round(rng.uniform(500, 5000), 2), rng.randint(10000, 40000),
+            _manquant(rng, float(rng.randint(5, 90))), float(rng.randint(50, 400)),
+            rng.randint(-50, 400), f"{rng.randint(5, 80)}-{rng.randint(0, 9)}-{rng.randint(0, 12)}-{rng.randint(0, 30)}",
+            "N-N-FP-N-N", round(rng.uniform(-5, 5), 1),
+            cote, round(cote * rng.uniform(0.7, 1.5), 1), round(rng.uniform(2, 60), 1), None,
+            rng.choice(["FAVORIS", "POSSIBLE", "OUTSIDERS"]), round(rng.uniform(20, 90), 1),
+            rng.randint(1300, 1600), rng.randint(1350, 1700), rng.randint(1350, 1550),
+            rng.randint(1350, 1450), rng.randint(1350, 1450), round(rng.uniform(40, 80), 2),
+            _manquant(rng, rng.randint(1, n_partants)), round(rng.uniform(0, 0.3), 6),
+            round(rng.uniform(0, 0.5), 6), round(rng.uniform(0, 0.5), 6), round(rng.uniform(0, 0.6), 6),
+            round(rng.uniform(5, 15), 1), rng.randint(1, 60), rng.randint(500, 60000),
+            rng.randint(100, 10000), round(rng.uniform(1, 200), 6), round(rng.uniform(1, 150), 6),
+            rng.randint(1, 200), round(rng.uniform(1, 100), 6), round(rng.uniform(1, 80), 6),
+        ])
+    return lignes
+
+
+def classeur_turfbzh(n_partants=14, seed=0):
+    """
+    DataFrame tel que lu par pd.read_excel(header=[0, 1]) (colonnes
+    MultiIndex, 'Unnamed: i_level_1' sous les en-têtes d'une seule ligne)
+    """
+    colonnes = pd.MultiIndex.from_tuples([
+        (h1, h2 or f"Unnamed: {i}_level_1") for i, (h1, h2) in enumerate(ENTETES_TURFBZH)
+    ])
+    return pd.DataFrame(lignes_turfbzh(n_partants, seed), columns=colonnes)
+
+
+def ecrire_classeur_turfbzh(chemin, n_partants=14, seed=0):
+    """Écrit un classeur turfbzh .xlsx (en-têtes de groupe fusionnés)"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    precedent = None
+    for j, (h1, h2) in enumerate(ENTETES_TURFBZH, start=1):
+        if h1 != precedent:
+            ws.cell(row=1, column=j, value=h1)
+            debut = j
+        elif h2:
+            ws.merge_cells(start_row=1, start_column=debut, end_row=1, end_column=j)
+        if h2:
+            ws.cell(row=2, column=j, value=h2)
+        precedent = h1
+    for ligne in lignes_turfbzh(n_partants, seed):
+        ws.append(ligne)
+    wb.save(chemin)
+    return chemin
+
+
+# ==================================================
+# TRIPLETS dataRaceJson
+# ==================================================
+def ecrire_triplets_json(dossier, n_jours=10, courses_par_jour=30, seed=0):
+    """
+    Écrit les triplets _infos / _participants / _rapports.json de
+    n_jours x courses_par_jour courses. Retourne le nombre de courses.
+    """
+    rng = random.Random(seed)
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+
+    for j in range(n_jours):
+        date = (pd.Timestamp("2025-01-01") + pd.Timedelta(days=j)).strftime("%Y-%m-%d")
+        for k in range(courses_par_jour):
+            reunion, course = f"R{k // 8 + 1}", k % 8 + 1
+            base = f"{date}_{reunion}_C{course}"
+            n = rng.randint(6, 18)
+            arrivee = rng.sample(range(1, n + 1), n)
+
+            infos = {
+                "hippodrome": {"libelleCourt": HIPPODROMES[(j + k // 8) % len(HIPPODROMES)]},
+                "discipline": rng.choice(DISCIPLINES),
+                "distance": rng.choice([1600, 2100, 2700, 2850]),
+                "ordreArrivee": arrivee[:5],
+            }
+            participants = {"participants": [{
+                "numPmu": num,
+                "nom": _nom(rng),
+                "driver": rng.choice(JOCKEYS),
+                "dernierRapportReference": {"rapport": round(rng.uniform(1.5, 60), 1)},
+                "ordreArrivee": arrivee.index(num) + 1,
+            } for num in range(1, n + 1)]}
+            rapports = [
+                {"typePari": "SIMPLE_GAGNANT", "rapports": [
+                    {"combinaison": str(arrivee[0]), "dividendePourUnEuro": rng.randint(110, 3000)}]},
+                {"typePari": "SIMPLE_PLACE", "rapports": [
+                    {"combinaison": str(a), "dividendePourUnEuro": rng.randint(105, 900)} for a in arrivee[:3]]},
+            ]
+
+            for suffixe, contenu in (("infos", infos), ("participants", participants), ("rapports", rapports)):
+                with open(dossier / f"{base}_{suffixe}.json", "w", encoding="utf-8") as f:
+                    json.dump(contenu, f, ensure_ascii=False)
+
+    return n_jours * courses_par_jour
+
+
+# ==================================================
+# DATAFRAMES CONSOLIDÉS
+# ==================================================
+def frames_consolides(n_courses=1000, seed=0, courses_par_jour=30):
+    """
+    (df_partants, df_courses) aux colonnes de construire_dataframes,
+    avec les colonnes RSE (repos, actif, sigma, ELO...) renseignées
+    """
+    rng = np.random.default_rng(seed)
+    partants, courses = [], []
+
+    for i in range(n_courses):
+        date = (pd.Timestamp("2025-01-01") + pd.Timedelta(days=i // courses_par_jour)).strftime("%Y-%m-%d")
+        k = i % courses_par_jour
+        reunion, course = f"R{k // 8 + 1}", str(k % 8 + 1)
+        hippo = HIPPODROMES[(i // courses_par_jour + k // 8) % len(HIPPODROMES)]
+        disc = DISCIPLINES[rng.integers(len(DISCIPLINES))]
+        n = int(rng.integers(6, 19))
+        arrivee = rng.permutation(np.arange(1, n + 1))
+
+        courses.append({
+            "date": date, "reunion": reunion, "course": course,
+            "hippodrome": hippo, "discipline": disc, "distance": 2700, "nb_partants": n,
+            "arrivee_1": arrivee[0], "arrivee_2": arrivee[1], "arrivee_3": arrivee[2],
+        })
+
+        def manquant(v, p=0.1):
+            return np.nan if rng.random() < p else v
+
+        for num in range(1, n + 1):
+            partants.append({
+                "date": date, "reunion": reunion, "course": course,
+                "hippodrome": hippo, "discipline": disc,
+                "numero": num,
+                "nom": f"CHEVAL {rng.integers(1, 5000)}",
+                "jockey": JOCKEYS[rng.integers(len(JOCKEYS))],
+                "cote": manquant(round(float(rng.uniform(1.5, 60)), 1)),
+                "elo_cheval": manquant(float(rng.integers(1300, 1600))),
+                "elo_jockey": manquant(float(rng.integers(1350, 1700))),
+                "repos": manquant(float(rng.integers(5, 90))),
+                "actif": manquant(float(rng.random() < 0.85)),
+                "sigma": manquant(round(float(rng.uniform(40, 80)), 2)),
+                "prediction_ia": manquant(float(rng.integers(1, n + 1))),
+                "musique": " ".join(f"{rng.integers(0, 12)}a" for _ in range(rng.integers(0, 7))),
+                "ordre_arrivee": int(np.flatnonzero(arrivee == num)[0]) + 1,
+            })
+
+    return pd.DataFrame(partants), pd.DataFrame(courses)
@@ -0,0 +1,195 @@
+# telemetrie.py
+# ==================================================
+# TÉLÉMÉTRIE PAR ÉTAPE (OPTIONNELLE, JSON LINES)
+# ==================================================
+# Désactivée par défaut. Pour l'activer :
+#   RSE_TELEMETRIE=1 python backtest.py             -> telemetrie.jsonl
+#   RSE_TELEMETRIE=/var/log/rse.jsonl python ...    -> fichier choisi
+# ou depuis Python : telemetrie.activer("rse.jsonl")
+#
+# Chaque étape terminée ajoute une ligne JSON : durée, nombre d'appels
+# de l'étape dans le process, lignes traitées et débit, pic mémoire du
+# process (RSS max, lu dans getrusage : pas de tracemalloc, donc pas de
+# ralentissement). À la fin d'un point d'entrée, une ligne "resume"
+# cumule toutes les étapes de la session.
+# Désactivée, etape() renvoie un objet vide partagé : coût négligeable.
+
+import functools
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FICHIER_DEFAUT = "telemetrie.jsonl"
+VARIABLE = "RSE_TELEMETRIE"
+
+_chemin = None      # None = télémétrie désactivée
+_pile = []          # étapes en cours (noms imbriqués "a/b")
+_cumul = {}         # nom -> {"appels", "duree_s", "lignes"} (process)
+_session = None     # {"id", "point_entree", "debut", "cumul"}
+
+
+def activer(chemin=FICHIER_DEFAUT):
+    global _chemin
+    _chemin = str(chemin)
+
+
+def desactiver():
+    global _chemin
+    _chemin = None
+
+
+def est_active():
+    return _chemin is not None
+
+
+def pic_memoire_mo():
+    """Pic de mémoire résidente du process (Mo), None si indisponible"""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : kilo-octets, macOS : octets
+    return pic / 1e6 if sys.platform == "darwin" else pic / 1024
+
+
+def _ecrire(evenement):
+    if _chemin is None:
+        return
+    ligne = json.dumps(evenement, ensure_ascii=False, default=str)
+    with open(_chemin, "a", encoding="utf-8") as f:
+        f.write(ligne + "\n")
+
+
+def _base(evenement):
+    return {
+        "evenement": evenement,
+        "horodatage": datetime.now().isoformat(timespec="milliseconds"),
+        "pid": os.getpid(),
+        "session": _session["id"] if _session else None,
+        "point_entree": _session["point_entree"] if _session else None,
+    }
+
+
+# ==================================================
+# ÉTAPES
+# ==================================================
+class _EtapeInactive:
+    """Étape quand la télémétrie est coupée : ne fait rien"""
+    __slots__ = ("lignes",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_INACTIVE = _EtapeInactive()
+
+
+class _Etape:
+    """
+    Étape chronométrée. e.lignes peut être renseigné dans le bloc
+    quand le nombre de lignes n'est connu qu'à la fin.
+    """
+    __slots__ = ("nom", "lignes", "_debut")
+
+    def __init__(self, nom, lignes=None):
+        self.nom = nom
+        self.lignes = lignes
+
+    def __enter__(self):
+        _pile.append(self.nom)
+        self.nom = "/".join(_pile)
+        self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duree = time.perf_counter() - self._debut
+        _pile.pop()
+
+        cumuls = [_cumul]
+        if _session:
+            cumuls.append(_session["cumul"])
+        for cumul in cumuls:
+            c = cumul.setdefault(self.nom, {"appels": 0, "duree_s": 0.0, "lignes": 0})
+            c["appels"] += 1
+            c["duree_s"] += duree
+            c["lignes"] += self.lignes or 0
+
+        evenement = _base("etape")
+        evenement.update({
+            "etape": self.nom,
+            "duree_s": round(duree, 6),
+            "appels": _cumul[self.nom]["appels"],
+            "lignes": self.lignes,
+            "lignes_par_s": round(self.lignes / duree, 1) if self.lignes and duree > 0 else None,
+            "pic_memoire_mo": pic_memoire_mo(),
+        })
+        if exc_type is not None and not issubclass(exc_type, SystemExit):
+            evenement["erreur"] = exc_type.__name__
+        _ecrire(evenement)
+        return False
+
+
+def etape(nom, lignes=None):
+    """
+    with etape("lecture_excel") as e:
+        df = ...
+        e.lignes = len(df)
+    """
+    if _chemin is None:
+        return _INACTIVE
+    return _Etape(nom, lignes)
+
+
+# ==================================================
+# POINTS D'ENTRÉE
+# ==================================================
+def point_entree(nom):
+    """
+    Décorateur des points d'entrée : ouvre une session (identifiant
+    commun à toutes ses étapes) et écrit la ligne "resume" à la fin
+    """
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            global _session
+            if _chemin is None or _session is not None:
+                return fonction(*args, **kwargs)
+
+            _session = {"id": uuid.uuid4().hex[:12], "point_entree": nom,
+                        "debut": time.perf_counter(), "cumul": {}}
+            try:
+                with _Etape(nom):
+                    return fonction(*args, **kwargs)
+            finally:
+                resume = _base("resume")
+                resume.update({
+                    "duree_s": round(time.perf_counter() - _session["debut"], 6),
+                    "pic_memoire_mo": pic_memoire_mo(),
+                    "etapes": {
+                        k: {**v, "duree_s": round(v["duree_s"], 6)}
+                        for k, v in _session["cumul"].items()
+                    },
+                })
+                _ecrire(resume)
+                _session = None
+        return enveloppe
+    return decorateur
+
+
+def _depuis_environnement():
+    valeur = os.environ.get(VARIABLE, "").strip()
+    if valeur and valeur.lower() not in ("0", "non", "false"):
+        activer(FICHIER_DEFAUT if valeur.lower() in ("1", "oui", "true") else valeur)
+
+
+_depuis_environnement()
@@ -1,11 +1,16 @@
+import numpy as np
 import pandas as pd
 import os
 import sys
 import random
 import hashlib
 from collections import Counter
+from functools import lru_cache
 
+from bordas import bonus_appris
 from cheval import Cheval
+from musique import parser_musique, score_musique as score_musique_complete
+from telemetrie import etape, point_entree
 
 # ==================================================
 # OUTILS GÉNÉRAUX
@@ -21,6 +26,15 @@ def to_float(val):
     except Exception:
         return None
 
+def to_float_serie(s):
+    """
+    Version colonne de to_float : même conversion, NaN à la place de None.
+    Chemin rapide si la colonne est déjà numérique.
+    """
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.astype(float)
+    return s.map(to_float).astype(float)
+
 def clamp(x, lo=0.0, hi=1.0):
     return max(lo, min(hi, x))
 
@@ -120,6 +134,67 @@ def require_col(colname, label):
         print(f"❌ Colonne obligatoire introuvable : {label}")
         sys.exit(1)
 
+# ==================================================
+# SCHÉMA DES COLONNES (RÉSOLU UNE FOIS PAR CLASSEUR)
+# ==================================================
+def _premiere_colonne(colonnes, predicat):
+    for col in colonnes:
+        if predicat(str(col).lower()):
+            return col
+    return None
+
+class SchemaTurfbzh:
+    """
+    Colonnes d'un classeur turfbzh détectées une seule fois
+    (mêmes règles que detecter_colonne et les recherches par inclusion)
+    """
+
+    def __init__(self, colonnes):
+        colonnes = list(colonnes)
+        df = pd.DataFrame(columns=colonnes)
+        self.colonnes = colonnes
+
+        # Colonnes principales (EXCLURE les colonnes ELO de la recherche JOCKEY)
+        self.num = detecter_colonne(df, ["N°", "Nº", "NUM", "NO"])
+        self.nom = detecter_colonne(df, ["CHEVAL/MUSIQ.", "CHEVAL", "CHEVAL | MUSIQ", "CHEVAL/MUSIQUE"])
+        self.jockey = detecter_colonne(df, ["JOCKEY", "DRIVER", "DRIVER/JOCKEY", "JOCKEY/ENTRAINEUR", "DRIVER/ENTRAINEUR"],
+                                       exclure_patterns=["RATING ELO", "ELO"])
+
+        # ⭐ ELO : Détection avec les noms MultiIndex normalisés
+        self.elo_cheval = detecter_colonne(df, ["RATING ELO | CHEVAL", "RATING ELO CHEVAL", "ELO CHEVAL", "RATING ELO"])
+        # Pour le jockey : première colonne qui contient "JOCKEY" et "ELO"
+        self.elo_jockey = _premiere_colonne(
+            colonnes, lambda c: "jockey" in c and ("elo" in c or "rating" in c))
+
+        # ⭐ COTE
+        self.cote = detecter_colonne(df, ["COTE", "CoteBZH", "COTE | Unnamed"])
+
+        # Repos / Actif / Musique (suffixe MultiIndex)
+        self.repos = _premiere_colonne(colonnes, lambda c: "repos" in c)
+        self.actif = _premiere_colonne(colonnes, lambda c: "actif" in c)
+        self.musique = _premiere_colonne(colonnes, lambda c: "musiq" in c)
+
+        # SIGMA (HORS rating ELO) et PREDICTION IA | Gagnant
+        self.sigma = _premiere_colonne(
+            colonnes, lambda c: "sigma" in c and "rating elo" not in c and "elo" not in c)
+        self.ia = _premiere_colonne(
+            colonnes, lambda c: "prediction" in c and "ia" in c and "gagnant" in c)
+
+# Mises en page distinctes gardées (processus longs : surveillance, service)
+TAILLE_CACHE_SCHEMAS = 64
+
+@lru_cache(maxsize=TAILLE_CACHE_SCHEMAS)
+def _schema(colonnes):
+    return SchemaTurfbzh(colonnes)
+
+def resoudre_schema(colonnes):
+    """
+    Retourne le SchemaTurfbzh des colonnes, mis en cache (LRU borné) par
+    tuple d'en-tête : les classeurs de même mise en page réutilisent la
+    même résolution.
+    """
+    return _schema(tuple(colonnes))
+
 # ==================================================
 # SÉLECTION UTILISATEUR
 # ==================================================
@@ -172,6 +247,13 @@ SEUILS = {
     "COTE_MIN": 3.0,  # Value si cote >= 3
 }
 
+# Poids de la confiance : écart de score, signaux de la base, taille du schéma
+POIDS_CONFIANCE = {
+    "gap": 0.45,
+    "signaux": 0.35,
+    "taille": 0.20,
+}
+
 # ==================================================
 # BORDAS PAR HIPPODROME (numéro de corde)
 # ==================================================
@@ -230,45 +312,87 @@ BORDAS = {
 # ==================================================
 # SCORE RSE (AVEC MUSIQUE)
 # ==================================================
-def calcul_score_rse(row, df_columns):
+def calcul_score_rse(row, df_columns, schema=None, musique_complete=False):
     """
     Calcule le score RSE en cherchant les colonnes même avec MultiIndex
     RSE = Repos (0-2) + Actif (0-1) + Musique (0-2) = MAX 5
+    schema : SchemaTurfbzh déjà résolu (sinon résolu depuis df_columns)
+    musique_complete : score musique via musique.parser_musique (places à
+    plusieurs chiffres, incidents, années) au lieu de analyser_musique
     """
+    if schema is None:
+        schema = resoudre_schema(df_columns)
+
     score = 0
     
-    # Chercher la colonne Repos
-    repos = None
-    for col in df_columns:
-        if "repos" in str(col).lower():
-            repos = to_float(row.get(col))
-            break
+    # Repos
+    repos = to_float(row.get(schema.repos)) if schema.repos is not None else None
     
     if repos is not None:
         score += 2 if 7 <= repos <= 21 else 1
     
-    # Chercher la colonne Actif
-    actif = False
-    for col in df_columns:
-        if "actif" in str(col).lower():
-            actif = (row.get(col) == 1)
-            break
+    # Actif
+    actif = schema.actif is not None and (row.get(schema.actif) == 1)
     
     if actif:
         score += 1
     
-    # Chercher la colonne Musique
-    musique = None
-    for col in df_columns:
-        if "musiq" in str(col).lower():
-            musique = row.get(col)
-            break
+    # Musique
+    musique = row.get(schema.musique) if schema.musique is not None else None
     
-    score_musique = analyser_musique(musique)
+    if musique_complete:
+        score_musique = score_musique_complete(parser_musique(musique))
+    else:
+        score_musique = analyser_musique(musique)
     score += min(score_musique // 2, 2)  # Max +2 pour la musique (6 pts / 2)
 
     return score
 
+def _points_places(p):
+    """Points d'un tableau de places (NaN = pas de place) : 1-3 = 2, 4-6 = 1, 7+ = 0"""
+    return np.where(np.isnan(p), 0, np.where(p <= 3, 2, np.where(p <= 6, 1, 0)))
+
+def analyser_musique_serie(s):
+    """
+    Version colonne de analyser_musique : même score pour chaque ligne,
+    les 3 premiers éléments et leur premier chiffre extraits par regex
+    """
+    s = pd.Series(s)
+    txt = s.astype(str).str.replace("-", " ", regex=False)
+    jetons = txt.str.extract(r"^\s*(\S+)?(?:\s+(\S+))?(?:\s+(\S+))?")
+    score = np.zeros(len(s), dtype=np.int64)
+    for k in range(3):
+        place = jetons[k].str.extract(r"(\d)", expand=False).astype(float).to_numpy()
+        score += _points_places(place)
+    # None / NaN / '' => 0 (aucun chiffre trouvé dans 'None' ou 'nan')
+    return pd.Series(score, index=s.index)
+
+def calcul_score_rse_serie(df, schema=None, musique_complete=False):
+    """
+    Version colonne de calcul_score_rse : score RSE de toutes les lignes d'un coup
+    schema : SchemaTurfbzh déjà résolu (sinon résolu depuis df.columns)
+    musique_complete : voir calcul_score_rse
+    """
+    if schema is None:
+        schema = resoudre_schema(df.columns)
+    n = len(df)
+
+    score = np.zeros(n, dtype=np.int64)
+    if schema.repos is not None:
+        repos = to_float_serie(df[schema.repos]).to_numpy()
+        with np.errstate(invalid="ignore"):
+            score += np.where(np.isnan(repos), 0, np.where((repos >= 7) & (repos <= 21), 2, 1))
+    if schema.actif is not None:
+        score += (df[schema.actif] == 1).to_numpy().astype(np.int64)
+    if schema.musique is not None:
+        if musique_complete:
+            points = df[schema.musique].map(lambda m: score_musique_complete(parser_musique(m)))
+        else:
+            points = analyser_musique_serie(df[schema.musique])
+        score += np.minimum(points.to_numpy() // 2, 2)
+
+    return pd.Series(score, index=df.index)
+
 # ==================================================
 # CONFIANCE
 # ==================================================
@@ -280,9 +404,27 @@ def compter_signaux_ok(c: Cheval):
         c.VALUE_OK is True  # Maintenant la cote est incluse
     ])
 
-def calcul_confiance(schema, hippodrome=None):
+def bonus_corde(hippodrome, numero, discipline=None, distance=None, tables=None):
+    """
+    Bonus/malus du numéro au départ : table apprise (bordas.py) si
+    l'hippodrome y figure, sinon BORDAS saisi à la main, sinon 0
+    tables : tables apprises à utiliser (None = bordas.json, {} = aucune)
+    """
+    appris = bonus_appris(hippodrome, numero, discipline, distance, tables)
+    if appris is not None:
+        return appris
+    if hippodrome and hippodrome in BORDAS:
+        return BORDAS[hippodrome].get(numero, 0.0)
+    return 0.0
+
+def calcul_confiance(schema, hippodrome=None, afficher=True, poids=POIDS_CONFIANCE,
+                     discipline=None, distance=None, tables_bordas=None):
     """
     Calcule la confiance avec bonus/malus selon la position au départ (bordas)
+    afficher=False : pas de trace console (mode batch)
+    poids : pondération gap / signaux / taille (voir POIDS_CONFIANCE)
+    discipline / distance : choix de la table de corde apprise (optionnels)
+    tables_bordas : voir bonus_corde ({} en backtest sans table antérieure)
     """
     if len(schema) < 2:
         return 0.0
@@ -292,18 +434,17 @@ def calcul_confiance(schema, hippodrome=None):
     sig = compter_signaux_ok(base) / 4  # Sur 4 signaux maintenant
     size = clamp(1 - (len(schema) - 2) / 8)
 
-    conf = 0.45 * gap + 0.35 * sig + 0.20 * size
+    conf = poids["gap"] * gap + poids["signaux"] * sig + poids["taille"] * size
     conf += base.impact_driver()   # ELO jockey via cheval.py
     
     # ⭐ BONUS/MALUS BORDAS (position au départ)
-    if hippodrome and hippodrome in BORDAS:
-        bonus_corde = BORDAS[hippodrome].get(base.numero, 0.0)
-        conf += bonus_corde
-        
-        # Afficher l'impact de la corde
-        if bonus_corde != 0:
-            signe = "+" if bonus_corde > 0 else ""
-            print(f"   🎯 Bonus corde #{base.numero} à {hippodrome} : {signe}{bonus_corde:.2f}")
+    bonus = bonus_corde(hippodrome, base.numero, discipline, distance, tables_bordas)
+    conf += bonus
+
+    # Afficher l'impact de la corde
+    if afficher and bonus != 0:
+        signe = "+" if bonus > 0 else ""
+        print(f"   🎯 Bonus corde #{base.numero} à {hippodrome} : {signe}{bonus:.2f}")
 
     return clamp(conf)
 
@@ -311,6 +452,10 @@ def calcul_confiance(schema, hippodrome=None):
 # RNG DÉTERMINISTE
 # ==================================================
 def stable_seed(fichier, hippo, disc, schema):
+    return stable_seed_numeros(fichier, hippo, disc, [c.numero for c in schema])
+
+def stable_seed_numeros(fichier, hippo, disc, numeros):
+    """stable_seed à partir des seuls numéros du schéma (sans objets Cheval)"""
     key = (
         os.path.basename(fichier)
         + "|"
@@ -318,7 +463,7 @@ def stable_seed(fichier, hippo, disc, schema):
         + "|"
         + str(disc)
         + "|"
-        + ",".join(str(c.numero) for c in schema)
+        + ",".join(str(n) for n in numeros)
     )
     return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16)
 
@@ -326,6 +471,10 @@ def stable_seed(fichier, hippo, disc, schema):
 # TIRAGE DÉ PONDÉRÉ (DÉTERMINISTE)
 # ==================================================
 def tirer_face(conf, disc, rng):
+    return rng.choices([1, 2, 3, 4, 5, 6], weights=poids_faces(conf, disc))[0]
+
+def poids_faces(conf, disc):
+    """Probabilités des faces 1 à 6 selon la confiance et la discipline"""
     if conf >= 0.75:
         w = [0.35, 0.30, 0.20, 0.10, 0.04, 0.01]
     elif conf >= 0.5:
@@ -341,8 +490,7 @@ def tirer_face(conf, disc, rng):
         w[5] *= 2.2
 
     s = sum(w)
-    w = [x / s for x in w]
-    return rng.choices([1, 2, 3, 4, 5, 6], weights=w)[0]
+    return [x / s for x in w]
 
 # ==================================================
 # TRI & TICKET
@@ -442,107 +590,41 @@ def choisir_fichier_xlsx():
     sys.exit(1)
 
 # ==================================================
-# MAIN
+# CONSTRUCTION DES CHEVAUX
 # ==================================================
-def main():
-    fichier = choisir_fichier_xlsx()
-    print(f"\n📂 Fichier : {fichier}")
-
-    hippo = choisir_hippodrome()
-    disc = choisir_discipline()
-    if disc not in DOMAINES:
-        print("❌ Discipline invalide.")
-        sys.exit(1)
-    regles = DOMAINES[disc]
-
-    # Lire avec les 2 lignes d'en-têtes (MultiIndex)
-    df = pd.read_excel(fichier, header=[0, 1])
-    df = normalize_columns(df)
-
-    # Colonnes principales (EXCLURE les colonnes ELO de la recherche JOCKEY)
-    col_num = detecter_colonne(df, ["N°", "Nº", "NUM", "NO"])
-    col_nom = detecter_colonne(df, ["CHEVAL/MUSIQ.", "CHEVAL", "CHEVAL | MUSIQ", "CHEVAL/MUSIQUE"])
-    col_jockey = detecter_colonne(df, ["JOCKEY", "DRIVER", "DRIVER/JOCKEY", "JOCKEY/ENTRAINEUR", "DRIVER/ENTRAINEUR"], 
-                                   exclure_patterns=["RATING ELO", "ELO"])
-
-    require_col(col_num, "N° / NUM")
-    require_col(col_nom, "CHEVAL")
-
-    # ⭐ ELO : Détection avec les noms MultiIndex normalisés
-    col_elo_cheval = detecter_colonne(df, ["RATING ELO | CHEVAL", "RATING ELO CHEVAL", "ELO CHEVAL", "RATING ELO"])
-    
-    # Pour le jockey : cherche dans toutes les colonnes qui contiennent "JOCKEY" et "ELO"
-    col_elo_jockey = None
-    for col in df.columns:
-        col_low = str(col).lower()
-        if "jockey" in col_low and ("elo" in col_low or "rating" in col_low):
-            col_elo_jockey = col
-            break
-    
-    # ⭐ COTE : Détection
-    col_cote = detecter_colonne(df, ["COTE", "CoteBZH", "COTE | Unnamed"])
-
-    print(f"🧑‍✈️ Colonne JOCKEY : {col_jockey}")
-    print(f"🐎 Colonne ELO CHEVAL : {col_elo_cheval}")
-    print(f"📈 Colonne ELO JOCKEY : {col_elo_jockey}")
-    print(f"💰 Colonne COTE : {col_cote}")
+def construire_chevaux(df, regles, schema, musique_complete=False):
+    """
+    Construit la liste des Cheval d'un classeur normalisé
+    à partir des colonnes déjà résolues (SchemaTurfbzh)
+    """
+    def lire(r, col):
+        return r.get(col) if col is not None else None
 
     chevaux = []
+    scores = calcul_score_rse_serie(df, schema, musique_complete)
 
-    for _, r in df.iterrows():
-        if pd.isna(r.get(col_num)):
+    for (_, r), score in zip(df.iterrows(), scores):
+        if pd.isna(lire(r, schema.num)):
             continue
 
-        c = Cheval(r.get(col_num), str(r.get(col_nom)).strip())
+        c = Cheval(r.get(schema.num), str(r.get(schema.nom)).strip())
 
-        # 🔍 Chercher Repos et Actif avec le suffixe MultiIndex
-        repos = None
-        for col in df.columns:
-            if "repos" in str(col).lower():
-                repos = to_float(r.get(col))
-                break
-        
-        actif = False
-        for col in df.columns:
-            if "actif" in str(col).lower():
-                actif = (r.get(col) == 1)
-                break
+        # Domaine
+        repos = to_float(lire(r, schema.repos))
+        actif = schema.actif is not None and (r.get(schema.actif) == 1)
 
         V = actif if regles["actif_only"] else True
         F = (repos is None) or (repos <= regles["repos_max"])
 
         c.set_domaine(V, F)
-        c.set_score_rse(calcul_score_rse(r, df.columns))
-
-        # Chercher SIGMA (HORS rating ELO)
-        sigma = None
-        for col in df.columns:
-            col_str = str(col).lower()
-            if "sigma" in col_str and "rating elo" not in col_str and "elo" not in col_str:
-                sigma = to_float(r.get(col))
-                break
-        
-        # Chercher PREDICTION IA | Gagnant
-        ia = None
-        for col in df.columns:
-            col_str = str(col).lower()
-            if "prediction" in col_str and "ia" in col_str and "gagnant" in col_str:
-                ia = to_float(r.get(col))
-                break
+        c.set_score_rse(score)
 
-        # Lecture ELO avec gestion robuste
-        elo_c = None
-        if col_elo_cheval and col_elo_cheval in r.index:
-            elo_c = to_float(r.get(col_elo_cheval))
-        
-        elo_j = None
-        if col_elo_jockey and col_elo_jockey in r.index:
-            elo_j = to_float(r.get(col_elo_jockey))
-        
-        # Lecture COTE
-        cote = None
-        if col_cote and col_cote in r.index:
-            cote = to_float(r.get(col_cote))
+        # Signaux
+        sigma = to_float(lire(r, schema.sigma))
+        ia = to_float(lire(r, schema.ia))
+        elo_c = to_float(lire(r, schema.elo_cheval))
+        elo_j = to_float(lire(r, schema.elo_jockey))
+        cote = to_float(lire(r, schema.cote))
 
         c.set_signaux(
             sigma=(sigma is not None and sigma >= SEUILS["SIGMA_MIN"]),
@@ -551,22 +633,153 @@ def main():
             value=(cote is not None and cote >= SEUILS["COTE_MIN"])
         )
 
-        jockey = extraire_nom_jockey(r.get(col_jockey)) if col_jockey else None
+        jockey = extraire_nom_jockey(r.get(schema.jockey)) if schema.jockey else None
         c.set_driver(jockey, elo_j)
         
         # Stocker musique et cote dans l'objet
-        musique_val = None
-        for col in df.columns:
-            if "musiq" in str(col).lower():
-                musique_val = r.get(col)
-                break
-        c.set_musique(musique_val)
+        c.set_musique(lire(r, schema.musique))
         c.set_cote(cote)
 
         chevaux.append(c)
 
+    return chevaux
+
+# ==================================================
+# VERDICT (SANS INTERACTION)
+# ==================================================
+def verdict_course(schema, fichier, hippo, disc, afficher=True):
+    """
+    Confiance, tirages déterministes, ticket et pari d'un schéma trié (>= 2 chevaux)
+    """
+    conf = calcul_confiance(schema, hippo, afficher=afficher, discipline=disc)
+    seed = stable_seed(fichier, hippo, disc, schema)
+    rng = random.Random(seed)
+
+    tirages = [tirer_face(conf, disc, rng) for _ in range(5)]
+    face_finale = Counter(tirages).most_common(1)[0][0]
+    
+    # Limiter la face au nombre de chevaux disponibles
+    face_finale = min(face_finale, len(schema))
+
+    ticket = selection_ticket(schema, face_finale)
+    nb_disponibles = len(schema)
+
+    return {
+        "confiance": conf,
+        "seed": seed,
+        "tirages": tirages,
+        "face": face_finale,
+        "ticket": ticket,
+        "nb_disponibles": nb_disponibles,
+        "pari": face_to_pari(face_finale, conf, nb_disponibles),
+        "recommandation": recommander_pari(conf, len(ticket)),
+    }
+
+def lire_classeur_excel(fichier):
+    """Lit un classeur turfbzh (2 lignes d'en-têtes) et normalise les colonnes"""
+    df = pd.read_excel(fichier, header=[0, 1])
+    return normalize_columns(df)
+
+def lire_classeur(fichier, cache=True):
+    """
+    lire_classeur_excel via le cache disque par contenu (cache_classeurs) :
+    un classeur déjà lu n'est pas reparsé. cache=False : lecture directe.
+    """
+    if not cache:
+        return lire_classeur_excel(fichier)
+    from cache_classeurs import charger
+    return charger(fichier, lire_classeur_excel)
+
+def analyser_classeur(fichier, hippo, disc, df=None, afficher=False, historique=None, date=None):
+    """
+    Analyse complète d'un classeur turfbzh, sans question ni sys.exit.
+    Lève ValueError si la discipline ou une colonne obligatoire manque.
+    historique / date : table historique.charger_table() et jour de la
+    course ("AAAA-MM-JJ") pour compléter repos / actif manquants (as-of)
+    Retourne un dict à plat (une ligne du tableau de verdicts).
+    """
+    if disc not in DOMAINES:
+        raise ValueError(f"Discipline invalide : {disc}")
+    if df is None:
+        df = lire_classeur(fichier)
+
+    colonnes = resoudre_schema(df.columns)
+    if not colonnes.num:
+        raise ValueError("Colonne obligatoire introuvable : N° / NUM")
+    if not colonnes.nom:
+        raise ValueError("Colonne obligatoire introuvable : CHEVAL")
+
+    if historique is not None and date is not None:
+        from historique import completer_classeur
+        df = completer_classeur(df, colonnes, date, historique)
+        colonnes = resoudre_schema(df.columns)
+
+    chevaux = construire_chevaux(df, DOMAINES[disc], colonnes)
     schema = trier_schema([c for c in chevaux if c.est_dans_domaine()])
 
+    ligne = {
+        "fichier": os.path.basename(fichier),
+        "hippodrome": hippo,
+        "discipline": disc,
+        "nb_partants": len(chevaux),
+        "nb_eligibles": len(schema),
+        "schema": [c.numero for c in schema],
+    }
+
+    if len(schema) < 2:
+        return {**ligne, "verdict": "NO BET", "base": None, "ticket": [], "pari": None,
+                "confiance": 0.0, "face": None, "seed": None, "tirages": [],
+                "recommandation": "❌ 1RSE : NO BET (pas assez de chevaux dans le domaine)"}
+
+    v = verdict_course(schema, fichier, hippo, disc, afficher=afficher)
+    return {
+        **ligne,
+        "verdict": "JOUER",
+        "base": v["ticket"][0].numero,
+        "ticket": [c.numero for c in v["ticket"]],
+        "pari": v["pari"],
+        "confiance": v["confiance"],
+        "face": v["face"],
+        "seed": v["seed"],
+        "tirages": v["tirages"],
+        "recommandation": v["recommandation"],
+    }
+
+# ==================================================
+# MAIN
+# ==================================================
+@point_entree("test_rse_turfbzh.main")
+def main():
+    fichier = choisir_fichier_xlsx()
+    print(f"\n📂 Fichier : {fichier}")
+
+    hippo = choisir_hippodrome()
+    disc = choisir_discipline()
+    if disc not in DOMAINES:
+        print("❌ Discipline invalide.")
+        sys.exit(1)
+    regles = DOMAINES[disc]
+
+    # Lire avec les 2 lignes d'en-têtes (MultiIndex)
+    with etape("lecture_excel") as e:
+        df = lire_classeur(fichier)
+        e.lignes = len(df)
+
+    # Colonnes détectées une seule fois pour tout le classeur
+    colonnes = resoudre_schema(df.columns)
+
+    require_col(colonnes.num, "N° / NUM")
+    require_col(colonnes.nom, "CHEVAL")
+
+    print(f"🧑‍✈️ Colonne JOCKEY : {colonnes.jockey}")
+    print(f"🐎 Colonne ELO CHEVAL : {colonnes.elo_cheval}")
+    print(f"📈 Colonne ELO JOCKEY : {colonnes.elo_jockey}")
+    print(f"💰 Colonne COTE : {colonnes.cote}")
+
+    with etape("scoring", lignes=len(df)):
+        chevaux = construire_chevaux(df, regles, colonnes)
+        schema = trier_schema([c for c in chevaux if c.est_dans_domaine()])
+
     print("\nANALYSE DOMAINE HIPPIQUE – 1RSE (AVEC COTE + MUSIQUE)")
     print("-" * 70)
 
@@ -581,41 +794,42 @@ def main():
             f"JOCKEY={c.driver_nom} ELO_J={c.driver_elo} ({c.driver_niveau})"
         )
 
-    conf = calcul_confiance(schema, hippo)
-    seed = stable_seed(fichier, hippo, disc, schema)
-    rng = random.Random(seed)
-
-    tirages = [tirer_face(conf, disc, rng) for _ in range(5)]
-    face_finale = Counter(tirages).most_common(1)[0][0]
-    
-    # Limiter la face au nombre de chevaux disponibles
-    face_finale = min(face_finale, len(schema))
-
-    ticket = selection_ticket(schema, face_finale)
-    nb_disponibles = len(schema)
+    with etape("verdict", lignes=len(schema)):
+        v = verdict_course(schema, fichier, hippo, disc)
+    conf, seed, tirages = v["confiance"], v["seed"], v["tirages"]
+    face_finale, ticket, nb_disponibles = v["face"], v["ticket"], v["nb_disponibles"]
 
     print("\n🎲 SIMULATION 5 TIRAGES (DÉTERMINISTE)")
     print("-" * 70)
     print(tirages)
 
+    # Distribution complète (même seed => même distribution)
+    from monte_carlo import distribution_course, NB_TIRAGES
+    with etape("monte_carlo", lignes=NB_TIRAGES):
+        dist = distribution_course(conf, disc, nb_disponibles, seed)
+    print(f"\n📈 DISTRIBUTION MONTE CARLO ({NB_TIRAGES} tirages)")
+    print("-" * 70)
+    print("Faces : " + " | ".join(f"{f}: {p:.1%}" for f, p in dist["faces"].items()))
+    for pari, p in dist["paris"].items():
+        print(f"   {pari:15s} : {p:.1%}")
+
     print("\n🎯 VERDICT FINAL")
     print("-" * 70)
     print(f"🥇 BASE : {ticket[0].numero} {ticket[0].nom}")
     
     # Afficher l'info corde si hippodrome connu
-    if hippo and hippo in BORDAS:
-        bonus_corde = BORDAS[hippo].get(ticket[0].numero, 0.0)
-        if bonus_corde > 0:
-            print(f"   ✅ Avantage corde #{ticket[0].numero} : +{bonus_corde:.2f}")
-        elif bonus_corde < 0:
-            print(f"   ⚠️ Désavantage corde #{ticket[0].numero} : {bonus_corde:.2f}")
+    bonus = bonus_corde(hippo, ticket[0].numero, disc)
+    if bonus > 0:
+        print(f"   ✅ Avantage corde #{ticket[0].numero} : +{bonus:.2f}")
+    elif bonus < 0:
+        print(f"   ⚠️ Désavantage corde #{ticket[0].numero} : {bonus:.2f}")
     
     print(f"🎟️ Ticket : {[c.numero for c in ticket]}")
-    print(f"✅ Pari suggéré : {face_to_pari(face_finale, conf, nb_disponibles)}")
+    print(f"✅ Pari suggéré : {v['pari']}")
     print(f"📊 Confiance : {conf:.2f} | Face finale : {face_finale} | Chevaux éligibles : {nb_disponibles}")
     print(f"🔒 Seed : {seed} (mêmes données => mêmes résultats)")
     print()
-    print(recommander_pari(conf, len(ticket)))
+    print(v["recommandation"])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file